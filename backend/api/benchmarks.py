@@ -0,0 +1,39 @@
+import statistics
+import time
+
+
+def timed(fn, repeat=1):
+    """Call fn repeat times and return the wall time of each call in seconds"""
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        samples.append(time.perf_counter() - start)
+    return samples
+
+
+def percentile(samples, pct):
+    ordered = sorted(samples)
+    if not ordered:
+        return 0.0
+    index = min(len(ordered) - 1, round(pct / 100 * (len(ordered) - 1)))
+    return ordered[index]
+
+
+def summarize(samples):
+    """p50/p95/p99/mean of a list of durations, in milliseconds"""
+    return {
+        "n": len(samples),
+        "mean_ms": statistics.fmean(samples) * 1000 if samples else 0.0,
+        "p50_ms": percentile(samples, 50) * 1000,
+        "p95_ms": percentile(samples, 95) * 1000,
+        "p99_ms": percentile(samples, 99) * 1000,
+    }
+
+
+def format_summary(label, samples):
+    s = summarize(samples)
+    return (
+        f"{label}: n={s['n']} mean={s['mean_ms']:.3f}ms "
+        f"p50={s['p50_ms']:.3f}ms p95={s['p95_ms']:.3f}ms p99={s['p99_ms']:.3f}ms"
+    )
@@ -0,0 +1,195 @@
+import base64
+import datetime
+
+from django.conf import settings
+from django.db.models import Exists, Min, OuterRef
+from django.utils import timezone
+
+from .models import ChangeEvent, ConcertPage, SeatZone, TicketType, VenuePage
+
+# kind: (model, model of the parent, field holding the parent's id)
+SOURCES = {
+    "venue": (VenuePage, None, None),
+    "zone": (SeatZone, VenuePage, "venue_id"),
+    "concert": (ConcertPage, VenuePage, "venue_id"),
+    "ticket_type": (TicketType, ConcertPage, "concert_id"),
+}
+
+
+def record_changes(kind, objects, action):
+    """
+    Append an event per object to the change feed, e.g.
+    record_changes("zone", zones, "updated"). Call it in the transaction
+    that makes the change, so the feed and the catalog always agree.
+    """
+    _, _, parent_field = SOURCES[kind]
+    record_change_rows(
+        kind,
+        [(obj.pk, obj.slug, getattr(obj, parent_field) if parent_field else None)
+         for obj in objects if obj.pk],
+        action,
+    )
+
+
+def record_change_rows(kind, rows, action):
+    """record_changes for (id, slug, parent id) rows, without model instances"""
+    if not rows:
+        return
+    _, parent_model, _ = SOURCES[kind]
+    parents = {}
+    if parent_model is not None:
+        parent_ids = {parent_id for _, _, parent_id in rows}
+        parents = dict(parent_model.objects.filter(pk__in=parent_ids).values_list("pk", "slug"))
+    now = timezone.now()
+    ChangeEvent.objects.bulk_create([
+        ChangeEvent(
+            kind=kind, object_id=object_id, action=action, slug=slug, created_at=now,
+            parent=parents.get(parent_id, ""),
+        )
+        for object_id, slug, parent_id in rows
+    ])
+
+
+def compact(before, batch_size=1000):
+    """
+    Delete the events written before before that a later event for the
+    same object supersedes, returning how many were deleted. Readers
+    collapse each object's events to the last one anyway, so this changes
+    nothing they see from any cursor: every object keeps its latest event,
+    deletes included, and the feed read from the beginning stays a full
+    copy of the catalog.
+    """
+    superseded = ChangeEvent.objects.filter(created_at__lt=before).filter(Exists(
+        ChangeEvent.objects.filter(
+            kind=OuterRef("kind"), object_id=OuterRef("object_id"), id__gt=OuterRef("id")
+        )
+    ))
+    deleted = 0
+    while True:
+        batch = list(superseded.values_list("pk", flat=True)[:batch_size])
+        if not batch:
+            return deleted
+        ChangeEvent.objects.filter(pk__in=batch).delete()
+        deleted += len(batch)
+
+
+def encode_cursor(event_id):
+    return base64.urlsafe_b64encode(f"v1:{event_id}".encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor):
+    """The id of the last event a cursor has seen; no cursor starts from the beginning"""
+    if not cursor:
+        return 0
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        version, event_id = base64.urlsafe_b64decode(padded).decode().split(":")
+        if version == "v1" and int(event_id) >= 0:
+            return int(event_id)
+    except ValueError:
+        pass
+    raise ValueError("Invalid cursor")
+
+
+def _venue(venue):
+    return {"slug": venue.slug, "name": venue.name, "address": venue.address,
+            "capacity": venue.capacity, "admission_mode": venue.admission_mode}
+
+
+def _zone(zone):
+    return {"slug": zone.slug, "name": zone.name, "type": zone.type,
+            "row_start": zone.row_start, "row_end": zone.row_end,
+            "seat_start": zone.seat_start, "seat_end": zone.seat_end,
+            "total_seats": zone.total_seats, "ga_capacity": zone.capacity,
+            "provisioned": zone.provisioned}
+
+
+def _concert(concert):
+    return {"slug": concert.slug, "title": concert.title, "artist": concert.artist,
+            "date": concert.date.isoformat(),
+            "start_time": concert.start_time.strftime("%H:%M"),
+            "end_time": concert.end_time.strftime("%H:%M") if concert.end_time else None,
+            "genre": concert.genre}
+
+
+def _ticket_type(tt):
+    return {"slug": tt.slug, "type": tt.type, "price": str(tt.price),
+            "seat_zone": tt.seat_zone.slug if tt.seat_zone else None,
+            "ga_capacity": tt.ga_capacity}
+
+
+SERIALIZERS = {
+    "venue": (lambda: VenuePage.objects.live(), _venue),
+    "zone": (lambda: SeatZone.objects.all(), _zone),
+    "concert": (lambda: ConcertPage.objects.live(), _concert),
+    "ticket_type": (lambda: TicketType.objects.select_related("seat_zone"), _ticket_type),
+}
+
+
+def _links(change):
+    slug, parent = change["slug"], change["parent"]
+    return {
+        "venue": f"/api/venues/{slug}/",
+        "zone": f"/api/venues/{parent}/zones/{slug}/",
+        "concert": f"/api/venues/{parent}/concerts/{slug}/",
+        "ticket_type": f"/api/ticket-types/{slug}/",
+    }[change["type"]]
+
+
+def changes_since(cursor, limit):
+    """
+    Catalog changes after cursor: (changes, next cursor, has_more). Up to
+    limit events are read and collapsed to one change per object, carrying
+    the object's current data unless it was deleted; "created" and
+    "updated" should both be applied as upserts.
+
+    Event ids are taken before their transaction commits, so a younger
+    event can still appear below the id of an older one. Events written in
+    the last CHANGE_FEED_LAG seconds, and everything after them, are left
+    for a later call, so the cursor never moves past one that is not yet
+    visible.
+    """
+    after = decode_cursor(cursor)
+    settled = timezone.now() - datetime.timedelta(seconds=settings.CHANGE_FEED_LAG)
+    events = ChangeEvent.objects.filter(id__gt=after).order_by("id")
+    unsettled = events.filter(created_at__gt=settled).aggregate(first=Min("id"))["first"]
+    if unsettled is not None:
+        events = events.filter(id__lt=unsettled)
+    events = list(events[:limit + 1])
+    has_more = len(events) > limit
+    events = events[:limit]
+
+    changes = {}
+    for event in events:
+        key = (event.kind, event.object_id)
+        previous = changes.pop(key, None)
+        action = event.action
+        if previous and previous["action"] == "created" and action == "updated":
+            action = "created"
+        changes[key] = {
+            "type": event.kind, "id": event.object_id, "action": action,
+            "slug": event.slug, "parent": event.parent,
+        }
+
+    for kind, (queryset, serialize) in SERIALIZERS.items():
+        ids = [object_id for k, object_id in changes if k == kind]
+        if not ids:
+            continue
+        current = queryset().in_bulk(ids)
+        for object_id in ids:
+            change = changes[(kind, object_id)]
+            obj = current.get(object_id)
+            if change["action"] == "deleted":
+                continue
+            if obj is None:
+                # Deleted or unpublished since; a later event says so too
+                change["action"] = "deleted"
+                continue
+            change["slug"] = obj.slug
+            change["data"] = serialize(obj)
+    for change in changes.values():
+        if change["action"] != "deleted":
+            change["_links"] = {"self": _links(change)}
+
+    next_cursor = encode_cursor(events[-1].id if events else after)
+    return list(changes.values()), next_cursor, has_more
@@ -0,0 +1,17 @@
+def assign(instance, values, prefix=""):
+    """
+    Set field values on a model instance and return the names of the fields
+    whose value actually changed, e.g. ["price"].
+
+    Incoming values go through the field's to_python first, so the strings
+    an API payload carries compare equal to the stored values: "20:00" to
+    time(20, 0), "1500" to Decimal("1500.00"), "2025-02-21" to a date.
+    """
+    changed = []
+    for name, value in values.items():
+        field = instance._meta.get_field(name)
+        value = field.to_python(value)
+        if getattr(instance, field.attname) != value:
+            setattr(instance, field.attname, value)
+            changed.append(f"{prefix}{name}")
+    return changed
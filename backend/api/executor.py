@@ -0,0 +1,43 @@
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.db import close_old_connections
+
+_executor = None
+_lock = threading.Lock()
+
+
+def get_executor():
+    """The shared pool for blocking work in async views, API_BLOCKING_WORKERS threads"""
+    global _executor
+    if _executor is None:
+        with _lock:
+            if _executor is None:
+                _executor = ThreadPoolExecutor(
+                    max_workers=getattr(settings, "API_BLOCKING_WORKERS", 8),
+                    thread_name_prefix="blocking",
+                )
+    return _executor
+
+
+def _call(fn, args, kwargs):
+    # Pool threads outlive requests, so give their connections the same
+    # CONN_MAX_AGE treatment request threads get
+    close_old_connections()
+    try:
+        return fn(*args, **kwargs)
+    finally:
+        close_old_connections()
+
+
+async def run_blocking(fn, *args, **kwargs):
+    """
+    Run sync code (ORM helpers without async variants, image renditions)
+    from an async view without tying up more than API_BLOCKING_WORKERS
+    threads however many requests are in flight.
+    """
+    return await sync_to_async(_call, thread_sensitive=False, executor=get_executor())(
+        fn, args, kwargs
+    )
@@ -0,0 +1,170 @@
+import csv
+
+from asgiref.sync import sync_to_async
+
+from .models import ConcertPage, SeatZone, SoldSeat, TicketType, VenuePage
+
+# Optional, only needed for Parquet files
+try:
+    import pyarrow
+    import pyarrow.parquet
+except ImportError:  # pragma: no cover
+    pyarrow = None
+
+CHUNK_SIZE = 2000
+
+# Export name -> (model, [(field lookup, column type)]). Rows are read with
+# values_list, so no model instances are built however many rows there are.
+EXPORTS = {
+    "venues": (VenuePage, [
+        ("id", "int"),
+        ("slug", "str"),
+        ("name", "str"),
+        ("address", "str"),
+        ("capacity", "int"),
+        ("admission_mode", "str"),
+        ("live", "bool"),
+    ]),
+    "zones": (SeatZone, [
+        ("id", "int"),
+        ("venue__slug", "str"),
+        ("slug", "str"),
+        ("name", "str"),
+        ("type", "str"),
+        ("row_start", "str"),
+        ("row_end", "str"),
+        ("seat_start", "int"),
+        ("seat_end", "int"),
+        ("capacity", "int"),
+    ]),
+    "concerts": (ConcertPage, [
+        ("id", "int"),
+        ("slug", "str"),
+        ("title", "str"),
+        ("venue__slug", "str"),
+        ("date", "date"),
+        ("start_time", "time"),
+        ("end_time", "time"),
+        ("artist", "str"),
+        ("genre", "str"),
+        ("live", "bool"),
+    ]),
+    "ticket-types": (TicketType, [
+        ("id", "int"),
+        ("slug", "str"),
+        ("concert__slug", "str"),
+        ("seat_zone__slug", "str"),
+        ("type", "str"),
+        ("price", "decimal"),
+        ("ga_capacity", "int"),
+        ("sold", "int"),
+    ]),
+    "sold-seats": (SoldSeat, [
+        ("id", "int"),
+        ("concert__slug", "str"),
+        ("seat__zone__slug", "str"),
+        ("seat__identifier", "str"),
+    ]),
+}
+
+
+def columns(name):
+    return [field for field, _ in EXPORTS[name][1]]
+
+
+def headers(name):
+    """Column names as written to files, e.g. venue_slug for venue__slug"""
+    return [field.replace("__", "_") for field in columns(name)]
+
+
+def export_rows(name, using="default", chunk_size=CHUNK_SIZE):
+    """
+    Every row of an export as a tuple, fetched chunk_size at a time through a
+    server-side cursor where the database supports one.
+    """
+    model = EXPORTS[name][0]
+    return (
+        model._default_manager.using(using)
+        .order_by("pk")
+        .values_list(*columns(name))
+        .iterator(chunk_size=chunk_size)
+    )
+
+
+class _Echo:
+    """File-like object whose write returns the line, for csv.writer"""
+
+    def write(self, value):
+        return value
+
+
+def csv_chunks(name, using="default", chunk_size=CHUNK_SIZE):
+    """The export as CSV text, one string per chunk_size rows"""
+    writer = csv.writer(_Echo())
+    yield writer.writerow(headers(name))
+    lines = []
+    for row in export_rows(name, using, chunk_size):
+        lines.append(writer.writerow(row))
+        if len(lines) == chunk_size:
+            yield "".join(lines)
+            lines = []
+    if lines:
+        yield "".join(lines)
+
+
+async def acsv_chunks(name, using="default", chunk_size=CHUNK_SIZE):
+    """
+    csv_chunks for ASGI, which would otherwise read a sync iterator into a
+    list before sending it. Each chunk is fetched on the request's sync
+    thread, where the cursor lives.
+    """
+    chunks = csv_chunks(name, using, chunk_size)
+    fetch = sync_to_async(next, thread_sensitive=True)
+    while (chunk := await fetch(chunks, None)) is not None:
+        yield chunk
+
+
+def _arrow_type(kind):
+    return {
+        "int": pyarrow.int64(),
+        "str": pyarrow.string(),
+        "bool": pyarrow.bool_(),
+        "date": pyarrow.date32(),
+        "time": pyarrow.time64("us"),
+        "decimal": pyarrow.decimal128(10, 2),
+    }[kind]
+
+
+def write_parquet(name, path, using="default", chunk_size=CHUNK_SIZE * 25):
+    """
+    Write the export to a Parquet file, one row group per chunk_size rows,
+    and return the number of rows written. Needs pyarrow.
+    """
+    if pyarrow is None:
+        raise RuntimeError("Parquet exports need pyarrow (pip install pyarrow)")
+    schema = pyarrow.schema(
+        [
+            (header, _arrow_type(kind))
+            for header, (_, kind) in zip(headers(name), EXPORTS[name][1])
+        ]
+    )
+
+    def write(writer, rows):
+        arrays = [
+            pyarrow.array(values, type=field.type) for values, field in zip(zip(*rows), schema)
+        ]
+        writer.write_batch(pyarrow.RecordBatch.from_arrays(arrays, schema=schema))
+
+    written = 0
+    with pyarrow.parquet.ParquetWriter(path, schema) as writer:
+        rows = []
+        for row in export_rows(name, using, chunk_size):
+            rows.append(row)
+            if len(rows) == chunk_size:
+                write(writer, rows)
+                written += len(rows)
+                rows = []
+        if rows:
+            write(writer, rows)
+            written += len(rows)
+    return written
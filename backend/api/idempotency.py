@@ -0,0 +1,165 @@
+import datetime
+import gzip
+import hashlib
+import json
+import time
+from functools import wraps
+
+from django.conf import settings
+from django.db import IntegrityError, transaction
+from django.http import HttpResponse
+from django.utils import timezone
+
+from .models import IdempotencyKey
+from .responses import JSON_CONTENT_TYPE, MSGPACK_CONTENT_TYPES, api_response, msgpack
+
+KEY_HEADER = "Idempotency-Key"
+REPLAYED_HEADER = "Idempotent-Replayed"
+
+
+def _request_hash(request):
+    return hashlib.sha256(request.method.encode() + b" " + request.body).hexdigest()
+
+
+def _client(request):
+    """
+    Who sent the request: their credentials when they send any, otherwise
+    their address. Keys are only matched within one client, so two clients
+    that happen to pick the same key don't get each other's responses.
+    """
+    identity = request.headers.get("Authorization") or request.META.get("REMOTE_ADDR", "")
+    return hashlib.sha256(identity.encode()).hexdigest()
+
+
+def _claim(key, client, path, request_hash):
+    """
+    Insert the in-flight row for key, or return the row that is already
+    there. Expired rows, and in-flight rows whose request has presumably
+    died, are removed so the key can be claimed again.
+    """
+    now = timezone.now()
+    try:
+        with transaction.atomic():
+            IdempotencyKey.objects.create(
+                key=key,
+                client=client,
+                path=path,
+                request_hash=request_hash,
+                created_at=now,
+                expires_at=now + datetime.timedelta(seconds=settings.IDEMPOTENCY_KEY_TTL),
+            )
+        return None
+    except IntegrityError:
+        pass
+
+    existing = IdempotencyKey.objects.filter(key=key, client=client, path=path).first()
+    stale = now - datetime.timedelta(seconds=settings.IDEMPOTENCY_LOCK_TIMEOUT)
+    if existing is not None and (
+        existing.expires_at <= now or (existing.status is None and existing.created_at < stale)
+    ):
+        IdempotencyKey.objects.filter(pk=existing.pk, created_at=existing.created_at).delete()
+        return _claim(key, client, path, request_hash)
+    return existing
+
+
+def _store(stored, response):
+    """
+    Save the finished response into stored, decompressed: the retry may
+    not accept the encoding or content type the first request asked for.
+    """
+    body = response.content
+    if response.get("Content-Encoding") == "gzip":
+        body = gzip.decompress(body)
+    stored.update(status=response.status_code, content_type=response.get("Content-Type", ""), body=body)
+
+
+def _replay(request, stored):
+    """
+    Rebuild the stored response for request. API payloads are decoded and
+    negotiated again, as the view would have done, so the replay gets the
+    content type, encoding and Vary header this request asked for.
+    """
+    body = bytes(stored.body)
+    content_type = stored.content_type.split(";")[0].strip()
+    if content_type == JSON_CONTENT_TYPE:
+        response = api_response(request, json.loads(body), status=stored.status)
+    elif content_type in MSGPACK_CONTENT_TYPES and msgpack is not None:
+        response = api_response(request, msgpack.unpackb(body), status=stored.status)
+    else:
+        response = HttpResponse(body, content_type=stored.content_type, status=stored.status)
+    response[REPLAYED_HEADER] = "true"
+    return response
+
+
+def idempotent(view):
+    """
+    Honour an Idempotency-Key header on POSTs to view.
+
+    The first request with a key runs the view and stores its response;
+    repeats of the same request by the same client within
+    IDEMPOTENCY_KEY_TTL get the stored response back without running the
+    view again, and duplicates arriving
+    while the first is still running wait up to IDEMPOTENCY_WAIT_TIMEOUT
+    for it. Server errors are not stored, so the request can be retried.
+    Reusing a key for a different request body is rejected with a 422.
+    """
+
+    @wraps(view)
+    def wrapper(request, *args, **kwargs):
+        key = request.headers.get(KEY_HEADER)
+        if request.method != "POST" or not key:
+            return view(request, *args, **kwargs)
+        if len(key) > IdempotencyKey._meta.get_field("key").max_length:
+            return api_response(request, {"error": f"{KEY_HEADER} is too long"}, status=400)
+
+        client = _client(request)
+        request_hash = _request_hash(request)
+        deadline = time.monotonic() + settings.IDEMPOTENCY_WAIT_TIMEOUT
+        delay = 0.05
+        while True:
+            stored = _claim(key, client, request.path, request_hash)
+            if stored is None:
+                break
+            if stored.request_hash != request_hash:
+                return api_response(
+                    request,
+                    {"error": f"{KEY_HEADER} was already used for a different request"},
+                    status=422,
+                )
+            if stored.status is not None:
+                return _replay(request, stored)
+            if time.monotonic() >= deadline:
+                return api_response(
+                    request,
+                    {"error": f"A request with this {KEY_HEADER} is still in progress"},
+                    status=409,
+                )
+            time.sleep(delay)
+            delay = min(delay * 2, 0.5)
+
+        claimed = IdempotencyKey.objects.filter(key=key, client=client, path=request.path)
+        try:
+            response = view(request, *args, **kwargs)
+        except BaseException:
+            claimed.delete()
+            raise
+
+        if response.status_code >= 500 or response.streaming:
+            claimed.delete()
+        else:
+            _store(claimed, response)
+        return response
+
+    return wrapper
+
+
+def purge_expired(batch_size=1000):
+    """Delete expired keys in batches, returning how many were deleted"""
+    expired = IdempotencyKey.objects.filter(expires_at__lte=timezone.now())
+    deleted = 0
+    while True:
+        batch = list(expired.values_list("pk", flat=True)[:batch_size])
+        if not batch:
+            return deleted
+        IdempotencyKey.objects.filter(pk__in=batch).delete()
+        deleted += len(batch)
@@ -0,0 +1,137 @@
+import logging
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from django.db import close_old_connections, transaction
+from django.db.models import Prefetch
+from wagtail.images import get_image_model
+from wagtail.images.models import Filter
+
+from .signals import renditions_generated
+
+logger = logging.getLogger(__name__)
+
+# Sizes used by listings (thumbnail), cards and concert detail headers (hero)
+RENDITION_SIZES = {
+    "thumbnail": "fill-320x180",
+    "card": "fill-640x360",
+    "hero": "width-1600",
+}
+RENDITION_FORMATS = ("webp", "jpeg")
+
+RENDITION_FILTERS = {
+    (size, fmt): Filter(spec=f"{spec}|format-{fmt}")
+    for size, spec in RENDITION_SIZES.items()
+    for fmt in RENDITION_FORMATS
+}
+
+# Images whose renditions failed are not scheduled again for RETRY_DELAY
+# seconds, doubling with each further failure up to MAX_RETRY_DELAY
+RETRY_DELAY = 60
+MAX_RETRY_DELAY = 6 * 60 * 60
+
+# One worker is enough, renditions are CPU bound and only needed once per image
+_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="renditions")
+_pending = set()
+# image id -> (consecutive failures, monotonic time it may be retried)
+_failures = {}
+
+
+def prefetch_renditions(lookup="image"):
+    """
+    Prefetch our renditions for every image in a listing with a single query,
+    e.g. ConcertPage.objects.prefetch_related(prefetch_renditions())
+    """
+    Rendition = get_image_model().get_rendition_model()
+    return Prefetch(
+        f"{lookup}__renditions",
+        queryset=Rendition.objects.filter(
+            filter_spec__in=[f.spec for f in RENDITION_FILTERS.values()]
+        ),
+        to_attr="prefetched_renditions",
+    )
+
+
+def _generate(image_id):
+    close_old_connections()
+    try:
+        image = get_image_model().objects.get(pk=image_id)
+        existing = image.find_existing_renditions(*RENDITION_FILTERS.values())
+        if len(existing) < len(RENDITION_FILTERS):
+            image.get_renditions(*RENDITION_FILTERS.values())
+            renditions_generated.send(sender=type(image), image=image)
+        _failures.pop(image_id, None)
+    except Exception:
+        failures = _failures.get(image_id, (0, 0))[0] + 1
+        delay = min(RETRY_DELAY * 2 ** (failures - 1), MAX_RETRY_DELAY)
+        _failures[image_id] = (failures, time.monotonic() + delay)
+        logger.exception(
+            "Generating renditions for image %s failed, not retrying for %ss", image_id, delay
+        )
+    finally:
+        _pending.discard(image_id)
+        close_old_connections()
+
+
+def _backing_off(image_id):
+    failure = _failures.get(image_id)
+    return failure is not None and time.monotonic() < failure[1]
+
+
+def _submit(image_id):
+    if image_id in _pending or _backing_off(image_id):
+        return
+    _pending.add(image_id)
+    try:
+        _executor.submit(_generate, image_id)
+    except Exception:
+        _pending.discard(image_id)
+        raise
+
+
+def schedule_renditions(image):
+    """
+    Generate any missing renditions in the background once the transaction
+    commits. The image only counts as pending from then on, so a rollback
+    never stops it from being scheduled again. An image whose renditions
+    failed is skipped until its retry delay has passed.
+    """
+    if image is None or image.pk in _pending or _backing_off(image.pk):
+        return
+    image_id = image.pk
+    transaction.on_commit(lambda: _submit(image_id))
+
+
+def image_url(image, size="card", fmt="jpeg"):
+    """URL of one rendition, falling back to the original until it has been generated"""
+    if image is None:
+        return None
+    rendition = (image_renditions(image).get(size) or {}).get(fmt)
+    return rendition["url"] if rendition else image.file.url
+
+
+def image_renditions(image):
+    """
+    Rendition URLs and sizes for API payloads, keyed by size then format.
+
+    Only renditions that already exist are returned (from the prefetch when
+    there is one); a missing one is scheduled instead of being generated in
+    the request, unless it recently failed, and the original stays available
+    as image_url meanwhile.
+    """
+    if image is None:
+        return None
+    existing = image.find_existing_renditions(*RENDITION_FILTERS.values())
+    if len(existing) < len(RENDITION_FILTERS):
+        schedule_renditions(image)
+
+    renditions = {}
+    for (size, fmt), rendition_filter in RENDITION_FILTERS.items():
+        rendition = existing.get(rendition_filter)
+        if rendition is not None:
+            renditions.setdefault(size, {})[fmt] = {
+                "url": rendition.url,
+                "width": rendition.width,
+                "height": rendition.height,
+            }
+    return renditions
@@ -0,0 +1,131 @@
+import threading
+from array import array
+
+from .models import Seat, SeatZone, VenueLayoutVersion
+
+_layouts = {}
+_lock = threading.Lock()
+
+
+class ZoneLayout:
+    """The bounds of a zone and its seat ids, in id order, with their identifiers"""
+
+    FIELDS = ("id", "slug", "type", "row_start", "row_end", "seat_start", "seat_end", "provisioned")
+
+    __slots__ = FIELDS + ("seat_ids", "identifiers", "_seat_map")
+
+    def __init__(self, zone):
+        for field in self.FIELDS:
+            setattr(self, field, zone[field])
+        self.seat_ids = array("q")
+        self.identifiers = []
+        self._seat_map = None
+
+    def __len__(self):
+        return len(self.seat_ids)
+
+    @property
+    def width(self):
+        return self.seat_end - self.seat_start + 1
+
+    @property
+    def row_count(self):
+        return ord(self.row_end) - ord(self.row_start) + 1
+
+    def seat_map(self):
+        """
+        The seats of an assigned zone laid out row after row: a dict from
+        seat id to its index in that grid, and the grid as bytes with 0
+        where a seat exists and 1 where it does not. Built on first use.
+        """
+        if self._seat_map is None:
+            width, first_row = self.width, ord(self.row_start)
+            grid = bytearray(b"\x01") * (self.row_count * width)
+            positions = {}
+            for seat_id, identifier in zip(self.seat_ids, self.identifiers):
+                row, column = ord(identifier[0]) - first_row, int(identifier[1:]) - self.seat_start
+                if 0 <= row < self.row_count and 0 <= column < width:
+                    positions[seat_id] = row * width + column
+                    grid[row * width + column] = 0
+            self._seat_map = (positions, bytes(grid))
+        return self._seat_map
+
+
+class VenueLayout:
+    """
+    Everything about a venue's seats that does not depend on the concert:
+    its zones, their seat ids and a map from seat identifier to seat and
+    zone id.
+    Built with two queries and shared by every concert at the venue.
+    """
+
+    def __init__(self, venue_id, version, zones, seats):
+        self.venue_id = venue_id
+        self.version = version
+        self.zones = {zone["id"]: ZoneLayout(zone) for zone in zones}
+        self.zones_by_slug = {zone.slug: zone for zone in self.zones.values()}
+        self._seats = {}
+        for seat_id, zone_id, identifier in seats:
+            zone = self.zones[zone_id]
+            zone.seat_ids.append(seat_id)
+            zone.identifiers.append(identifier)
+            # The same identifier in two zones is ambiguous, as with the
+            # Seat query this replaces
+            self._seats[identifier] = None if identifier in self._seats else (seat_id, zone_id)
+
+    @classmethod
+    def build(cls, venue_id, version):
+        zones = SeatZone.objects.filter(venue_id=venue_id).values(*ZoneLayout.FIELDS)
+        seats = (
+            Seat.objects.filter(zone__venue_id=venue_id)
+            .order_by("zone_id", "id")
+            .values_list("id", "zone_id", "identifier")
+        )
+        return cls(venue_id, version, list(zones), seats.iterator(chunk_size=5000))
+
+    def seat_count(self, zone_id):
+        zone = self.zones.get(zone_id)
+        return len(zone) if zone else 0
+
+    def on_sale(self, zone_id):
+        """False while the zone's seats are still being provisioned"""
+        zone = self.zones.get(zone_id)
+        return zone is not None and zone.provisioned
+
+    def seats(self, identifiers):
+        """
+        (seat id, zone id) for each of identifiers, or None if any of them is
+        not a seat of the venue
+        """
+        seats = [self._seats.get(identifier) for identifier in identifiers]
+        return None if None in seats else seats
+
+
+def get_layouts(venue_ids):
+    """
+    The layouts of venues, keyed by venue id, from this process's cache when
+    their version is current. Costs one query, plus two per layout that has
+    to be (re)built.
+    """
+    venue_ids = set(venue_ids)
+    versions = dict(
+        VenueLayoutVersion.objects.filter(venue_id__in=venue_ids).values_list("venue_id", "version")
+    )
+    layouts = {}
+    for venue_id in venue_ids:
+        if venue_id not in versions:
+            # The row has to exist before anything is cached, or the first
+            # change to the venue would have nothing to bump
+            row, _ = VenueLayoutVersion.objects.get_or_create(venue_id=venue_id)
+            versions[venue_id] = row.version
+        layout = _layouts.get(venue_id)
+        if layout is None or layout.version != versions[venue_id]:
+            layout = VenueLayout.build(venue_id, versions[venue_id])
+            with _lock:
+                _layouts[venue_id] = layout
+        layouts[venue_id] = layout
+    return layouts
+
+
+def get_layout(venue_id):
+    return get_layouts([venue_id])[venue_id]
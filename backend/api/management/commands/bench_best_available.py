@@ -0,0 +1,102 @@
+import datetime
+import math
+import random
+import string
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from wagtail.models import Page
+
+from api.benchmarks import format_summary, timed
+from api.models import ConcertPage, Seat, SeatZone, SoldSeat, VenuePage, sync_zone_seats
+from api.seating import ZoneOccupancy, find_best_available
+
+ROWS_PER_ZONE = 26
+
+
+class Rollback(Exception):
+    pass
+
+
+class Command(BaseCommand):
+    help = (
+        "Measure best-available seat lookups on a large, mostly sold venue. "
+        "Everything is created in a transaction that is rolled back."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--seats", type=int, default=50_000)
+        parser.add_argument("--sold", type=float, default=0.95, help="fraction of seats sold")
+        parser.add_argument("--quantities", type=int, nargs="+", default=[1, 2, 4, 6])
+        parser.add_argument("--lookups", type=int, default=50, help="lookups per quantity")
+        parser.add_argument("--seed", type=int, default=0)
+
+    def build(self, options):
+        rng = random.Random(options["seed"])
+        zones_needed = max(1, math.ceil(options["seats"] / (ROWS_PER_ZONE * 200)))
+        per_row = math.ceil(options["seats"] / (zones_needed * ROWS_PER_ZONE))
+
+        suffix = "".join(rng.choices(string.ascii_lowercase, k=8))
+        venue = Page.get_first_root_node().add_child(instance=VenuePage(
+            title=f"Bench arena {suffix}", slug=f"bench-arena-{suffix}",
+            name="Bench arena", address="-", capacity=options["seats"],
+        ))
+        concert = venue.add_child(instance=ConcertPage(
+            title=f"Bench concert {suffix}", slug=f"bench-concert-{suffix}", venue=venue,
+            artist="Bench", date=datetime.date.today(),
+            start_time=datetime.time(20), end_time=datetime.time(23),
+        ))
+        zones = SeatZone.objects.bulk_create([
+            SeatZone(
+                venue=venue, name=f"Zone {i}", slug=f"zone-{i}", type="assigned",
+                row_start="A", row_end=chr(ord("A") + ROWS_PER_ZONE - 1),
+                seat_start=1, seat_end=per_row,
+            )
+            for i in range(zones_needed)
+        ])
+        sync_zone_seats(zones)
+
+        seats = list(Seat.objects.filter(zone__venue=venue).values_list("pk", "zone_id"))
+        sold = rng.sample(seats, round(len(seats) * options["sold"]))
+        SoldSeat.objects.bulk_create(
+            [SoldSeat(concert=concert, seat_id=seat_id, zone_id=zone_id) for seat_id, zone_id in sold],
+            batch_size=5000,
+        )
+        return concert, zones, len(seats), len(sold)
+
+    def handle(self, *args, **options):
+        try:
+            with transaction.atomic():
+                concert, zones, total, sold = self.build(options)
+                self.stdout.write(
+                    f"{total} seats in {len(zones)} zones of {zones[0].total_seats}, {sold} sold"
+                )
+
+                occupancy = ZoneOccupancy.for_concert(concert, zones[0])
+                self.stdout.write(format_summary(
+                    "build occupancy (1 zone, incl. query)",
+                    timed(lambda: ZoneOccupancy.for_concert(concert, zones[0]), repeat=20),
+                ))
+                for quantity in options["quantities"]:
+                    self.stdout.write(format_summary(
+                        f"scan only, {quantity} seats",
+                        timed(lambda: occupancy.best_block(quantity), repeat=options["lookups"]),
+                    ))
+
+                rng = random.Random(options["seed"])
+                for quantity in options["quantities"]:
+                    found = []
+                    samples = timed(
+                        lambda: found.append(
+                            find_best_available(concert, rng.choice(zones), quantity)
+                        ),
+                        repeat=options["lookups"],
+                    )
+                    hits = sum(1 for block in found if block)
+                    self.stdout.write(
+                        format_summary(f"find {quantity} seats", samples)
+                        + f" found={hits}/{len(found)}"
+                    )
+                raise Rollback
+        except Rollback:
+            pass
@@ -0,0 +1,129 @@
+import asyncio
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from asgiref.sync import ThreadSensitiveContext
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db.backends.signals import connection_created
+from django.test import AsyncClient, Client
+
+from api.benchmarks import format_summary
+
+
+class Command(BaseCommand):
+    help = (
+        "Compare the WSGI (thread per request) and ASGI (async views) handlers "
+        "on a read endpoint, reporting how many queries each had in flight at once"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--path", default="/api/concerts/")
+        parser.add_argument("--requests", type=int, default=400)
+        parser.add_argument("--clients", type=int, default=64, help="concurrent clients")
+        parser.add_argument(
+            "--workers",
+            type=int,
+            default=settings.API_BLOCKING_WORKERS,
+            help=(
+                "WSGI threads. The ASGI run is not capped by this: its async ORM "
+                "calls run on a thread per in-flight request, and only its "
+                "run_blocking work shares the API_BLOCKING_WORKERS pool"
+            ),
+        )
+        parser.add_argument(
+            "--latency-ms",
+            type=float,
+            default=50.0,
+            help="simulated database round trip added to every query (0 for none)",
+        )
+
+    def instrument_queries(self, delay):
+        """
+        Add delay to every query, and track the most queries in flight at
+        once: that, not the worker setting, is how many requests each
+        handler actually had waiting on the database together.
+        """
+        lock = threading.Lock()
+        self.in_flight = self.peak_in_flight = 0
+
+        def wrapper(execute, sql, params, many, context):
+            with lock:
+                self.in_flight += 1
+                self.peak_in_flight = max(self.peak_in_flight, self.in_flight)
+            try:
+                if delay:
+                    time.sleep(delay)
+                return execute(sql, params, many, context)
+            finally:
+                with lock:
+                    self.in_flight -= 1
+
+        def add_wrapper(sender, connection, **kwargs):
+            connection.execute_wrappers.append(wrapper)
+
+        connection_created.connect(add_wrapper, weak=False)
+
+    def run_wsgi(self, path, total, clients, workers):
+        """clients threads issuing requests, at most workers being served at a time"""
+        slots = threading.Semaphore(workers)
+        local = threading.local()
+        samples = []
+
+        def request():
+            client = getattr(local, "client", None) or Client()
+            local.client = client
+            start = time.perf_counter()
+            with slots:
+                response = client.get(path)
+            samples.append(time.perf_counter() - start)
+            assert response.status_code == 200, response.status_code
+
+        start = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=clients) as pool:
+            list(pool.map(lambda _: request(), range(total)))
+        return samples, time.perf_counter() - start
+
+    def run_asgi(self, path, total, clients):
+        """clients coroutines on one event loop"""
+        samples = []
+
+        async def request(client, limit):
+            async with limit:
+                start = time.perf_counter()
+                # Like an ASGI server, give every request its own sync context
+                async with ThreadSensitiveContext():
+                    response = await client.get(path)
+                samples.append(time.perf_counter() - start)
+                assert response.status_code == 200, response.status_code
+
+        async def main():
+            client = AsyncClient()
+            limit = asyncio.Semaphore(clients)
+            await asyncio.gather(*(request(client, limit) for _ in range(total)))
+
+        start = time.perf_counter()
+        asyncio.run(main())
+        return samples, time.perf_counter() - start
+
+    def report(self, label, run, *args):
+        self.peak_in_flight = 0
+        samples, elapsed = run(*args)
+        self.stdout.write(
+            format_summary(label, samples)
+            + f" throughput={len(samples) / elapsed:.0f} req/s"
+            + f" peak_queries={self.peak_in_flight}"
+        )
+
+    def handle(self, *args, **options):
+        self.instrument_queries(options["latency_ms"] / 1000)
+        path, total, clients = options["path"], options["requests"], options["clients"]
+        self.stdout.write(
+            f"{path}: {total} requests from {clients} clients, "
+            f"{options['workers']} WSGI workers, ASGI queries on a thread per request "
+            f"and {settings.API_BLOCKING_WORKERS} blocking workers, "
+            f"{options['latency_ms']}ms per query"
+        )
+        self.report("wsgi", self.run_wsgi, path, total, clients, options["workers"])
+        self.report("asgi", self.run_asgi, path, total, clients)
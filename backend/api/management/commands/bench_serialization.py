@@ -0,0 +1,75 @@
+import datetime
+import gzip
+import json
+
+from django.core.management.base import BaseCommand
+from django.core.serializers.json import DjangoJSONEncoder
+
+from api import responses
+from api.benchmarks import format_summary, timed
+
+
+def listing_payload(count):
+    """A concert_list-shaped payload without touching the database"""
+    day = datetime.date(2025, 1, 1)
+    return [
+        {
+            "id": i,
+            "title": f"Concert {i}",
+            "slug": f"concert-{i}",
+            "date": (day + datetime.timedelta(days=i % 365)).isoformat(),
+            "artist": f"Artist {i % 300}",
+            "venue": f"Venue {i % 40}",
+            "start_time": "19:30:00",
+            "end_time": "22:30:00",
+            "sold_out": i % 7 == 0,
+            "description": "An evening of live music with special guests." * 2,
+            "genre": "Pop",
+            "image_url": f"/media/original_images/concert-{i}.jpg",
+            "_links": {
+                "self": f"/api/venues/venue-{i % 40}/concerts/concert-{i}/",
+                "tickets": f"/api/venues/venue-{i % 40}/concerts/concert-{i}/availability/",
+            },
+        }
+        for i in range(count)
+    ]
+
+
+class Command(BaseCommand):
+    help = "Compare encode time and payload size of the API encoders for a concert listing"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--concerts", type=int, default=5000)
+        parser.add_argument("--repeat", type=int, default=20)
+
+    def handle(self, *args, **options):
+        payload = listing_payload(options["concerts"])
+        repeat = options["repeat"]
+
+        encoders = {"stdlib json": lambda: json.dumps(payload, cls=DjangoJSONEncoder).encode()}
+        if responses.orjson is not None:
+            encoders["orjson"] = lambda: responses.orjson.dumps(payload, default=responses._default)
+        if responses.msgpack is not None:
+            encoders["msgpack"] = lambda: responses.dumps_msgpack(payload)
+
+        for name, encode in encoders.items():
+            body = encode()
+            self.stdout.write(format_summary(f"{name} encode", timed(encode, repeat)))
+            compressed = gzip.compress(body, compresslevel=responses.GZIP_LEVEL)
+            self.stdout.write(
+                f"{name} size: {len(body) / 1024:.1f} KiB, gzip {len(compressed) / 1024:.1f} KiB"
+            )
+        body = responses.dumps_json(payload)
+        for level in (1, 6, 9):
+            self.stdout.write(format_summary(
+                f"gzip level {level}", timed(lambda: gzip.compress(body, level), repeat)
+            ))
+            self.stdout.write(f"gzip level {level} size: {len(gzip.compress(body, level)) / 1024:.1f} KiB")
+
+        links = {"self": "/api/venues/x/"}
+        self.stdout.write(format_summary(
+            "_links by copy", timed(lambda: [{**item, "_links": links} for item in payload], repeat)
+        ))
+        self.stdout.write(format_summary(
+            "_links in place", timed(lambda: [item.__setitem__("_links", links) for item in payload], repeat)
+        ))
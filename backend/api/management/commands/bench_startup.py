@@ -0,0 +1,71 @@
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from api.benchmarks import format_summary
+
+# Runs in a fresh interpreter; prints its own wall time and peak RSS
+SCRIPT = """
+import json, resource, time
+start = time.perf_counter()
+import django
+django.setup()
+{boot}
+{extra}
+print(json.dumps({{
+    "seconds": time.perf_counter() - start,
+    "maxrss_kib": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss,
+}}))
+"""
+
+BOOTS = {
+    "manage.py check": (
+        "from django.core.management import call_command\n"
+        "call_command('check', verbosity=0)"
+    ),
+    # WSGI plus the URLconf, which a worker loads on its first request
+    "wsgi boot": (
+        "from cms.wsgi import application\n"
+        "from django.urls import get_resolver\n"
+        "get_resolver().url_patterns"
+    ),
+}
+
+# What api.views used to import at module load
+EAGER_SHEETS = "import api.config"
+
+
+class Command(BaseCommand):
+    help = "Compare process startup time and memory with and without the Google Sheets libraries loaded"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--repeat", type=int, default=5)
+
+    def run(self, boot, extra=""):
+        env = {**os.environ, "DJANGO_SETTINGS_MODULE": os.environ.get(
+            "DJANGO_SETTINGS_MODULE", settings.SETTINGS_MODULE
+        )}
+        output = subprocess.run(
+            [sys.executable, "-c", SCRIPT.format(boot=boot, extra=extra)],
+            cwd=settings.BASE_DIR,
+            env=env,
+            check=True,
+            capture_output=True,
+            text=True,
+        ).stdout
+        return json.loads(output.strip().splitlines()[-1])
+
+    def handle(self, *args, **options):
+        for name, boot in BOOTS.items():
+            for label, extra in (("lazy sheets", ""), ("eager sheets", EAGER_SHEETS)):
+                runs = [self.run(boot, extra) for _ in range(options["repeat"])]
+                rss = statistics.median(r["maxrss_kib"] for r in runs) / 1024
+                self.stdout.write(
+                    format_summary(f"{name}, {label}", [r["seconds"] for r in runs])
+                    + f" rss={rss:.1f}MiB"
+                )
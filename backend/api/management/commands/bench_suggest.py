@@ -0,0 +1,53 @@
+import random
+import string
+import tracemalloc
+
+from django.core.management.base import BaseCommand
+
+from api.benchmarks import format_summary, timed
+from api.suggest import PrefixIndex, concert_suggestions
+
+
+class Command(BaseCommand):
+    help = "Measure typeahead lookup latency and memory use of the suggestion index"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--entries", type=int, default=100_000)
+        parser.add_argument("--lookups", type=int, default=10_000)
+        parser.add_argument("--seed", type=int, default=0)
+
+    def handle(self, *args, **options):
+        rng = random.Random(options["seed"])
+        count = options["entries"]
+
+        def word():
+            return "".join(rng.choices(string.ascii_lowercase, k=rng.randint(3, 9))).title()
+
+        artists = [f"{word()} {word()}" for _ in range(max(count // 20, 1))]
+        rows = [
+            (f"{word()} {word()} Live {i}", f"concert-{i}", rng.choice(artists))
+            for i in range(count)
+        ]
+
+        indexes = []
+        tracemalloc.start()
+        [build_time] = timed(lambda: indexes.append(PrefixIndex.build(
+            (("concert", i), concert_suggestions(*row)) for i, row in enumerate(rows)
+        )))
+        size, _peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        index = indexes[0]
+
+        self.stdout.write(
+            f"Built {len(index)} suggestions ({len(index._keys)} keys) from {count} concerts in {build_time:.2f}s"
+        )
+        self.stdout.write(f"Memory: {size / 2**20:.1f} MiB, {size / 2**20 * 100_000 / count:.1f} MiB per 100k concerts")
+
+        prefixes = [rng.choice(rows)[0][: rng.randint(1, 5)] for _ in range(options["lookups"])]
+        samples = []
+        for prefix in prefixes:
+            samples += timed(lambda: index.lookup(prefix))
+        self.stdout.write(format_summary("lookup", samples))
+
+        [update_time] = timed(lambda: index.update(("concert", 0), concert_suggestions("Renamed Show", "concert-0", "Someone Else")))
+        self.stdout.write(f"Incremental update: {update_time * 1000:.3f}ms")
@@ -0,0 +1,19 @@
+import datetime
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from api.changefeed import compact
+
+
+class Command(BaseCommand):
+    help = "Delete change feed events older than CHANGE_FEED_RETENTION that later events supersede"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch-size", type=int, default=1000)
+
+    def handle(self, *args, **options):
+        before = timezone.now() - datetime.timedelta(seconds=settings.CHANGE_FEED_RETENTION)
+        deleted = compact(before, options["batch_size"])
+        self.stdout.write(self.style.SUCCESS(f"Deleted {deleted} superseded change events"))
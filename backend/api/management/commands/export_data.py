@@ -0,0 +1,43 @@
+import sys
+
+from django.core.management.base import BaseCommand, CommandError
+
+from api.exports import CHUNK_SIZE, EXPORTS, csv_chunks, write_parquet
+
+
+class Command(BaseCommand):
+    help = (
+        "Export venues, zones, concerts, ticket types or sold seats as CSV or "
+        "Parquet, streaming rows from the database in chunks"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("name", choices=sorted(EXPORTS))
+        parser.add_argument("--format", choices=["csv", "parquet"], default="csv")
+        parser.add_argument("--output", "-o", help="file to write (CSV defaults to stdout)")
+        parser.add_argument(
+            "--chunk-size", type=int, help=f"rows per fetch (default {CHUNK_SIZE}) or per Parquet row group"
+        )
+        parser.add_argument("--database", default="default")
+
+    def handle(self, *args, **options):
+        name, using = options["name"], options["database"]
+        chunking = {"chunk_size": options["chunk_size"]} if options["chunk_size"] else {}
+
+        if options["format"] == "parquet":
+            if not options["output"]:
+                raise CommandError("Parquet exports need --output")
+            try:
+                written = write_parquet(name, options["output"], using, **chunking)
+            except RuntimeError as e:
+                raise CommandError(str(e))
+            self.stderr.write(f"Wrote {written} rows to {options['output']}")
+            return
+
+        out = open(options["output"], "w", newline="") if options["output"] else sys.stdout
+        try:
+            for chunk in csv_chunks(name, using, **chunking):
+                out.write(chunk)
+        finally:
+            if out is not sys.stdout:
+                out.close()
@@ -0,0 +1,53 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from api.models import ZoneProvisioningJob
+from api.provisioning import claim_job, resume, run_job
+
+
+class Command(BaseCommand):
+    help = (
+        "Generate the seats of zones queued for background provisioning, "
+        "then exit, or keep polling for new jobs with --watch"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--watch", action="store_true", help="poll for jobs until stopped")
+        parser.add_argument("--interval", type=float, default=2.0, help="seconds between polls")
+        parser.add_argument("--chunk-size", type=int, help="seats per transaction")
+        parser.add_argument(
+            "--retry-failed", action="store_true", help="resume failed jobs before starting"
+        )
+
+    def report(self, job):
+        tenth = job.progress * 10 // job.total
+        if tenth != self._reported:
+            self._reported = tenth
+            self.stdout.write(f"  {job.zone.slug}: {job.progress}/{job.total} seats")
+
+    def handle(self, *args, **options):
+        if options["retry_failed"]:
+            resumed = sum(resume(job) for job in ZoneProvisioningJob.objects.filter(status="failed"))
+            self.stdout.write(f"Resumed {resumed} failed jobs")
+
+        while True:
+            job = claim_job()
+            if job is None:
+                if not options["watch"]:
+                    return
+                time.sleep(options["interval"])
+                continue
+
+            self._reported = None
+            self.stdout.write(
+                f"Job {job.pk}: zone {job.zone.slug} of {job.zone.venue.slug}, "
+                f"{job.total} seats, attempt {job.attempts}"
+            )
+            status = run_job(job, options["chunk_size"], on_progress=self.report)
+            if status == "done":
+                self.stdout.write(self.style.SUCCESS(f"Job {job.pk}: done"))
+            elif status == "failed":
+                self.stdout.write(self.style.ERROR(f"Job {job.pk}: failed, {job.error}"))
+            else:
+                self.stdout.write(self.style.WARNING(f"Job {job.pk}: {status}"))
@@ -0,0 +1,43 @@
+import datetime
+
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+from wagtail.models import Revision
+
+from api.revisions import prunable_revisions
+
+
+class Command(BaseCommand):
+    help = (
+        "Delete page revisions outside the retention policy: keep the newest "
+        "--keep revisions of every page and any younger than --days"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--keep", type=int, default=10)
+        parser.add_argument(
+            "--days", type=int, default=90, help="keep revisions younger than this (0 to ignore age)"
+        )
+        parser.add_argument("--batch-size", type=int, default=1000)
+        parser.add_argument("--dry-run", action="store_true")
+
+    def handle(self, *args, **options):
+        older_than = None
+        if options["days"]:
+            older_than = timezone.now() - datetime.timedelta(days=options["days"])
+        revisions = prunable_revisions(max(options["keep"], 1), older_than)
+
+        if options["dry_run"]:
+            self.stdout.write(f"Would delete {revisions.count()} revisions")
+            return
+
+        deleted = 0
+        while True:
+            batch = list(revisions.values_list("pk", flat=True)[: options["batch_size"]])
+            if not batch:
+                break
+            Revision.objects.filter(pk__in=batch).delete()
+            deleted += len(batch)
+            self.stdout.write(f"Deleted {deleted} revisions")
+
+        self.stdout.write(self.style.SUCCESS(f"Pruned {deleted} revisions"))
@@ -0,0 +1,14 @@
+from django.core.management.base import BaseCommand
+
+from api.summary import rebuild_concert_summaries
+
+
+class Command(BaseCommand):
+    help = "Recompute the ConcertSummary read model from the concert pages"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch-size", type=int, default=500)
+
+    def handle(self, *args, **options):
+        count = rebuild_concert_summaries(batch_size=options["batch_size"])
+        self.stdout.write(self.style.SUCCESS(f"Rebuilt summaries for {count} concerts"))
@@ -0,0 +1,29 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from api.sales import catch_up, rebuild
+
+
+class Command(BaseCommand):
+    help = (
+        "Bring the per-concert sales counters up to date with the sales event "
+        "log, or rebuild them from the start of the log with --rebuild; keep "
+        "them up to date with --watch"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--rebuild", action="store_true")
+        parser.add_argument("--batch-size", type=int, default=5000)
+        parser.add_argument("--watch", action="store_true", help="keep applying new events until stopped")
+        parser.add_argument("--interval", type=float, default=2.0, help="seconds between polls")
+
+    def handle(self, *args, **options):
+        replay = rebuild if options["rebuild"] else catch_up
+        applied = replay(options["batch_size"])
+        self.stdout.write(self.style.SUCCESS(f"Applied {applied} sales events"))
+        while options["watch"]:
+            time.sleep(options["interval"])
+            applied = catch_up(options["batch_size"])
+            if applied:
+                self.stdout.write(f"Applied {applied} sales events")
@@ -0,0 +1,57 @@
+import datetime
+import time
+
+from django.core.management.base import BaseCommand
+
+from api.pricing import apply_prices, plan_prices
+from api.sync import sync_all
+
+
+class Command(BaseCommand):
+    help = (
+        "Recompute the price of every ticket type of the upcoming concerts from "
+        "sell-through, days to the show and zone type, and apply them in one transaction"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--dry-run", action="store_true", help="show the changes, write nothing")
+        parser.add_argument(
+            "--as-of", type=datetime.date.fromisoformat, help="price as of this date (YYYY-MM-DD)"
+        )
+        parser.add_argument("--show", type=int, default=20, help="largest changes to list")
+
+    def handle(self, *args, **options):
+        started = time.perf_counter()
+        plan = plan_prices(options["as_of"])
+        planned = time.perf_counter()
+
+        changes = sorted(plan.changes(), key=lambda c: abs(c[5] - c[4]), reverse=True)
+        raised = sum(1 for c in changes if c[5] > c[4])
+        self.stdout.write(
+            f"{len(plan)} ticket types as of {plan.as_of}: {len(changes)} change, "
+            f"{raised} up, {len(changes) - raised} down ({planned - started:.2f}s)"
+        )
+        for slug, concert, sell_through, days, old, new in changes[:options["show"]]:
+            move = f" ({(new - old) / old:+.0%})" if old else ""
+            self.stdout.write(
+                f"  {slug} ({concert}): {sell_through:.0%} sold, {days} days to go, "
+                f"{old} -> {new}{move}"
+            )
+        if len(changes) > options["show"]:
+            self.stdout.write(f"  ... and {len(changes) - options['show']} more")
+
+        if options["dry_run"]:
+            return
+        updated, skipped = apply_prices(plan)
+        applied = time.perf_counter()
+        if updated:
+            sync_all()
+        self.stdout.write(self.style.SUCCESS(
+            f"Repriced {updated} ticket types ({applied - planned:.2f}s)"
+        ))
+        if skipped:
+            self.stdout.write(self.style.WARNING(
+                f"Skipped {len(skipped)} whose price changed since it was planned: "
+                + ", ".join(skipped[:options["show"]])
+                + (f" and {len(skipped) - options['show']} more" if len(skipped) > options["show"] else "")
+            ))
@@ -0,0 +1,61 @@
+import json
+import random
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+
+class Command(BaseCommand):
+    help = (
+        "Stand-in for the frontend's /api/revalidate route: print the revalidation "
+        "webhooks this backend sends, optionally failing some to exercise retries"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--port", type=int, default=3001)
+        parser.add_argument(
+            "--fail-rate", type=float, default=0.0, help="fraction of webhooks answered with 503"
+        )
+
+    def handle(self, *args, **options):
+        command = self
+        secret = settings.REVALIDATION_SECRET
+        fail_rate = options["fail_rate"]
+
+        class Handler(BaseHTTPRequestHandler):
+            def reply(self, status, body):
+                data = json.dumps(body).encode()
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(data)))
+                self.end_headers()
+                self.wfile.write(data)
+
+            def do_POST(self):
+                payload = json.loads(self.rfile.read(int(self.headers.get("Content-Length", 0))))
+                if not secret or self.headers.get("Authorization") != f"Bearer {secret}":
+                    command.stdout.write(command.style.ERROR("401 invalid secret"))
+                    return self.reply(401, {"error": "Invalid secret"})
+                if random.random() < fail_rate:
+                    command.stdout.write(command.style.WARNING(f"503 {payload['paths']}"))
+                    return self.reply(503, {"error": "Simulated failure"})
+                command.stdout.write(
+                    f"200 {len(payload['slugs'])} concerts, paths {' '.join(payload['paths'])}"
+                )
+                self.reply(200, {"revalidated": True, **payload})
+
+            def log_message(self, format, *args):
+                pass
+
+        server = ThreadingHTTPServer(("127.0.0.1", options["port"]), Handler)
+        self.stdout.write(
+            f"Listening on http://127.0.0.1:{options['port']}/api/revalidate, "
+            f"set REVALIDATION_WEBHOOK_URL to that"
+        )
+        try:
+            server.serve_forever()
+        except KeyboardInterrupt:
+            pass
+        finally:
+            server.server_close()
@@ -0,0 +1,432 @@
+import datetime
+import http.client
+import json
+import logging
+import math
+import multiprocessing
+import os
+import random
+import string
+import threading
+import time
+from collections import Counter, defaultdict
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+
+from django.core.management.base import BaseCommand, CommandError
+from django.core.servers.basehttp import ThreadedWSGIServer, WSGIRequestHandler
+from django.core.wsgi import get_wsgi_application
+from django.db import DatabaseError, connections
+from django.db.backends.signals import connection_created
+from django.db.models import Count, Sum
+from django.test import Client
+from django.test.utils import setup_databases, teardown_databases
+from wagtail.models import Page
+
+from api import sync
+from api.benchmarks import format_summary, percentile
+from api.models import (
+    ConcertPage,
+    SalesEvent,
+    SeatZone,
+    SoldSeat,
+    TicketType,
+    VenuePage,
+    sync_zone_seats,
+)
+
+ROWS = 26
+WRITES = ("reserve", "best")
+# The views answer most exceptions with a 400, so database errors are
+# reported by the server in this header, "lock" or "database"
+DB_ERROR_HEADER = "X-Simulated-Db-Error"
+LOCK_MESSAGES = (
+    "database is locked", "database table is locked", "deadlock detected",
+    "could not serialize access", "lock timeout", "could not obtain lock",
+)
+
+_db_errors = threading.local()
+
+
+def record_db_errors(execute, sql, params, many, context):
+    """Execute wrapper remembering the last database error raised in this thread"""
+    try:
+        return execute(sql, params, many, context)
+    except DatabaseError as e:
+        _db_errors.last = e
+        raise
+
+
+def watch_connection(sender, connection, **kwargs):
+    if record_db_errors not in connection.execute_wrappers:
+        connection.execute_wrappers.append(record_db_errors)
+
+
+def take_db_error():
+    """"lock", "database" or "" for the database error of this thread's last request"""
+    error, _db_errors.last = getattr(_db_errors, "last", None), None
+    if error is None:
+        return ""
+    message = str(error).lower()
+    return "lock" if any(text in message for text in LOCK_MESSAGES) else "database"
+
+
+def report_db_errors(application):
+    """WSGI middleware adding DB_ERROR_HEADER to responses of requests that hit a database error"""
+
+    def wrapped(environ, start_response):
+        take_db_error()
+
+        def start(status, headers, exc_info=None):
+            db_error = take_db_error()
+            if db_error:
+                headers = [*headers, (DB_ERROR_HEADER, db_error)]
+            return start_response(status, headers, exc_info)
+
+        return application(environ, start)
+
+    return wrapped
+
+
+def arrivals(curve, total, duration, rng):
+    """Offsets in seconds from the start at which each of total requests is sent"""
+    if curve == "constant":
+        return [i * duration / total for i in range(total)]
+    if curve == "ramp":
+        # The arrival rate grows linearly from 0 to its peak at the end
+        return [duration * math.sqrt(i / total) for i in range(total)]
+    if curve == "spike":
+        # Everyone arrives the moment sales open
+        return [0.0] * total
+    if curve == "poisson":
+        offsets, t = [], 0.0
+        for _ in range(total):
+            offsets.append(t)
+            t += rng.expovariate(total / duration)
+        return offsets
+    raise ValueError(f"Unknown arrival curve {curve}")
+
+
+class QuietHandler(WSGIRequestHandler):
+    def log_message(self, format, *args):
+        pass
+
+
+class HTTPTransport:
+    """Requests to the local WSGI server, a new connection each"""
+
+    def __init__(self, port):
+        self.port = port
+
+    def send(self, method, path, body=None):
+        conn = http.client.HTTPConnection("127.0.0.1", self.port, timeout=60)
+        try:
+            headers = {"Accept": "application/json"}
+            if body is not None:
+                headers["Content-Type"] = "application/json"
+            conn.request(method, path, body=body, headers=headers)
+            response = conn.getresponse()
+            return response.status, response.read(), response.getheader(DB_ERROR_HEADER, "")
+        finally:
+            conn.close()
+
+
+class ClientTransport:
+    """Requests through Django's test client, in this thread"""
+
+    def __init__(self):
+        self.client = Client(HTTP_ACCEPT="application/json")
+
+    def send(self, method, path, body=None):
+        take_db_error()
+        if method == "GET":
+            response = self.client.get(path)
+        else:
+            response = self.client.post(path, body, content_type="application/json")
+        return response.status_code, response.content, take_db_error()
+
+
+def run_lane(target, port, lane, start_at):
+    """
+    Send one lane's requests, each at its scheduled time or as soon as the
+    previous one has returned. Returns (kind, status, latency, lag, seats,
+    error, db_error) per request; seats is the number sold by a successful
+    write, error the message of a failed one and db_error "lock" or
+    "database" when it failed on a database error.
+    """
+    rng = random.Random(target["seed"] + lane["index"])
+    transport = HTTPTransport(port) if port else ClientTransport()
+    base = f"/api/venues/{target['venue']}/concerts/{target['concert']}"
+    results = []
+    try:
+        for offset, kind in lane["requests"]:
+            delay = start_at + offset - time.time()
+            if delay > 0:
+                time.sleep(delay)
+            quantity = rng.randint(1, target["max_seats"])
+            if kind == "reserve":
+                body = {
+                    "ticket_type_slug": target["ticket_type"],
+                    "seat_ids": rng.sample(target["identifiers"], quantity),
+                }
+                request = ("POST", f"{base}/reserve-seats/", json.dumps(body))
+            elif kind == "best":
+                body = {"ticket_type_slug": target["ticket_type"], "quantity": quantity, "reserve": True}
+                request = ("POST", f"{base}/best-available/", json.dumps(body))
+            else:
+                request = ("GET", f"{base}/availability/", None)
+
+            sent = time.time()
+            try:
+                status, content, db_error = transport.send(*request)
+            except Exception as e:
+                status, content, db_error = 0, json.dumps({"error": str(e)}).encode(), ""
+            latency = time.time() - sent
+            if status != 400 and status < 500:
+                # Caught and answered on purpose, e.g. a seat taken by the unique constraint
+                db_error = ""
+            seats, error = 0, ""
+            if kind in WRITES and status == 200:
+                payload = json.loads(content)
+                seats = len(payload.get("reserved_seats") or payload.get("seat_ids") or [])
+            elif status != 200:
+                try:
+                    error = json.loads(content).get("error", "")
+                except ValueError:
+                    error = content[:100].decode(errors="replace")
+            lag = max(sent - start_at - offset, 0.0)
+            results.append((kind, status, latency, lag, seats, error, db_error))
+    finally:
+        connections.close_all()
+    return results
+
+
+class Command(BaseCommand):
+    help = (
+        "Simulate an on-sale: many clients reserving seats and checking "
+        "availability on a fresh concert at once, through the test client or "
+        "a local WSGI server, then check that nothing was oversold. Runs in a "
+        "throwaway test database, with sync turned off."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--seats", type=int, default=1000, help="seats in the sold zone")
+        parser.add_argument("--requests", type=int, default=2000)
+        parser.add_argument("--duration", type=float, default=10.0, help="seconds of arrivals")
+        parser.add_argument(
+            "--curve", choices=["constant", "ramp", "spike", "poisson"], default="poisson"
+        )
+        parser.add_argument(
+            "--mix",
+            default="reserve=5,best=2,availability=3",
+            help="relative weights of the reserve, best (best-available) and availability requests",
+        )
+        parser.add_argument("--max-seats", type=int, default=4, help="seats per order, at most")
+        parser.add_argument("--workers", type=int, default=16, help="concurrent clients")
+        parser.add_argument("--pool", choices=["thread", "process"], default="thread")
+        parser.add_argument(
+            "--transport",
+            choices=["client", "wsgi"],
+            default="client",
+            help="Django's test client, or HTTP to a threaded WSGI server in this process",
+        )
+        parser.add_argument("--seed", type=int, default=0)
+        parser.add_argument(
+            "--keepdb", action="store_true",
+            help="keep the test database for the next run, which then skips its migrations",
+        )
+
+    def parse_mix(self, mix):
+        weights = {}
+        for part in mix.split(","):
+            kind, _, weight = part.partition("=")
+            if kind not in ("reserve", "best", "availability"):
+                raise CommandError(f"Unknown request kind {kind!r} in --mix")
+            weights[kind] = float(weight or 1)
+        return weights
+
+    def build(self, seats):
+        # Not from the seeded rng: a kept test database still has earlier runs' venues
+        suffix = "".join(random.choices(string.ascii_lowercase, k=8))
+        venue = Page.get_first_root_node().add_child(instance=VenuePage(
+            title=f"On-sale arena {suffix}", slug=f"onsale-arena-{suffix}",
+            name="On-sale arena", address="-", capacity=seats,
+        ))
+        concert = venue.add_child(instance=ConcertPage(
+            title=f"On-sale concert {suffix}", slug=f"onsale-concert-{suffix}", venue=venue,
+            artist="On-sale", date=datetime.date.today(),
+            start_time=datetime.time(20), end_time=datetime.time(23),
+        ))
+        # Seats are written directly, not through a provisioning job
+        zone = SeatZone(
+            venue=venue, name="Floor", slug="floor", type="assigned",
+            row_start="A", row_end=chr(ord("A") + ROWS - 1),
+            seat_start=1, seat_end=math.ceil(seats / ROWS),
+        )
+        SeatZone.objects.bulk_create([zone])
+        sync_zone_seats([zone])
+        ticket_type = TicketType.objects.create(
+            concert=concert, slug=f"onsale-floor-{suffix}", type="assigned",
+            seat_zone=zone, price=100,
+        )
+        return venue, concert, zone, ticket_type
+
+    def setup_database(self, keepdb):
+        """
+        Switch every connection to a test database, as the test runner does.
+        SQLite's is a file next to the real one rather than in memory, so
+        worker processes and the WSGI server's threads share it.
+        """
+        default = connections["default"].settings_dict
+        if default["ENGINE"].endswith("sqlite3") and not default["TEST"]["NAME"]:
+            directory, name = os.path.split(default["NAME"])
+            default["TEST"]["NAME"] = os.path.join(directory, f"test_onsale_{name}")
+        if "replica" in connections.databases:
+            connections.databases["replica"]["TEST"]["MIRROR"] = "default"
+        return setup_databases(verbosity=0, interactive=False, keepdb=keepdb, serialized_aliases=set())
+
+    def start_server(self):
+        server = ThreadedWSGIServer(("127.0.0.1", 0), QuietHandler)
+        server.set_app(report_db_errors(get_wsgi_application()))
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        return server
+
+    def run(self, options, target, lanes, port):
+        if options["pool"] == "process":
+            # Children inherit the set-up Django and the null sync backend,
+            # but must open their own database connections
+            connections.close_all()
+            pool = ProcessPoolExecutor(
+                options["workers"], mp_context=multiprocessing.get_context("fork")
+            )
+        else:
+            pool = ThreadPoolExecutor(options["workers"])
+        start_at = time.time() + 0.5
+        with pool:
+            futures = [pool.submit(run_lane, target, port, lane, start_at) for lane in lanes]
+            results = [result for future in futures for result in future.result()]
+        return results, time.time() - start_at
+
+    def report(self, results, elapsed):
+        by_kind = defaultdict(list)
+        for result in results:
+            by_kind[result[0]].append(result)
+
+        self.stdout.write(
+            f"{len(results)} requests in {elapsed:.2f}s: {len(results) / elapsed:.1f} req/s"
+        )
+        for kind, rows in sorted(by_kind.items()):
+            statuses = Counter(row[1] for row in rows)
+            self.stdout.write(
+                format_summary(kind, [row[2] for row in rows])
+                + f" {len(rows) / elapsed:.1f} req/s"
+            )
+            self.stdout.write("  statuses: " + ", ".join(
+                f"{status or 'error'}={n}" for status, n in sorted(statuses.items())
+            ))
+
+        # Requests that failed on a database error were never decided either way
+        db_errors = Counter(row[6] for row in results if row[6])
+        decided = [row for row in results if not row[6] and row[1] and row[1] < 500]
+        writes = [row for row in decided if row[0] in WRITES]
+        conflicts = sum(1 for row in writes if row[1] == 409)
+        errors = sum(1 for row in results if not row[6] and (row[1] == 0 or row[1] >= 500))
+        lag = [row[3] for row in results]
+        self.stdout.write(
+            f"decided: {len(decided)} requests, {len(decided) / elapsed:.1f} req/s"
+        )
+        self.stdout.write(
+            f"conflict rate: {conflicts / len(writes):.1%} of {len(writes)} decided writes"
+            if writes else "conflict rate: no decided writes"
+        )
+        self.stdout.write(
+            f"lock errors: {db_errors['lock']}, other database errors: {db_errors['database']}, "
+            f"other errors: {errors}"
+        )
+        failures = Counter(row[5] for row in results if row[5])
+        for message, n in failures.most_common(5):
+            self.stdout.write(f"  {n} x {message}")
+        self.stdout.write(
+            f"sent behind schedule: p50={percentile(lag, 50) * 1000:.1f}ms "
+            f"p95={percentile(lag, 95) * 1000:.1f}ms"
+        )
+
+    def check_oversell(self, concert, zone, ticket_type, results):
+        """Every seat sold at most once, no more than exist, and all of them accounted for"""
+        sold = SoldSeat.objects.filter(concert=concert)
+        sold_count = sold.count()
+        capacity = zone.seats.count()
+        confirmed = sum(row[4] for row in results)
+        logged = SalesEvent.objects.filter(concert=concert, kind="sold").aggregate(
+            n=Sum("quantity")
+        )["n"] or 0
+        checks = {
+            "sold <= seats": sold_count <= capacity,
+            "no seat sold twice": not sold.values("seat").annotate(n=Count("id")).filter(n__gt=1).exists(),
+            "sold == confirmed to clients": sold_count == confirmed,
+            "sold == sales log": sold_count == logged,
+            "remaining == seats - sold": TicketType.objects.get(pk=ticket_type.pk).remaining
+            == capacity - sold_count,
+        }
+        self.stdout.write(
+            f"oversell check: {sold_count}/{capacity} seats sold, "
+            f"{confirmed} confirmed, {logged} logged"
+        )
+        for name, ok in checks.items():
+            self.stdout.write(f"  {name}: " + (self.style.SUCCESS("ok") if ok else self.style.ERROR("FAILED")))
+        return all(checks.values())
+
+    def handle(self, *args, **options):
+        weights = self.parse_mix(options["mix"])
+        rng = random.Random(options["seed"])
+        offsets = arrivals(options["curve"], options["requests"], options["duration"], rng)
+        kinds = rng.choices(list(weights), weights=list(weights.values()), k=len(offsets))
+        lanes = [
+            {"index": i, "requests": list(zip(offsets, kinds))[i::options["workers"]]}
+            for i in range(options["workers"])
+        ]
+
+        # Sync would push the whole database after every sale
+        previous_backend, sync._backend = sync._backend, sync.NullSyncBackend()
+        self.stdout.write("Creating the test database...")
+        old_config = self.setup_database(options["keepdb"])
+        connection_created.connect(watch_connection)
+        for connection in connections.all():
+            watch_connection(None, connection)
+        server = None
+        request_logger = logging.getLogger("django.request")
+        previous_level = request_logger.level
+        try:
+            venue, concert, zone, ticket_type = self.build(options["seats"])
+            # Starting the WSGI application configures logging again, so do it first
+            if options["transport"] == "wsgi":
+                server = self.start_server()
+            # Every 4xx is logged as a warning, and most on-sale requests are 409s
+            request_logger.setLevel(logging.ERROR)
+            target = {
+                "venue": venue.slug,
+                "concert": concert.slug,
+                "ticket_type": ticket_type.slug,
+                "identifiers": list(zone.seats.values_list("identifier", flat=True)),
+                "max_seats": options["max_seats"],
+                "seed": options["seed"],
+            }
+            self.stdout.write(
+                f"{len(target['identifiers'])} seats, {options['requests']} requests "
+                f"({options['curve']} over {options['duration']}s), {options['workers']} "
+                f"{options['pool']} workers via {options['transport']}"
+            )
+            results, elapsed = self.run(
+                options, target, lanes, server.server_port if server else None
+            )
+            self.report(results, elapsed)
+            ok = self.check_oversell(concert, zone, ticket_type, results)
+        finally:
+            if server:
+                server.shutdown()
+                server.server_close()
+            connection_created.disconnect(watch_connection)
+            teardown_databases(old_config, verbosity=0, keepdb=options["keepdb"])
+            sync._backend = previous_backend
+            request_logger.setLevel(previous_level)
+        if not ok:
+            raise CommandError("Oversold or lost sales, see above")
@@ -0,0 +1,124 @@
+import time
+from collections import Counter
+
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+from django.test import RequestFactory, override_settings
+from django.test.utils import CaptureQueriesContext
+
+from api import views
+from api.benchmarks import format_summary
+from api.waiting_room import WaitingRoom
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+class Command(BaseCommand):
+    help = (
+        "Simulate on-sale spikes of growing size against the waiting room and "
+        "report the requests per second that reach the database"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--rate", type=int, default=50, help="admissions per second")
+        parser.add_argument(
+            "--arrivals", type=int, nargs="+", default=[1000, 5000, 20000], help="spike sizes"
+        )
+        parser.add_argument(
+            "--spike-seconds", type=int, default=10, help="seconds over which the callers arrive"
+        )
+        parser.add_argument(
+            "--poll-seconds", type=int, default=5, help="how often a queued caller polls"
+        )
+        parser.add_argument(
+            "--rejects", type=int, default=2000, help="token-less reservations to time"
+        )
+
+    def simulate(self, rate, arrivals, spike_seconds, poll_seconds):
+        """
+        One simulated second at a time: new callers join, queued callers
+        poll and admitted callers make one reservation. Joins update the
+        queue row; reservations are the requests counted as reaching the
+        database.
+        """
+        clock = FakeClock()
+        room = WaitingRoom(rate, clock=clock)
+        waiting = []
+        database = Counter()
+        queue_requests = 0
+        second = 0
+        while second < spike_seconds or waiting:
+            clock.now = float(second)
+            if second < spike_seconds:
+                joining = arrivals // spike_seconds + (second < arrivals % spike_seconds)
+                waiting.extend(
+                    (queue_requests + i, room.join("simulated-onsale")) for i in range(joining)
+                )
+                queue_requests += joining
+
+            still_waiting = []
+            for number, admitted_at in waiting:
+                if (second + number) % poll_seconds:
+                    still_waiting.append((number, admitted_at))
+                    continue
+                queue_requests += 1
+                if room.position(admitted_at):
+                    still_waiting.append((number, admitted_at))
+                else:
+                    database[second] += 1
+            waiting = still_waiting
+            second += 1
+        return database, queue_requests, second
+
+    def time_rejects(self, total):
+        """Time token-less reservations, checking none of them queries the database"""
+        factory = RequestFactory()
+        samples = []
+        with override_settings(WAITING_ROOM_RATE=1):
+            with CaptureQueriesContext(connection) as queries:
+                for _ in range(total):
+                    request = factory.post(
+                        "/api/venues/arena/concerts/onsale/reserve/",
+                        data="{}",
+                        content_type="application/json",
+                    )
+                    start = time.perf_counter()
+                    response = views.reserve_seats(
+                        request, venue_slug="arena", concert_slug="onsale"
+                    )
+                    samples.append(time.perf_counter() - start)
+                    assert response.status_code == 403, response.status_code
+        return samples, len(queries)
+
+    def handle(self, *args, **options):
+        rate = options["rate"]
+        self.stdout.write(
+            f"Admitting {rate}/s, arrivals over {options['spike_seconds']}s, "
+            f"polling every {options['poll_seconds']}s"
+        )
+        self.stdout.write(
+            f"{'arrivals':>9} {'drained in':>11} {'queue reqs/s':>13} "
+            f"{'db reqs/s peak':>15} {'db reqs/s mean':>15}"
+        )
+        for arrivals in options["arrivals"]:
+            # Joining writes the queue row; leave no trace of the run
+            with transaction.atomic():
+                database, queue_requests, seconds = self.simulate(
+                    rate, arrivals, options["spike_seconds"], options["poll_seconds"]
+                )
+                transaction.set_rollback(True)
+            self.stdout.write(
+                f"{arrivals:>9} {seconds:>10}s {queue_requests / seconds:>13.0f} "
+                f"{max(database.values()):>15} {sum(database.values()) / seconds:>15.1f}"
+            )
+
+        samples, queries = self.time_rejects(options["rejects"])
+        self.stdout.write("")
+        self.stdout.write(format_summary("reject without token", samples))
+        self.stdout.write(f"  queries: {queries}")
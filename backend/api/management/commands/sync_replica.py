@@ -0,0 +1,36 @@
+import sqlite3
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connections
+
+from api.routing import REPLICA_ALIAS
+
+
+class Command(BaseCommand):
+    help = "Copy the primary SQLite database onto the replica file (local development only)"
+
+    def handle(self, *args, **options):
+        if REPLICA_ALIAS not in connections.databases:
+            raise CommandError("No replica configured, set REPLICA_DATABASE_NAME first")
+
+        primary = connections["default"].settings_dict
+        replica = connections[REPLICA_ALIAS].settings_dict
+        for db in (primary, replica):
+            if db["ENGINE"] != "django.db.backends.sqlite3":
+                raise CommandError("sync_replica only supports SQLite databases")
+
+        # Drop any open replica connection so readers reopen the fresh copy
+        connections[REPLICA_ALIAS].close()
+
+        source = sqlite3.connect(primary["NAME"])
+        target = sqlite3.connect(replica["NAME"])
+        try:
+            with target:
+                source.backup(target)
+        finally:
+            target.close()
+            source.close()
+
+        self.stdout.write(
+            self.style.SUCCESS(f"Copied {primary['NAME']} to {replica['NAME']}")
+        )
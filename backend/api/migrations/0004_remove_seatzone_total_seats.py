@@ -0,0 +1,17 @@
+# Generated by Django 4.2.18 on 2026-10-19 17:22
+
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0003_seatzone_total_seats'),
+    ]
+
+    operations = [
+        migrations.RemoveField(
+            model_name='seatzone',
+            name='total_seats',
+        ),
+    ]
@@ -0,0 +1,133 @@
+# Generated by Django 4.2.18 on 2026-10-19 17:22
+
+from django.db import migrations, models
+from django.db.models import Count
+import django.db.models.deletion
+
+# api.images.RENDITION_SIZES and RENDITION_FORMATS when this was written
+RENDITION_SIZES = {
+    'thumbnail': 'fill-320x180',
+    'card': 'fill-640x360',
+    'hero': 'width-1600',
+}
+RENDITION_FORMATS = ('webp', 'jpeg')
+
+
+def fill_summaries(apps, schema_editor):
+    """
+    Summarize the live concerts that already exist, as api.summary does,
+    so listings are not empty until rebuild_concert_summaries is run.
+    Renditions that have not been generated yet are left out, as there.
+    """
+    db = schema_editor.connection.alias
+    ConcertPage = apps.get_model('api', 'ConcertPage')
+    ConcertSummary = apps.get_model('api', 'ConcertSummary')
+    TicketType = apps.get_model('api', 'TicketType')
+    Seat = apps.get_model('api', 'Seat')
+    SoldSeat = apps.get_model('api', 'SoldSeat')
+    Rendition = apps.get_model('wagtailimages', 'Rendition')
+
+    concerts = list(
+        ConcertPage.objects.using(db).filter(live=True).select_related('venue', 'image')
+    )
+    if not concerts:
+        return
+    concert_ids = [concert.pk for concert in concerts]
+    ticket_types = {}
+    for tt in TicketType.objects.using(db).filter(concert_id__in=concert_ids):
+        ticket_types.setdefault(tt.concert_id, []).append(tt)
+    seats = dict(
+        Seat.objects.using(db).values_list('zone_id').annotate(n=Count('*')).order_by()
+    )
+    sold = {
+        (concert_id, zone_id): n
+        for concert_id, zone_id, n in SoldSeat.objects.using(db)
+        .filter(concert_id__in=concert_ids)
+        .values_list('concert_id', 'seat__zone_id')
+        .annotate(n=Count('*'))
+        .order_by()
+    }
+    specs = {
+        f'{spec}|format-{fmt}': (size, fmt)
+        for size, spec in RENDITION_SIZES.items()
+        for fmt in RENDITION_FORMATS
+    }
+    renditions = {}
+    for rendition in Rendition.objects.using(db).filter(
+        image_id__in={concert.image_id for concert in concerts if concert.image_id},
+        filter_spec__in=list(specs),
+    ):
+        size, fmt = specs[rendition.filter_spec]
+        renditions.setdefault(rendition.image_id, {}).setdefault(size, {})[fmt] = {
+            'url': rendition.file.url,
+            'width': rendition.width,
+            'height': rendition.height,
+        }
+
+    def remaining(tt):
+        if tt.type == 'assigned':
+            return seats.get(tt.seat_zone_id, 0) - sold.get((tt.concert_id, tt.seat_zone_id), 0)
+        return (tt.ga_capacity or 0) - tt.sold
+
+    summaries = []
+    for concert in concerts:
+        concert_types = ticket_types.get(concert.pk, [])
+        image_renditions = renditions.get(concert.image_id) if concert.image_id else None
+        if concert.image_id and image_renditions is None:
+            image_renditions = {}
+        thumbnail = (image_renditions or {}).get('thumbnail', {}).get('jpeg')
+        summaries.append(ConcertSummary(
+            concert=concert,
+            slug=concert.slug,
+            title=concert.title,
+            date=concert.date,
+            start_time=concert.start_time,
+            end_time=concert.end_time,
+            artist=concert.artist,
+            description=concert.description or '',
+            genre=concert.genre or '',
+            venue_name=concert.venue.name,
+            venue_slug=concert.venue.slug,
+            image_url=concert.image.file.url if concert.image_id else None,
+            thumbnail_url=thumbnail['url'] if thumbnail else None,
+            image_renditions=image_renditions,
+            min_price=min((tt.price for tt in concert_types), default=None),
+            sold_out=all(remaining(tt) <= 0 for tt in concert_types),
+        ))
+    ConcertSummary.objects.using(db).bulk_create(summaries, batch_size=500)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0004_remove_seatzone_total_seats'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ConcertSummary',
+            fields=[
+                ('concert', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='summary', serialize=False, to='api.concertpage')),
+                ('slug', models.SlugField(max_length=255)),
+                ('title', models.CharField(max_length=255)),
+                ('date', models.DateField()),
+                ('start_time', models.TimeField()),
+                ('end_time', models.TimeField(blank=True, null=True)),
+                ('artist', models.CharField(max_length=100)),
+                ('description', models.TextField(blank=True, default='')),
+                ('genre', models.CharField(blank=True, default='', max_length=100)),
+                ('venue_name', models.CharField(max_length=100)),
+                ('venue_slug', models.SlugField(max_length=255)),
+                ('image_url', models.CharField(blank=True, max_length=255, null=True)),
+                ('thumbnail_url', models.CharField(blank=True, max_length=255, null=True)),
+                ('image_renditions', models.JSONField(blank=True, null=True)),
+                ('min_price', models.DecimalField(blank=True, decimal_places=2, max_digits=10, null=True)),
+                ('sold_out', models.BooleanField(default=False)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'indexes': [models.Index(fields=['date', 'start_time'], name='concertsummary_date_idx'), models.Index(fields=['venue_slug', 'date'], name='concertsummary_venue_idx')],
+            },
+        ),
+        migrations.RunPython(fill_summaries, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,83 @@
+# Generated by Django 4.2.18 on 2026-10-19 17:42
+
+from django.db import migrations, models
+from django.utils import timezone
+import django.db.models.deletion
+
+
+def backfill_sales(apps, schema_editor):
+    """Record the sales made before the log existed as sold events dated now"""
+    SalesEvent = apps.get_model('api', 'SalesEvent')
+    SoldSeat = apps.get_model('api', 'SoldSeat')
+    TicketType = apps.get_model('api', 'TicketType')
+    now = timezone.now()
+
+    assigned = {
+        (tt.concert_id, tt.seat_zone_id): tt
+        for tt in TicketType.objects.filter(type='assigned')
+    }
+    events = []
+    sold = SoldSeat.objects.values_list('concert_id', 'seat__zone_id', 'seat__identifier')
+    for concert_id, zone_id, identifier in sold.iterator(chunk_size=2000):
+        tt = assigned.get((concert_id, zone_id))
+        events.append(SalesEvent(
+            concert_id=concert_id,
+            ticket_type_id=tt.pk if tt else None,
+            kind='sold',
+            seat=identifier,
+            price=tt.price if tt else None,
+            created_at=now,
+        ))
+        if len(events) == 2000:
+            SalesEvent.objects.bulk_create(events)
+            events = []
+
+    for tt in TicketType.objects.filter(type='general', sold__gt=0):
+        events.append(SalesEvent(
+            concert_id=tt.concert_id,
+            ticket_type_id=tt.pk,
+            kind='sold',
+            quantity=tt.sold,
+            price=tt.price,
+            created_at=now,
+        ))
+    SalesEvent.objects.bulk_create(events, batch_size=2000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0006_idempotencykey'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SalesCounter',
+            fields=[
+                ('concert', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='sales', serialize=False, to='api.concertpage')),
+                ('sold', models.PositiveIntegerField(default=0)),
+                ('released', models.PositiveIntegerField(default=0)),
+                ('held', models.PositiveIntegerField(default=0)),
+                ('expired', models.PositiveIntegerField(default=0)),
+                ('revenue', models.DecimalField(decimal_places=2, default=0, max_digits=14)),
+                ('last_event_id', models.BigIntegerField(default=0)),
+            ],
+        ),
+        migrations.CreateModel(
+            name='SalesEvent',
+            fields=[
+                ('id', models.BigAutoField(primary_key=True, serialize=False)),
+                ('kind', models.CharField(choices=[('sold', 'Sold'), ('released', 'Released'), ('held', 'Held'), ('expired', 'Hold expired')], max_length=10)),
+                ('seat', models.CharField(blank=True, default='', help_text='Seat identifier, e.g. A12', max_length=10)),
+                ('quantity', models.PositiveIntegerField(default=1)),
+                ('price', models.DecimalField(decimal_places=2, max_digits=10, null=True)),
+                ('created_at', models.DateTimeField()),
+                ('concert', models.ForeignKey(db_constraint=False, on_delete=django.db.models.deletion.DO_NOTHING, related_name='+', to='api.concertpage')),
+                ('ticket_type', models.ForeignKey(db_constraint=False, null=True, on_delete=django.db.models.deletion.DO_NOTHING, related_name='+', to='api.tickettype')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['concert', 'created_at'], name='salesevent_concert_idx')],
+            },
+        ),
+        migrations.RunPython(backfill_sales, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,21 @@
+# Generated by Django 4.2.18 on 2026-10-19 17:51
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0007_salesevent'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='VenueLayoutVersion',
+            fields=[
+                ('venue', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='layout_version', serialize=False, to='api.venuepage')),
+                ('version', models.PositiveIntegerField(default=1)),
+            ],
+        ),
+    ]
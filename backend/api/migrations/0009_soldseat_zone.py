@@ -0,0 +1,23 @@
+# Generated by Django 4.2.18 on 2026-10-19 17:54
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0008_venuelayoutversion'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='soldseat',
+            name='zone',
+            field=models.ForeignKey(db_index=False, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='+', to='api.seatzone'),
+        ),
+        migrations.AddIndex(
+            model_name='soldseat',
+            index=models.Index(fields=['concert', 'zone', 'seat'], name='soldseat_concert_zone_idx'),
+        ),
+    ]
@@ -0,0 +1,39 @@
+# Generated by Django 4.2.18 on 2026-10-19 17:56
+
+from django.db import migrations, transaction
+from django.db.models import Max, OuterRef, Subquery
+
+CHUNK_SIZE = 5000
+
+
+def backfill_zone(apps, schema_editor):
+    """
+    Copy each sold seat's zone onto it, CHUNK_SIZE rows per transaction, so
+    no lock on the table is held for longer than one chunk takes. Rows that
+    already have a zone are left alone, so the migration can be re-run
+    after an interruption.
+    """
+    SoldSeat = apps.get_model('api', 'SoldSeat')
+    Seat = apps.get_model('api', 'Seat')
+    db = schema_editor.connection.alias
+    last = SoldSeat.objects.using(db).aggregate(last=Max('pk'))['last'] or 0
+    zone = Subquery(Seat.objects.using(db).filter(pk=OuterRef('seat_id')).values('zone_id')[:1])
+    for start in range(0, last, CHUNK_SIZE):
+        with transaction.atomic(using=db):
+            SoldSeat.objects.using(db).filter(
+                pk__gt=start, pk__lte=start + CHUNK_SIZE, zone__isnull=True
+            ).update(zone_id=zone)
+
+
+class Migration(migrations.Migration):
+    # Each chunk commits on its own instead of the whole table in one
+    # transaction
+    atomic = False
+
+    dependencies = [
+        ('api', '0009_soldseat_zone'),
+    ]
+
+    operations = [
+        migrations.RunPython(backfill_zone, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,47 @@
+# Generated by Django 4.2.18 on 2026-10-19 17:59
+
+from django.db import migrations, models
+import django.db.models.deletion
+import django.utils.timezone
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0010_backfill_soldseat_zone'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ZoneProvisioningJob',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('status', models.CharField(choices=[('pending', 'Pending'), ('running', 'Running'), ('done', 'Done'), ('failed', 'Failed'), ('cancelled', 'Cancelled')], default='pending', max_length=10)),
+                ('total', models.PositiveIntegerField(default=0)),
+                ('progress', models.PositiveIntegerField(default=0)),
+                ('attempts', models.PositiveIntegerField(default=0)),
+                ('error', models.TextField(blank=True, default='')),
+                ('created_at', models.DateTimeField(default=django.utils.timezone.now)),
+                ('updated_at', models.DateTimeField(default=django.utils.timezone.now)),
+                ('finished_at', models.DateTimeField(blank=True, null=True)),
+            ],
+        ),
+        migrations.AddField(
+            model_name='seatzone',
+            name='provisioned',
+            field=models.BooleanField(default=True),
+        ),
+        migrations.AddIndex(
+            model_name='seat',
+            index=models.Index(fields=['zone', 'row', 'number'], name='seat_zone_row_idx'),
+        ),
+        migrations.AddField(
+            model_name='zoneprovisioningjob',
+            name='zone',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='provisioning_jobs', to='api.seatzone'),
+        ),
+        migrations.AddIndex(
+            model_name='zoneprovisioningjob',
+            index=models.Index(fields=['status', 'updated_at'], name='zonejob_status_idx'),
+        ),
+    ]
@@ -0,0 +1,56 @@
+# Generated by Django 4.2.18 on 2026-10-19 18:08
+
+from django.db import migrations, models
+from django.utils import timezone
+
+
+def seed_catalog(apps, schema_editor):
+    """
+    Start the feed with a created event for everything already in the
+    catalog, so a client reading it from the beginning sees all of it.
+    """
+    db = schema_editor.connection.alias
+    ChangeEvent = apps.get_model('api', 'ChangeEvent')
+    VenuePage = apps.get_model('api', 'VenuePage')
+    ConcertPage = apps.get_model('api', 'ConcertPage')
+    SeatZone = apps.get_model('api', 'SeatZone')
+    TicketType = apps.get_model('api', 'TicketType')
+    now = timezone.now()
+    sources = [
+        ('venue', VenuePage.objects.filter(live=True).values_list('pk', 'slug')),
+        ('zone', SeatZone.objects.filter(venue__live=True).values_list('pk', 'slug', 'venue__slug')),
+        ('concert', ConcertPage.objects.filter(live=True).values_list('pk', 'slug', 'venue__slug')),
+        ('ticket_type', TicketType.objects.filter(concert__live=True).values_list('pk', 'slug', 'concert__slug')),
+    ]
+    for kind, rows in sources:
+        ChangeEvent.objects.using(db).bulk_create(
+            [
+                ChangeEvent(kind=kind, object_id=row[0], action='created', slug=row[1],
+                            parent=row[2] if len(row) > 2 else '', created_at=now)
+                for row in rows.using(db).order_by('pk').iterator()
+            ],
+            batch_size=1000,
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0011_zoneprovisioningjob'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ChangeEvent',
+            fields=[
+                ('id', models.BigAutoField(primary_key=True, serialize=False)),
+                ('kind', models.CharField(choices=[('venue', 'Venue'), ('zone', 'Seat zone'), ('concert', 'Concert'), ('ticket_type', 'Ticket type')], max_length=20)),
+                ('object_id', models.PositiveIntegerField()),
+                ('action', models.CharField(choices=[('created', 'Created'), ('updated', 'Updated'), ('deleted', 'Deleted')], max_length=10)),
+                ('slug', models.CharField(max_length=255)),
+                ('parent', models.CharField(blank=True, default='', help_text='Slug of the venue of a zone or concert, or the concert of a ticket type', max_length=255)),
+                ('created_at', models.DateTimeField()),
+            ],
+        ),
+        migrations.RunPython(seed_catalog, migrations.RunPython.noop),
+    ]
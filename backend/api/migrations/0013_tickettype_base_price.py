@@ -0,0 +1,18 @@
+# Generated by Django 4.2.18 on 2026-10-19 18:12
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0012_changeevent'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='tickettype',
+            name='base_price',
+            field=models.DecimalField(blank=True, decimal_places=2, max_digits=10, null=True),
+        ),
+    ]
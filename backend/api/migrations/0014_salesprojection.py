@@ -0,0 +1,31 @@
+# Generated by Django 4.2.18 on 2026-10-19 18:30
+
+from django.db import migrations, models
+from django.db.models import Max
+
+
+def create_projection(apps, schema_editor):
+    """The single cursor row, starting where the counters have got to"""
+    SalesCounter = apps.get_model('api', 'SalesCounter')
+    SalesProjection = apps.get_model('api', 'SalesProjection')
+    cursor = SalesCounter.objects.aggregate(cursor=Max('last_event_id'))['cursor'] or 0
+    SalesProjection.objects.create(pk=1, last_event_id=cursor)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0013_tickettype_base_price'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SalesProjection',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('last_event_id', models.BigIntegerField(default=0)),
+                ('updated_at', models.DateTimeField(null=True)),
+            ],
+        ),
+        migrations.RunPython(create_projection, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,21 @@
+# Generated by Django 4.2.18 on 2026-10-19 18:31
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0014_salesprojection'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='WaitingRoomQueue',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('concert', models.SlugField(max_length=255, unique=True)),
+                ('last_admission', models.FloatField(default=0)),
+            ],
+        ),
+    ]
@@ -0,0 +1,37 @@
+# Generated by Django 4.2.18 on 2026-10-19 18:51
+
+from django.db import migrations, models
+
+
+def forget_stored_responses(apps, schema_editor):
+    # Older rows may hold gzipped bodies that can't be replayed without the
+    # dropped content_encoding, and they are only a short-lived cache
+    apps.get_model('api', 'IdempotencyKey').objects.all().delete()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0015_waitingroomqueue'),
+    ]
+
+    operations = [
+        migrations.RunPython(forget_stored_responses, migrations.RunPython.noop),
+        migrations.RemoveConstraint(
+            model_name='idempotencykey',
+            name='idempotencykey_path_key_uniq',
+        ),
+        migrations.RemoveField(
+            model_name='idempotencykey',
+            name='content_encoding',
+        ),
+        migrations.AddField(
+            model_name='idempotencykey',
+            name='client',
+            field=models.CharField(default='', max_length=64),
+        ),
+        migrations.AddConstraint(
+            model_name='idempotencykey',
+            constraint=models.UniqueConstraint(fields=('client', 'path', 'key'), name='idempotencykey_client_path_key_uniq'),
+        ),
+    ]
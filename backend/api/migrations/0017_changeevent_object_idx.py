@@ -0,0 +1,17 @@
+# Generated by Django 4.2.18 on 2026-10-19 18:56
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0016_idempotencykey_client'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='changeevent',
+            index=models.Index(fields=['kind', 'object_id', 'id'], name='changeevent_object_idx'),
+        ),
+    ]
@@ -0,0 +1,185 @@
+import datetime
+from decimal import Decimal
+
+import numpy as np
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Count, F, OuterRef, Subquery
+
+from .changefeed import record_change_rows
+from .models import SoldSeat, TicketType
+from .signals import prices_changed
+
+BATCH_SIZE = 1000
+
+
+class PricePlan:
+    """
+    New prices for every ticket type of the upcoming live concerts, as
+    parallel arrays: one entry per ticket type, changed marks the ones
+    whose price moves.
+    """
+
+    def __init__(self, rows, as_of):
+        self.as_of = as_of
+        (ids, slugs, concert_ids, concert_slugs, types, price, base_price, ga_sold,
+         ga_capacity, seats_sold, dates, row_start, row_end, seat_start, seat_end) = (
+            zip(*rows) if rows else [()] * 15
+        )
+        self.ids = np.array(ids, dtype=np.int64)
+        self.slugs = slugs
+        self.concert_ids = np.array(concert_ids, dtype=np.int64)
+        self.concert_slugs = concert_slugs
+        self.assigned = np.array(types, dtype=object) == "assigned"
+        self.old = _floats(price)
+        self.base = np.where(np.isnan(_floats(base_price)), self.old, _floats(base_price))
+
+        rows_in_zone = _codes(row_end) - _codes(row_start) + 1
+        seats_in_row = _floats(seat_end) - _floats(seat_start) + 1
+        capacity = np.where(self.assigned, rows_in_zone * seats_in_row, _floats(ga_capacity))
+        sold = np.where(self.assigned, _floats(seats_sold), _floats(ga_sold))
+        capacity, sold = np.nan_to_num(capacity), np.nan_to_num(sold)
+        self.sell_through = np.clip(sold / np.maximum(capacity, 1), 0, 1)
+        self.days = (np.array(dates, dtype="datetime64[D]") - np.datetime64(as_of, "D")).astype(np.int64)
+
+        self.new = compute_prices(self.base, self.sell_through, self.days, self.assigned)
+        self.changed = np.rint(self.new * 100) != np.rint(self.old * 100)
+        # The base price is stored on first repricing so later runs start from it
+        self.unbased = np.isnan(_floats(base_price))
+
+    def __len__(self):
+        return len(self.ids)
+
+    def changes(self):
+        """(slug, concert slug, sell-through, days to show, old, new) of each changed ticket type"""
+        for i in np.flatnonzero(self.changed):
+            yield (self.slugs[i], self.concert_slugs[i], self.sell_through[i], self.days[i],
+                   _decimal(self.old[i]), _decimal(self.new[i]))
+
+
+def _floats(values):
+    return np.array([np.nan if v is None else float(v) for v in values], dtype=np.float64)
+
+
+def _codes(letters):
+    """Code points of single-letter rows; NaN where there is none"""
+    codes = np.array([v or "" for v in letters], dtype="U1").view(np.uint32).astype(np.float64)
+    return np.where(codes == 0, np.nan, codes)
+
+
+def _decimal(value):
+    return Decimal(f"{value:.2f}")
+
+
+def compute_prices(base, sell_through, days, assigned):
+    """
+    New prices from the base prices: sell-through ahead of where it is
+    expected to be by now raises the price, behind it lowers it. The
+    expected share grows linearly from 0 PRICING_HORIZON_DAYS before the
+    show to everything on the day. Assigned seating reacts with its own
+    PRICING_DEMAND_WEIGHT, as does general admission.
+    """
+    expected = np.clip(1 - days / settings.PRICING_HORIZON_DAYS, 0, 1)
+    weights = settings.PRICING_DEMAND_WEIGHT
+    weight = np.where(assigned, weights["assigned"], weights["general"])
+    multiplier = np.clip(
+        1 + weight * (sell_through - expected),
+        settings.PRICING_MIN_MULTIPLIER,
+        settings.PRICING_MAX_MULTIPLIER,
+    )
+    step = settings.PRICING_ROUND_TO
+    return np.round(base * multiplier / step) * step
+
+
+def plan_prices(as_of=None):
+    """
+    Price every ticket type of the live concerts on or after as_of (today
+    by default), from a single query.
+    """
+    as_of = as_of or datetime.date.today()
+    seats_sold = (
+        SoldSeat.objects.filter(concert=OuterRef("concert"), zone=OuterRef("seat_zone"))
+        .order_by()
+        .values("concert")
+        .annotate(n=Count("*"))
+        .values("n")
+    )
+    rows = list(
+        TicketType.objects.filter(concert__live=True, concert__date__gte=as_of)
+        .annotate(seats_sold=Subquery(seats_sold))
+        .order_by("pk")
+        .values_list(
+            "pk", "slug", "concert_id", "concert__slug", "type", "price", "base_price",
+            "sold", "ga_capacity", "seats_sold", "concert__date",
+            "seat_zone__row_start", "seat_zone__row_end",
+            "seat_zone__seat_start", "seat_zone__seat_end",
+        )
+    )
+    return PricePlan(rows, as_of)
+
+
+def _price(cents):
+    return Decimal(int(cents)) / 100
+
+
+def apply_prices(plan):
+    """
+    Write the plan's new prices in one transaction, and keep the current
+    price as the base of ticket types repriced for the first time. Prices
+    are rounded, so many ticket types share one: each price is written with
+    an UPDATE per BATCH_SIZE ids rather than bulk_update's CASE per row,
+    which takes a minute for 100,000 ticket types.
+
+    The plan is read outside the transaction, so every UPDATE also filters
+    on the price the plan started from: a price changed in the meantime,
+    e.g. by hand through the API, is left alone rather than overwritten.
+    Returns the number of ticket types repriced and the slugs of those
+    skipped that way.
+    """
+    changed = np.flatnonzero(plan.changed)
+    unbased = plan.ids[plan.unbased]
+    if not (len(changed) or len(unbased)):
+        return 0, []
+    with transaction.atomic():
+        for start in range(0, len(unbased), BATCH_SIZE):
+            TicketType.objects.filter(pk__in=unbased[start:start + BATCH_SIZE].tolist()).update(
+                base_price=F("price")
+            )
+
+        # One UPDATE per (new price, planned-from price) pair
+        pairs = np.stack([
+            np.rint(plan.new[changed] * 100).astype(np.int64),
+            np.rint(plan.old[changed] * 100).astype(np.int64),
+        ], axis=1)
+        order = np.lexsort((pairs[:, 1], pairs[:, 0]))
+        keys, first = np.unique(pairs[order], axis=0, return_index=True)
+        skipped = []
+        for (new, old), positions in zip(keys, np.split(order, first[1:])):
+            for start in range(0, len(positions), BATCH_SIZE):
+                batch = changed[positions[start:start + BATCH_SIZE]]
+                ids = plan.ids[batch].tolist()
+                updated = TicketType.objects.filter(pk__in=ids, price=_price(old)).update(
+                    price=_price(new)
+                )
+                if updated < len(ids):
+                    written = set(
+                        TicketType.objects.filter(pk__in=ids, price=_price(new))
+                        .values_list("pk", flat=True)
+                    )
+                    skipped.extend(i for i in batch.tolist() if plan.ids[i] not in written)
+        changed = np.setdiff1d(changed, skipped)
+
+        for start in range(0, len(changed), BATCH_SIZE):
+            record_change_rows(
+                "ticket_type",
+                [
+                    (int(plan.ids[i]), plan.slugs[i], int(plan.concert_ids[i]))
+                    for i in changed[start:start + BATCH_SIZE]
+                ],
+                "updated",
+            )
+        if len(changed):
+            prices_changed.send(
+                sender=TicketType, concert_ids=sorted(set(plan.concert_ids[changed].tolist()))
+            )
+    return len(changed), [plan.slugs[i] for i in sorted(skipped)]
@@ -0,0 +1,198 @@
+import datetime
+
+from django.conf import settings
+from django.core.exceptions import ValidationError
+from django.db import transaction
+from django.db.models import F, Q
+from django.utils import timezone
+
+from .changefeed import record_changes
+from .models import (
+    ConcertPage,
+    Seat,
+    SeatZone,
+    SoldSeat,
+    ZoneProvisioningJob,
+    bump_layout_version,
+    sync_zone_seats,
+)
+from .signals import inventory_changed
+
+OPEN = ("pending", "running")
+
+
+class JobCancelled(Exception):
+    """The job was cancelled, deleted or taken over by another worker"""
+
+
+def layout_size(zone):
+    """Number of seats in a zone's layout, without building it"""
+    if not (zone.row_start and zone.row_end and zone.seat_start and zone.seat_end):
+        return 0
+    return (ord(zone.row_end) - ord(zone.row_start) + 1) * (zone.seat_end - zone.seat_start + 1)
+
+
+def _outside(zone):
+    """Seats of the zone that are not in its current layout"""
+    if not layout_size(zone):
+        return Q()
+    return (
+        Q(row__lt=zone.row_start) | Q(row__gt=zone.row_end)
+        | Q(number__lt=zone.seat_start) | Q(number__gt=zone.seat_end)
+    )
+
+
+def _announce(zones):
+    """Zones went on or off sale, so the concerts selling them have changed"""
+    for concert in ConcertPage.objects.filter(ticket_types__seat_zone__in=zones).distinct():
+        inventory_changed.send(sender=SeatZone, concert=concert)
+
+
+def provision_zones(zones):
+    """
+    Bring the seats of zones in line with their layout. Zones of up to
+    ZONE_PROVISIONING_SYNC_LIMIT seats are synced right away; larger ones are
+    taken off sale and queued as a ZoneProvisioningJob for
+    `manage.py provision_zones`. Returns the queued jobs.
+    """
+    zones = [zone for zone in zones if zone.pk]
+    if not zones:
+        return []
+    large = [zone for zone in zones if layout_size(zone) > settings.ZONE_PROVISIONING_SYNC_LIMIT]
+    small = [zone for zone in zones if zone not in large]
+    now = timezone.now()
+    with transaction.atomic():
+        # A job queued for an earlier layout of these zones would undo this one
+        ZoneProvisioningJob.objects.filter(zone__in=zones, status__in=OPEN).update(
+            status="cancelled", updated_at=now, finished_at=now
+        )
+        sync_zone_seats(small)
+        back_on_sale = list(SeatZone.objects.filter(pk__in=[z.pk for z in small], provisioned=False))
+        if back_on_sale:
+            SeatZone.objects.filter(pk__in=[z.pk for z in back_on_sale]).update(provisioned=True)
+            record_changes("zone", back_on_sale, "updated")
+            _announce(small)
+        for zone in small:
+            zone.provisioned = True
+        if not large:
+            return []
+
+        # Checked here too so the request fails, rather than the job later
+        for zone in large:
+            stale = Seat.objects.filter(zone=zone).filter(_outside(zone))
+            if SoldSeat.objects.filter(zone=zone, seat__in=stale).exists():
+                raise ValidationError("Cannot remove seats that have already been sold")
+        SeatZone.objects.filter(pk__in=[zone.pk for zone in large]).update(provisioned=False)
+        record_changes("zone", large, "updated")
+        jobs = ZoneProvisioningJob.objects.bulk_create(
+            [ZoneProvisioningJob(zone=zone, total=layout_size(zone)) for zone in large]
+        )
+        for zone in large:
+            zone.provisioned = False
+        bump_layout_version({zone.venue_id for zone in large})
+        _announce(large)
+    return jobs
+
+
+def _heartbeat(job, **fields):
+    """
+    Save fields on a running job, as long as it is still this worker's:
+    cancelling it, or another worker taking it over, stops this one.
+    """
+    updated = ZoneProvisioningJob.objects.filter(
+        pk=job.pk, status="running", attempts=job.attempts
+    ).update(updated_at=timezone.now(), **fields)
+    if not updated:
+        raise JobCancelled
+
+
+def run_job(job, chunk_size=None, on_progress=None):
+    """
+    Write the seats of a claimed job's zone: first remove the seats its
+    layout no longer has, then create the missing ones one row slice of
+    chunk_size seats at a time. Every chunk commits together with the job's
+    progress, so a job that fails or whose worker dies carries on from the
+    last chunk; on_progress(job) is called after each one. Returns the
+    job's final status.
+    """
+    chunk_size = chunk_size or settings.ZONE_PROVISIONING_CHUNK_SIZE
+    try:
+        zone = SeatZone.objects.get(pk=job.zone_id)
+        stale = Seat.objects.filter(zone=zone).filter(_outside(zone)).values_list("pk", flat=True)
+        while ids := list(stale[:chunk_size]):
+            with transaction.atomic():
+                if SoldSeat.objects.filter(seat_id__in=ids).exists():
+                    raise ValidationError("Cannot remove seats that have already been sold")
+                Seat.objects.filter(pk__in=ids).delete()
+                _heartbeat(job)
+
+        width = zone.seat_end - zone.seat_start + 1 if job.total else 1
+        while job.progress < job.total:
+            row_index, column = divmod(job.progress, width)
+            row = chr(ord(zone.row_start) + row_index)
+            first = zone.seat_start + column
+            end = min(first + chunk_size, zone.seat_end + 1)
+            with transaction.atomic():
+                have = set(
+                    Seat.objects.filter(zone=zone, row=row, number__gte=first, number__lt=end)
+                    .values_list("number", flat=True)
+                )
+                Seat.objects.bulk_create(
+                    [
+                        Seat(zone=zone, row=row, number=number, identifier=f"{row}{number}")
+                        for number in range(first, end)
+                        if number not in have
+                    ],
+                    batch_size=1000,
+                )
+                _heartbeat(job, progress=job.progress + end - first)
+            job.progress += end - first
+            if on_progress:
+                on_progress(job)
+
+        with transaction.atomic():
+            _heartbeat(job, status="done", finished_at=timezone.now())
+            SeatZone.objects.filter(pk=zone.pk).update(provisioned=True)
+            record_changes("zone", [zone], "updated")
+            bump_layout_version([zone.venue_id])
+            _announce([zone])
+        job.status = "done"
+    except (JobCancelled, SeatZone.DoesNotExist):
+        job.status = "cancelled"
+    except Exception as e:
+        message = "; ".join(e.messages) if isinstance(e, ValidationError) else str(e)
+        ZoneProvisioningJob.objects.filter(
+            pk=job.pk, status="running", attempts=job.attempts
+        ).update(status="failed", error=message, updated_at=timezone.now())
+        job.status, job.error = "failed", message
+    return job.status
+
+
+def claim_job():
+    """
+    Mark the oldest job that is waiting, or whose worker has not reported
+    progress for ZONE_PROVISIONING_LOCK_TIMEOUT seconds, as running and
+    return it; None if there is nothing to do.
+    """
+    stale = timezone.now() - datetime.timedelta(seconds=settings.ZONE_PROVISIONING_LOCK_TIMEOUT)
+    candidates = ZoneProvisioningJob.objects.filter(
+        Q(status="pending") | Q(status="running", updated_at__lt=stale)
+    ).order_by("created_at", "pk")
+    for job in candidates[:10]:
+        claimed = ZoneProvisioningJob.objects.filter(
+            pk=job.pk, status=job.status, attempts=job.attempts
+        ).update(status="running", attempts=F("attempts") + 1, error="", updated_at=timezone.now())
+        if claimed:
+            job.refresh_from_db()
+            return job
+    return None
+
+
+def resume(job):
+    """Queue a failed job again; it carries on from its last chunk"""
+    resumed = ZoneProvisioningJob.objects.filter(pk=job.pk, status="failed").update(
+        status="pending", updated_at=timezone.now()
+    )
+    if resumed:
+        job.refresh_from_db()
+    return bool(resumed)
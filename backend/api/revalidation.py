@@ -0,0 +1,168 @@
+import logging
+import threading
+import time
+
+import requests
+from django.conf import settings
+from django.db import transaction
+
+logger = logging.getLogger(__name__)
+
+# Frontend pages that list concerts, revalidated when one appears or goes away
+LISTING_PATHS = ["/"]
+
+
+def concert_paths(slug):
+    """Frontend paths that render a concert (frontend/src/app/[concertSlug])"""
+    return [f"/{slug}"]
+
+
+class Revalidator:
+    """
+    Collects the concerts whose frontend pages are out of date and POSTs
+    them to the frontend's revalidation webhook from a background thread.
+    A webhook goes out once changes have been quiet for debounce seconds,
+    or max_delay seconds after the first pending change, so an on-sale
+    selling seats every second costs one webhook per max_delay rather than
+    one per sale. Each webhook carries at most batch_size concerts and is
+    retried with exponential backoff on connection errors and 5xx.
+    """
+
+    def __init__(
+        self, url, secret="", debounce=2.0, max_delay=10.0, batch_size=100, retries=5,
+        backoff=1.0, timeout=5.0, clock=time.monotonic, sleep=time.sleep,
+    ):
+        self.url = url
+        self.secret = secret
+        self.debounce = debounce
+        self.max_delay = max_delay
+        self.batch_size = batch_size
+        self.retries = retries
+        self.backoff = backoff
+        self.timeout = timeout
+        self.clock = clock
+        self.sleep = sleep
+        self.session = requests.Session()
+        self._slugs = set()
+        self._paths = set()
+        self._first = self._last = None
+        self._cond = threading.Condition()
+        self._thread = None
+
+    def add(self, slugs, paths=()):
+        with self._cond:
+            now = self.clock()
+            if self._first is None:
+                self._first = now
+            self._last = now
+            self._slugs.update(slugs)
+            self._paths.update(paths)
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._run, name="revalidation", daemon=True)
+                self._thread.start()
+            self._cond.notify()
+
+    def _wait(self):
+        """Seconds until the pending changes are due, None if there are none"""
+        if self._first is None:
+            return None
+        return min(self._last + self.debounce, self._first + self.max_delay) - self.clock()
+
+    def _take(self):
+        slugs, paths = sorted(self._slugs), sorted(self._paths)
+        self._slugs.clear()
+        self._paths.clear()
+        self._first = self._last = None
+        return slugs, paths
+
+    def _run(self):
+        while True:
+            with self._cond:
+                while (wait := self._wait()) is None or wait > 0:
+                    self._cond.wait(wait)
+                slugs, paths = self._take()
+            try:
+                self.send(slugs, paths)
+            except Exception:
+                logger.exception("Sending revalidation webhooks failed")
+
+    def flush(self):
+        """Send the pending changes now, in the calling thread"""
+        with self._cond:
+            slugs, paths = self._take()
+        return self.send(slugs, paths)
+
+    def batches(self, slugs, paths):
+        """Webhook payloads of at most batch_size concerts; extra paths go with the first"""
+        for start in range(0, max(len(slugs), 1), self.batch_size):
+            chunk = slugs[start:start + self.batch_size]
+            chunk_paths = [path for slug in chunk for path in concert_paths(slug)]
+            if start == 0:
+                chunk_paths = sorted(set(paths) | set(chunk_paths))
+            if chunk or chunk_paths:
+                yield {"slugs": chunk, "paths": chunk_paths}
+
+    def send(self, slugs, paths):
+        """POST the changes, retrying each batch; returns how many batches were delivered"""
+        return sum(self.post(payload) for payload in self.batches(slugs, paths))
+
+    def post(self, payload):
+        headers = {"Authorization": f"Bearer {self.secret}"} if self.secret else {}
+        for attempt in range(self.retries + 1):
+            try:
+                response = self.session.post(
+                    self.url, json=payload, headers=headers, timeout=self.timeout
+                )
+                if response.ok:
+                    return True
+                if response.status_code < 500 and response.status_code != 429:
+                    logger.error(
+                        "Revalidation webhook rejected with %s: %s",
+                        response.status_code, response.text[:200],
+                    )
+                    return False
+                error = f"HTTP {response.status_code}"
+            except requests.RequestException as e:
+                error = str(e)
+            if attempt < self.retries:
+                self.sleep(self.backoff * 2 ** attempt)
+        logger.error(
+            "Revalidation webhook failed after %s attempts (%s), dropping %s",
+            self.retries + 1, error, payload["paths"],
+        )
+        return False
+
+
+_revalidator = None
+_lock = threading.Lock()
+
+
+def get_revalidator():
+    """This process's Revalidator, or None when REVALIDATION_WEBHOOK_URL is not set"""
+    global _revalidator
+    if not settings.REVALIDATION_WEBHOOK_URL:
+        return None
+    if _revalidator is None or _revalidator.url != settings.REVALIDATION_WEBHOOK_URL:
+        with _lock:
+            if _revalidator is None or _revalidator.url != settings.REVALIDATION_WEBHOOK_URL:
+                _revalidator = Revalidator(
+                    settings.REVALIDATION_WEBHOOK_URL,
+                    secret=settings.REVALIDATION_SECRET,
+                    debounce=settings.REVALIDATION_DEBOUNCE,
+                    max_delay=settings.REVALIDATION_MAX_DELAY,
+                    batch_size=settings.REVALIDATION_BATCH_SIZE,
+                    retries=settings.REVALIDATION_RETRIES,
+                )
+    return _revalidator
+
+
+def revalidate_concerts(slugs, paths=()):
+    """Queue the frontend pages of concerts for revalidation once the transaction commits"""
+    revalidator = get_revalidator()
+    if revalidator is None:
+        return
+    # Callers pass querysets, only evaluated when there is somewhere to send them
+    slugs, paths = [slug for slug in slugs if slug], list(paths)
+    if not (slugs or paths):
+        return
+    transaction.on_commit(lambda: revalidator.add(slugs, paths))
@@ -0,0 +1,74 @@
+from django.conf import settings
+from django.contrib.contenttypes.models import ContentType
+from django.db.models import F, Q, Window
+from django.db.models.functions import RowNumber
+from django.utils import timezone
+from wagtail.models import Comment, Page, Revision, TaskState
+from wagtail.signals import page_published
+
+
+def _revisionless(page):
+    """Only a live page without a pending draft can be published in place"""
+    return (
+        getattr(settings, "API_REVISIONLESS_WRITES", False)
+        and page.live
+        and not page.has_unpublished_changes
+        and page.latest_revision_id == page.live_revision_id
+    )
+
+
+def publish(page):
+    """
+    Publish an API edit of page.
+
+    By default this is save_revision().publish(), as in the admin. With
+    API_REVISIONLESS_WRITES the live page is saved in place and its live
+    revision, if any, is updated to match, so the page history does not
+    grow on every automated write and the admin still edits the new content.
+    page_published is sent with revision=None. Pages with an unpublished
+    draft always get a new revision so the draft is kept.
+    """
+    if not _revisionless(page):
+        return page.save_revision().publish()
+
+    now = timezone.now()
+    page.draft_title = page.title
+    page.first_published_at = page.first_published_at or now
+    page.last_published_at = now
+    page.save()
+    if page.live_revision_id:
+        Revision.objects.filter(pk=page.live_revision_id).update(
+            content=page.serializable_data(), object_str=str(page)
+        )
+    page_published.send(sender=type(page), instance=page, revision=None)
+
+
+def prunable_revisions(keep, older_than=None):
+    """
+    Page revisions outside the retention policy: not among the newest keep
+    revisions of their page and, when older_than is given, created before it.
+    Revisions a page, a scheduled publish, a workflow or a comment still
+    points at are always kept.
+    """
+    ranked = (
+        Revision.objects.filter(base_content_type=ContentType.objects.get_for_model(Page))
+        .annotate(
+            rank=Window(
+                RowNumber(),
+                partition_by=[F("object_id")],
+                order_by=[F("created_at").desc(), F("id").desc()],
+            )
+        )
+        .filter(rank__gt=keep)
+        .values("pk")
+    )
+    revisions = Revision.objects.filter(pk__in=ranked, approved_go_live_at__isnull=True)
+    if older_than is not None:
+        revisions = revisions.filter(created_at__lt=older_than)
+
+    return revisions.exclude(
+        Q(pk__in=Page.objects.filter(latest_revision__isnull=False).values("latest_revision"))
+        | Q(pk__in=Page.objects.filter(live_revision__isnull=False).values("live_revision"))
+        | Q(pk__in=TaskState.objects.values("revision"))
+        | Q(pk__in=Comment.objects.filter(revision_created__isnull=False).values("revision_created"))
+    )
@@ -0,0 +1,126 @@
+import time
+from functools import wraps
+
+from asgiref.local import Local
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.db import connections
+
+REPLICA_ALIAS = "replica"
+PRIMARY_COOKIE = "primary_until"
+SAFE_METHODS = ("GET", "HEAD", "OPTIONS")
+
+_state = Local()
+
+
+def replica_enabled():
+    return REPLICA_ALIAS in connections.databases
+
+
+def _reading_from_replica():
+    return getattr(_state, "use_replica", False) and not getattr(_state, "pinned", False)
+
+
+class PrimaryReplicaRouter:
+    """
+    Send reads to the replica only inside views marked with @read_replica,
+    and only when the client is not inside its sticky-primary window.
+    Everything else, including every write, goes to the primary.
+    """
+
+    def db_for_read(self, model, **hints):
+        if _reading_from_replica() and replica_enabled():
+            return REPLICA_ALIAS
+        return "default"
+
+    def db_for_write(self, model, **hints):
+        return "default"
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # The replica is a copy of the primary, so rows from either are related
+        return True
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        return True
+
+
+def read_replica(view):
+    """Serve a read-only view from the replica database when one is configured"""
+
+    if iscoroutinefunction(view):
+
+        @wraps(view)
+        async def async_wrapper(request, *args, **kwargs):
+            previous = getattr(_state, "use_replica", False)
+            _state.use_replica = request.method in SAFE_METHODS
+            try:
+                return await view(request, *args, **kwargs)
+            finally:
+                _state.use_replica = previous
+
+        return async_wrapper
+
+    @wraps(view)
+    def wrapper(request, *args, **kwargs):
+        previous = getattr(_state, "use_replica", False)
+        _state.use_replica = request.method in SAFE_METHODS
+        try:
+            return view(request, *args, **kwargs)
+        finally:
+            _state.use_replica = previous
+
+    return wrapper
+
+
+class ReplicaRoutingMiddleware:
+    """
+    Keep a client on the primary for REPLICA_STICKY_SECONDS after it writes,
+    so reads straight after e.g. reserve_seats see its own changes even if
+    the replica has not caught up yet.
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def _pin(self, request, now):
+        try:
+            pinned_until = float(request.COOKIES.get(PRIMARY_COOKIE, 0))
+        except ValueError:
+            pinned_until = 0
+        _state.pinned = pinned_until > now
+
+    def _stick(self, request, response, now):
+        if request.method not in SAFE_METHODS and response.status_code < 400:
+            sticky = getattr(settings, "REPLICA_STICKY_SECONDS", 5)
+            response.set_cookie(
+                PRIMARY_COOKIE,
+                str(now + sticky),
+                max_age=sticky,
+                samesite="Lax",
+            )
+        return response
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        now = time.time()
+        self._pin(request, now)
+        try:
+            response = self.get_response(request)
+        finally:
+            _state.pinned = False
+        return self._stick(request, response, now)
+
+    async def __acall__(self, request):
+        now = time.time()
+        self._pin(request, now)
+        try:
+            response = await self.get_response(request)
+        finally:
+            _state.pinned = False
+        return self._stick(request, response, now)
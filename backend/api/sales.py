@@ -0,0 +1,129 @@
+import datetime
+from collections import defaultdict
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Min, Sum
+from django.db.models.functions import TruncDate
+from django.utils import timezone
+
+from .models import ConcertPage, SalesCounter, SalesEvent, SalesProjection
+
+COUNTER_FIELDS = ["sold", "released", "held", "expired", "revenue", "last_event_id"]
+
+
+def record_sales(concert, kind, ticket_type=None, seats=(), quantity=1):
+    """
+    Append events for an inventory change to the sales log: one per seat
+    identifier in seats, or a single event for quantity general admission
+    tickets. Call it in
+    the transaction that makes the change, so the log and the inventory
+    always agree.
+    """
+    now = timezone.now()
+    price = ticket_type.price if ticket_type is not None else None
+    event = dict(concert=concert, ticket_type=ticket_type, kind=kind, price=price, created_at=now)
+    if seats:
+        events = [SalesEvent(seat=identifier, **event) for identifier in seats]
+    else:
+        events = [SalesEvent(quantity=quantity, **event)]
+    SalesEvent.objects.bulk_create(events)
+
+
+def _apply(counter, event):
+    if event["id"] <= counter.last_event_id:
+        return
+    setattr(counter, event["kind"], getattr(counter, event["kind"]) + event["quantity"])
+    if event["price"] is not None and event["kind"] in ("sold", "released"):
+        sign = 1 if event["kind"] == "sold" else -1
+        counter.revenue += sign * event["price"] * event["quantity"]
+
+
+def catch_up(batch_size=5000):
+    """
+    Apply the events logged since the last run to the SalesCounter
+    projection, batch_size events per transaction, and return how many
+    were applied. Run it from `manage.py replay_sales_events`, never from
+    a request.
+
+    The position in the log is kept in the SalesProjection row, which each
+    transaction locks, so concurrent runs take turns and the cursor moves
+    past events of deleted concerts too. Event ids are taken before their
+    transaction commits, so events written in the last
+    SALES_PROJECTION_LAG seconds, and everything after them, wait for the
+    next run rather than being skipped.
+    """
+    applied = 0
+    while True:
+        with transaction.atomic():
+            # The row comes from the migration, but a flushed database has none
+            projection, _ = SalesProjection.objects.select_for_update().get_or_create(pk=1)
+            settled = timezone.now() - datetime.timedelta(seconds=settings.SALES_PROJECTION_LAG)
+            events = SalesEvent.objects.filter(id__gt=projection.last_event_id).order_by("id")
+            unsettled = events.filter(created_at__gt=settled).aggregate(first=Min("id"))["first"]
+            if unsettled is not None:
+                events = events.filter(id__lt=unsettled)
+            events = list(events.values("id", "concert_id", "kind", "quantity", "price")[:batch_size])
+            if not events:
+                return applied
+
+            by_concert = defaultdict(list)
+            for event in events:
+                by_concert[event["concert_id"]].append(event)
+            counters = SalesCounter.objects.in_bulk(list(by_concert))
+            # Events of deleted concerts stay in the log but have no counter
+            existing = set(ConcertPage.objects.filter(pk__in=by_concert).values_list("pk", flat=True))
+            for concert_id in existing:
+                counter = counters.get(concert_id) or SalesCounter(concert_id=concert_id)
+                for event in by_concert[concert_id]:
+                    _apply(counter, event)
+                counter.last_event_id = events[-1]["id"]
+                counters[concert_id] = counter
+            SalesCounter.objects.bulk_create(
+                [counters[concert_id] for concert_id in existing],
+                update_conflicts=True,
+                unique_fields=["concert"],
+                update_fields=COUNTER_FIELDS,
+            )
+            projection.last_event_id = events[-1]["id"]
+            projection.updated_at = timezone.now()
+            projection.save(update_fields=["last_event_id", "updated_at"])
+        applied += len(events)
+
+
+def rebuild(batch_size=5000):
+    """Throw the projection away and replay the whole log"""
+    with transaction.atomic():
+        SalesProjection.objects.select_for_update().filter(pk=1).update(last_event_id=0)
+        SalesCounter.objects.all().delete()
+    return catch_up(batch_size)
+
+
+def projected_through():
+    """
+    The id of the last event in the counters, and when they were last
+    brought up to date; (0, None) before catch_up has ever run
+    """
+    projection = SalesProjection.objects.filter(pk=1).values_list("last_event_id", "updated_at")
+    return projection.first() or (0, None)
+
+
+def daily_sales(concert, through=None):
+    """
+    Net tickets sold per day for a concert, read from the log up to and
+    including event through, so it agrees with the counters
+    """
+    days = defaultdict(int)
+    events = SalesEvent.objects.filter(concert=concert, kind__in=["sold", "released"])
+    if through is not None:
+        events = events.filter(id__lte=through)
+    rows = (
+        events
+        .annotate(day=TruncDate("created_at"))
+        .values_list("day", "kind")
+        .annotate(n=Sum("quantity"))
+        .order_by("day")
+    )
+    for day, kind, n in rows:
+        days[day] += n if kind == "sold" else -n
+    return [{"date": day, "sold": n} for day, n in days.items()]
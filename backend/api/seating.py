@@ -0,0 +1,92 @@
+import re
+
+from django.db import IntegrityError, transaction
+
+from .layout import get_layout
+from .models import SoldSeat
+from .sales import record_sales
+from .signals import inventory_changed
+
+TAKEN = 1
+MAX_QUANTITY = 10
+
+
+class ZoneOccupancy:
+    """
+    Which seats of an assigned zone are taken, one byte per seat laid out
+    row after row from the cached venue layout, so finding a block of free
+    seats is a regex scan over bytes instead of a query per candidate.
+    """
+
+    def __init__(self, zone, sold_seat_ids):
+        self.zone = zone
+        positions, grid = zone.seat_map()
+        self.taken = bytearray(grid)
+        for seat_id in sold_seat_ids:
+            position = positions.get(seat_id)
+            if position is not None:
+                self.taken[position] = TAKEN
+
+    @classmethod
+    def for_concert(cls, concert, zone):
+        layout = get_layout(zone.venue_id).zones[zone.pk]
+        sold = SoldSeat.objects.filter(concert=concert, zone=zone).values_list("seat_id", flat=True)
+        return cls(layout, sold)
+
+    def best_block(self, quantity):
+        """
+        Identifiers of quantity adjacent free seats in one row, from the
+        frontmost row that has such a block and as close to the middle of
+        that row as it gets; None when no row has one.
+        """
+        zone, width = self.zone, self.zone.width
+        free_run = re.compile(b"\x00{%d,}" % quantity)
+        middle = (width - quantity) / 2
+        for row in range(zone.row_count):
+            best = None
+            for run in free_run.finditer(self.taken, row * width, (row + 1) * width):
+                start, end = run.start() - row * width, run.end() - row * width
+                # Slide the block as far towards the middle as this run allows
+                offset = min(max(round(middle), start), end - quantity)
+                if best is None or abs(offset - middle) < abs(best - middle):
+                    best = offset
+            if best is not None:
+                letter = chr(ord(zone.row_start) + row)
+                return [f"{letter}{zone.seat_start + i}" for i in range(best, best + quantity)]
+        return None
+
+
+def find_best_available(concert, zone, quantity):
+    return ZoneOccupancy.for_concert(concert, zone).best_block(quantity)
+
+
+def reserve_best_available(concert, ticket_type, quantity, attempts=3):
+    """
+    Find and sell the best block of quantity seats in one transaction. If
+    another buyer takes one of the seats between the lookup and the insert,
+    the unique constraint on SoldSeat rejects it and the lookup runs again.
+    Returns the identifiers of the sold seats, or None if no block is
+    available.
+    """
+    zone = ticket_type.seat_zone
+    for _ in range(attempts):
+        identifiers = find_best_available(concert, zone, quantity)
+        if identifiers is None:
+            return None
+        seats = get_layout(zone.venue_id).seats(identifiers)
+        if seats is None:
+            return None
+        try:
+            with transaction.atomic():
+                SoldSeat.objects.bulk_create(
+                    [
+                        SoldSeat(concert=concert, seat_id=seat_id, zone_id=zone_id)
+                        for seat_id, zone_id in seats
+                    ]
+                )
+                record_sales(concert, "sold", ticket_type, seats=identifiers)
+                inventory_changed.send(sender=SoldSeat, concert=concert)
+            return identifiers
+        except IntegrityError:
+            continue
+    return None
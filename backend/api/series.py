@@ -0,0 +1,172 @@
+import datetime
+
+from django.core.exceptions import ValidationError
+from django.db import transaction
+from django.utils import timezone
+from django.utils.dateparse import parse_date, parse_time
+from django.utils.text import slugify
+from wagtail.models import Revision
+
+from .models import ConcertPage, SeatZone, TicketType
+from .signals import concerts_published
+from .tree import bulk_add_children
+
+MAX_SERIES_DATES = 366
+# A rule never looks further ahead than this from its start
+MAX_SERIES_SPAN_DAYS = 3 * 366
+
+
+def _date(value, name):
+    parsed = parse_date(str(value)) if value else None
+    if parsed is None:
+        raise ValidationError(f"'{name}' must be a date (YYYY-MM-DD)")
+    return parsed
+
+
+def _time(value, name):
+    parsed = parse_time(str(value)) if value else None
+    if parsed is None:
+        raise ValidationError(f"'{name}' must be a time (HH:MM)")
+    return parsed
+
+
+def series_dates(data):
+    """
+    Dates for a series, either listed explicitly ("dates": [...]) or from a
+    rule: {"start": "2025-03-01", "end": "2025-03-31"} or {"start": ..., "count": 10},
+    with optional "every_days" (default 1) and "weekdays" (0 is Monday).
+    A rule covers at most MAX_SERIES_SPAN_DAYS from its start.
+    """
+    if "dates" in data:
+        dates = sorted({_date(value, "dates") for value in data["dates"]})
+    else:
+        rule = data.get("rule") or {}
+        start = _date(rule.get("start"), "rule.start")
+        end = _date(rule["end"], "rule.end") if rule.get("end") else None
+        count = int(rule["count"]) if rule.get("count") else None
+        if end is None and count is None:
+            raise ValidationError("A rule needs an 'end' date or a 'count'")
+        every_days = int(rule.get("every_days", 1))
+        if not 1 <= every_days <= MAX_SERIES_SPAN_DAYS:
+            raise ValidationError(f"'rule.every_days' must be between 1 and {MAX_SERIES_SPAN_DAYS}")
+        weekdays = rule.get("weekdays") or range(7)
+        if not all(isinstance(weekday, int) and weekday in range(7) for weekday in weekdays):
+            raise ValidationError("'rule.weekdays' must be whole numbers from 0 (Monday) to 6")
+        limit = start + datetime.timedelta(days=MAX_SERIES_SPAN_DAYS)
+        if end is not None and end > limit:
+            raise ValidationError(f"A series can span at most {MAX_SERIES_SPAN_DAYS} days")
+
+        dates = []
+        day = start
+        step = datetime.timedelta(days=every_days)
+        while (end is None or day <= end) and (count is None or len(dates) < count):
+            if day > limit:
+                raise ValidationError(f"A series can span at most {MAX_SERIES_SPAN_DAYS} days")
+            if day.weekday() in weekdays:
+                dates.append(day)
+            if len(dates) > MAX_SERIES_DATES:
+                break
+            day += step
+
+    if not dates:
+        raise ValidationError("The series has no dates")
+    if len(dates) > MAX_SERIES_DATES:
+        raise ValidationError(f"A series can have at most {MAX_SERIES_DATES} dates")
+    return dates
+
+
+def create_series(venue, template, dates):
+    """
+    Create and publish one concert per date under venue from a template
+    (name, artist, times, description, genre and ticket_types priced by
+    zone slug), inserting every page, revision and ticket type in bulk.
+    """
+    zone_slugs = [tt["seat_zone_slug"] for tt in template.get("ticket_types", [])]
+    zones = {zone.slug: zone for zone in SeatZone.objects.filter(venue=venue, slug__in=zone_slugs)}
+    missing = [slug for slug in zone_slugs if slug not in zones]
+    if missing:
+        raise ValidationError(f"Unknown seat zones: {', '.join(missing)}")
+
+    base_slug = template.get("slug") or slugify(template["name"])
+    slugs = [f"{base_slug}-{date.isoformat()}" for date in dates]
+    taken = set(venue.get_children().filter(slug__in=slugs).values_list("slug", flat=True))
+    if taken:
+        raise ValidationError(f"Concerts already exist: {', '.join(sorted(taken))}")
+
+    start_time = _time(template.get("start_time"), "start_time")
+    end_time = _time(template["end_time"], "end_time") if template.get("end_time") else None
+
+    pages = []
+    for date, slug in zip(dates, slugs):
+        concert = ConcertPage(
+            title=f"{template['name']} ({date.isoformat()})",
+            slug=slug,
+            date=date,
+            venue=venue,
+            artist=template["artist"],
+            start_time=start_time,
+            end_time=end_time,
+            description=template.get("description"),
+            genre=template.get("genre"),
+            live=True,
+            has_unpublished_changes=False,
+        )
+        ticket_types = []
+        zones_used = set()
+        for position, tt in enumerate(template.get("ticket_types", [])):
+            zone = zones[tt["seat_zone_slug"]]
+            # A second ticket type on the same zone is told apart by its position
+            suffix = zone.slug if zone.slug not in zones_used else f"{zone.slug}-{position + 1}"
+            zones_used.add(zone.slug)
+            ticket_types.append(
+                TicketType(
+                    type="assigned" if zone.type == "assigned" else "general",
+                    seat_zone=zone,
+                    price=tt["price"],
+                    # For general admission, use zone's capacity
+                    ga_capacity=zone.capacity if zone.type == "general" else None,
+                    slug=slugify(f"{slug}-{suffix}"),
+                )
+            )
+        # Child relations are held in memory until the pages have ids, so the
+        # revisions include them without a query per page
+        concert.ticket_types = ticket_types
+        concert.wagtail_admin_comments = []
+        pages.append(concert)
+
+    now = timezone.now()
+    with transaction.atomic():
+        bulk_add_children(venue, pages)
+
+        ticket_types = []
+        for concert in pages:
+            for tt in concert.ticket_types.all():
+                # Already saved with the page if bulk_add_children fell back to add_child
+                if tt.pk is None:
+                    tt.concert_id = concert.pk
+                    ticket_types.append(tt)
+        TicketType.objects.bulk_create(ticket_types)
+
+        revisions = Revision.objects.bulk_create(
+            [
+                Revision(
+                    content_type_id=concert.content_type_id,
+                    base_content_type_id=concert.get_base_content_type().pk,
+                    object_id=str(concert.pk),
+                    created_at=now,
+                    content=concert.serializable_data(),
+                    object_str=str(concert),
+                )
+                for concert in pages
+            ]
+        )
+        for concert, revision in zip(pages, revisions):
+            concert.latest_revision = concert.live_revision = revision
+            concert.latest_revision_created_at = now
+        ConcertPage.objects.bulk_update(
+            pages, ["latest_revision", "live_revision", "latest_revision_created_at"]
+        )
+
+        concerts_published.send(sender=ConcertPage, concerts=pages)
+
+    return pages
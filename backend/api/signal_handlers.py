@@ -0,0 +1,198 @@
+from django.db.models.signals import post_delete, post_save, pre_save
+from django.dispatch import receiver
+from wagtail.images import get_image_model
+from wagtail.search.backends import get_search_backends
+from wagtail.signals import page_published, page_unpublished
+
+from . import suggest
+from .changefeed import record_changes
+from .images import schedule_renditions
+from .models import ConcertPage, SeatZone, TicketType, VenuePage, bump_layout_version
+from .revalidation import LISTING_PATHS, revalidate_concerts
+from .signals import concerts_published, inventory_changed, prices_changed, renditions_generated
+from .summary import refresh_concert_summaries
+
+
+# Fields whose previous values the page_published receivers below compare against
+SAVED_FIELDS = {VenuePage: ("name", "slug"), ConcertPage: ("slug",)}
+
+
+@receiver(pre_save, sender=ConcertPage)
+@receiver(pre_save, sender=VenuePage)
+def remember_saved_values(sender, instance, **kwargs):
+    """Keep the values the page is about to overwrite, for the page_published receivers"""
+    instance._saved = (
+        sender.objects.filter(pk=instance.pk).values(*SAVED_FIELDS[sender]).first()
+        if instance.pk else None
+    )
+
+
+@receiver(page_published, sender=VenuePage)
+def reindex_venue_concerts(sender, instance, **kwargs):
+    """Concerts index their venue's name, so refresh them when it changes"""
+    saved = getattr(instance, "_saved", None)
+    if saved is not None and saved["name"] == instance.name:
+        return
+    concerts = list(instance.concerts.select_related("venue"))
+    if concerts:
+        for backend in get_search_backends(with_auto_update=True):
+            backend.add_bulk(ConcertPage, concerts)
+
+
+@receiver(page_published, sender=ConcertPage)
+@receiver(page_published, sender=VenuePage)
+def update_suggestions(sender, instance, **kwargs):
+    suggest.index_page(instance)
+
+
+@receiver(page_unpublished, sender=ConcertPage)
+@receiver(page_unpublished, sender=VenuePage)
+@receiver(post_delete, sender=ConcertPage)
+@receiver(post_delete, sender=VenuePage)
+def remove_suggestions(sender, instance, **kwargs):
+    suggest.unindex_page(instance)
+
+
+@receiver(post_delete, sender=SeatZone)
+def invalidate_venue_layout(sender, instance, **kwargs):
+    bump_layout_version([instance.venue_id])
+
+
+@receiver(post_save, sender=get_image_model())
+def generate_upload_renditions(sender, instance, created, **kwargs):
+    if created:
+        schedule_renditions(instance)
+
+
+@receiver(page_published, sender=ConcertPage)
+@receiver(page_published, sender=VenuePage)
+def generate_attached_renditions(sender, instance, **kwargs):
+    schedule_renditions(instance.image)
+
+
+@receiver(page_published, sender=ConcertPage)
+@receiver(page_unpublished, sender=ConcertPage)
+def refresh_concert_summary(sender, instance, **kwargs):
+    refresh_concert_summaries([instance.pk])
+
+
+@receiver(page_published, sender=VenuePage)
+def refresh_venue_concert_summaries(sender, instance, **kwargs):
+    refresh_concert_summaries(instance.concerts.values_list("pk", flat=True))
+
+
+@receiver(inventory_changed)
+def refresh_inventory_summary(sender, concert, **kwargs):
+    refresh_concert_summaries([concert.pk])
+
+
+@receiver(renditions_generated)
+def refresh_image_summaries(sender, image, **kwargs):
+    refresh_concert_summaries(
+        ConcertPage.objects.filter(image=image).values_list("pk", flat=True)
+    )
+
+
+@receiver(concerts_published)
+def publish_concert_batch(sender, concerts, **kwargs):
+    """What the page_published receivers above do, once for the whole batch"""
+    for backend in get_search_backends(with_auto_update=True):
+        backend.add_bulk(ConcertPage, concerts)
+    for concert in concerts:
+        suggest.index_page(concert)
+    for image in {concert.image for concert in concerts if concert.image_id}:
+        schedule_renditions(image)
+    refresh_concert_summaries([concert.pk for concert in concerts])
+
+
+@receiver(page_published, sender=ConcertPage)
+@receiver(page_unpublished, sender=ConcertPage)
+@receiver(post_delete, sender=ConcertPage)
+def revalidate_concert_page(sender, instance, **kwargs):
+    slugs = [instance.slug]
+    saved = getattr(instance, "_saved", None)
+    if saved is not None and saved["slug"] != instance.slug:
+        # A renamed concert's page also goes away from its old path
+        slugs.append(saved["slug"])
+    revalidate_concerts(slugs, LISTING_PATHS)
+
+
+@receiver(page_published, sender=VenuePage)
+def revalidate_venue_concert_pages(sender, instance, **kwargs):
+    """Concert pages show their venue's name"""
+    revalidate_concerts(instance.concerts.values_list("slug", flat=True))
+
+
+@receiver(inventory_changed)
+def revalidate_inventory(sender, concert, **kwargs):
+    revalidate_concerts([concert.slug])
+
+
+@receiver(concerts_published)
+def revalidate_concert_batch(sender, concerts, **kwargs):
+    revalidate_concerts([concert.slug for concert in concerts], LISTING_PATHS)
+
+
+@receiver(renditions_generated)
+def revalidate_image_pages(sender, image, **kwargs):
+    revalidate_concerts(ConcertPage.objects.filter(image=image).values_list("slug", flat=True))
+
+
+FEED_KINDS = {VenuePage: "venue", SeatZone: "zone", ConcertPage: "concert", TicketType: "ticket_type"}
+
+
+@receiver(page_published, sender=ConcertPage)
+@receiver(page_published, sender=VenuePage)
+def record_page_published(sender, instance, **kwargs):
+    first = instance.first_published_at == instance.last_published_at
+    record_changes(FEED_KINDS[sender], [instance], "created" if first else "updated")
+    if first and sender is ConcertPage:
+        # Created with the concert, without post_save (see concert_list_create)
+        record_changes("ticket_type", instance.ticket_types.all(), "created")
+
+    # Events carry their parent's slug, so a renamed page's children need
+    # new ones for feed readers to file them under the new slug
+    saved = getattr(instance, "_saved", None)
+    if saved is None or saved["slug"] == instance.slug:
+        return
+    if sender is VenuePage:
+        record_changes("zone", instance.seat_zones.all(), "updated")
+        record_changes("concert", instance.concerts.all(), "updated")
+    else:
+        record_changes("ticket_type", instance.ticket_types.all(), "updated")
+
+
+@receiver(concerts_published)
+def record_concert_batch(sender, concerts, **kwargs):
+    record_changes("concert", concerts, "created")
+    record_changes("ticket_type", TicketType.objects.filter(concert__in=concerts), "created")
+
+
+@receiver(page_unpublished, sender=ConcertPage)
+@receiver(page_unpublished, sender=VenuePage)
+def record_page_unpublished(sender, instance, **kwargs):
+    """Only live pages are in the catalog"""
+    record_changes(FEED_KINDS[sender], [instance], "deleted")
+
+
+@receiver(post_save, sender=SeatZone)
+@receiver(post_save, sender=TicketType)
+def record_saved(sender, instance, created, **kwargs):
+    record_changes(FEED_KINDS[sender], [instance], "created" if created else "updated")
+
+
+@receiver(post_delete, sender=ConcertPage)
+@receiver(post_delete, sender=VenuePage)
+@receiver(post_delete, sender=SeatZone)
+@receiver(post_delete, sender=TicketType)
+def record_deleted(sender, instance, **kwargs):
+    record_changes(FEED_KINDS[sender], [instance], "deleted")
+
+
+@receiver(prices_changed)
+def refresh_repriced(sender, concert_ids, **kwargs):
+    """Summaries carry the minimum price, and the concert pages show prices"""
+    for start in range(0, len(concert_ids), 500):
+        batch = concert_ids[start:start + 500]
+        refresh_concert_summaries(batch)
+        revalidate_concerts(ConcertPage.objects.filter(pk__in=batch).values_list("slug", flat=True))
@@ -0,0 +1,16 @@
+from django.dispatch import Signal
+
+# Sent with concert= when seats or tickets for a concert are sold, released
+# or repriced outside of a page publish
+inventory_changed = Signal()
+
+# Sent with image= once the API renditions of an image have been generated
+renditions_generated = Signal()
+
+# Sent with concerts= after a batch of concert pages has been inserted and
+# published without per-page page_published signals (see api.series)
+concerts_published = Signal()
+
+# Sent with concert_ids= after api.pricing has repriced ticket types of
+# many concerts in bulk, instead of one inventory_changed per concert
+prices_changed = Signal()
@@ -0,0 +1,150 @@
+import threading
+import unicodedata
+from bisect import bisect_left, insort
+
+from .models import ConcertPage, VenuePage
+
+
+def normalize(text):
+    """Lowercase and strip accents so 'Beyoncé' matches 'beyon'"""
+    decomposed = unicodedata.normalize("NFKD", text or "")
+    return "".join(c for c in decomposed if not unicodedata.combining(c)).casefold().strip()
+
+
+class PrefixIndex:
+    """
+    In-memory typeahead index over artist names, concert titles and venue names.
+
+    Every suggestion is stored under its full name and under each later word
+    ("Eason Chan" is found by "eas" and by "cha") as (key, suggestion) tuples
+    in one sorted list, so a lookup is a bisect followed by a short scan.
+    Suggestions are reference counted per source page: an artist shared by
+    several concerts stays until the last of them is removed.
+    """
+
+    def __init__(self):
+        self._keys = []
+        self._refs = {}
+        self._sources = {}
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._refs)
+
+    @staticmethod
+    def _tokens(label):
+        words = normalize(label).split()
+        return {" ".join(words[i:]) for i in range(len(words))}
+
+    def _add(self, suggestion):
+        count = self._refs.get(suggestion, 0)
+        self._refs[suggestion] = count + 1
+        if not count:
+            for token in self._tokens(suggestion[1]):
+                insort(self._keys, (token, suggestion))
+
+    def _discard(self, suggestion):
+        count = self._refs.pop(suggestion, 0) - 1
+        if count > 0:
+            self._refs[suggestion] = count
+            return
+        for token in self._tokens(suggestion[1]):
+            i = bisect_left(self._keys, (token, suggestion))
+            if i < len(self._keys) and self._keys[i] == (token, suggestion):
+                del self._keys[i]
+
+    def update(self, source, suggestions):
+        """Replace the suggestions contributed by source, e.g. ('concert', page id)"""
+        suggestions = [s for s in suggestions if s[1]]
+        with self._lock:
+            for suggestion in self._sources.pop(source, []):
+                self._discard(suggestion)
+            for suggestion in suggestions:
+                self._add(suggestion)
+            if suggestions:
+                self._sources[source] = suggestions
+
+    @classmethod
+    def build(cls, sources):
+        """Build an index from (source, suggestions) pairs with a single sort"""
+        index = cls()
+        for source, suggestions in sources:
+            suggestions = [s for s in suggestions if s[1]]
+            for suggestion in suggestions:
+                count = index._refs.get(suggestion, 0)
+                index._refs[suggestion] = count + 1
+                if not count:
+                    index._keys.extend((t, suggestion) for t in cls._tokens(suggestion[1]))
+            if suggestions:
+                index._sources[source] = suggestions
+        index._keys.sort()
+        return index
+
+    def remove(self, source):
+        self.update(source, [])
+
+    def lookup(self, prefix, limit=10):
+        prefix = normalize(prefix)
+        if not prefix:
+            return []
+        keys = self._keys
+        results = []
+        seen = set()
+        i = bisect_left(keys, (prefix,))
+        while i < len(keys) and len(results) < limit:
+            token, suggestion = keys[i]
+            if not token.startswith(prefix):
+                break
+            if suggestion not in seen:
+                seen.add(suggestion)
+                results.append(suggestion)
+            i += 1
+        return results
+
+
+def concert_suggestions(title, slug, artist):
+    return [("concert", title, slug), ("artist", artist, None)]
+
+
+def venue_suggestions(name, slug):
+    return [("venue", name, slug)]
+
+
+_index = None
+_index_lock = threading.Lock()
+
+
+def get_index():
+    """The process-wide index, built from live pages on first use"""
+    global _index
+    if _index is None:
+        with _index_lock:
+            if _index is None:
+                concerts = ConcertPage.objects.live().values_list("pk", "title", "slug", "artist")
+                venues = VenuePage.objects.live().values_list("pk", "name", "slug")
+                _index = PrefixIndex.build(
+                    [(("concert", pk), concert_suggestions(title, slug, artist))
+                     for pk, title, slug, artist in concerts]
+                    + [(("venue", pk), venue_suggestions(name, slug))
+                       for pk, name, slug in venues]
+                )
+    return _index
+
+
+def index_page(page):
+    """Refresh a published page's suggestions, if the index has been built"""
+    if _index is None:
+        return
+    if isinstance(page, ConcertPage):
+        _index.update(("concert", page.pk), concert_suggestions(page.title, page.slug, page.artist))
+    elif isinstance(page, VenuePage):
+        _index.update(("venue", page.pk), venue_suggestions(page.name, page.slug))
+
+
+def unindex_page(page):
+    if _index is None:
+        return
+    if isinstance(page, ConcertPage):
+        _index.remove(("concert", page.pk))
+    elif isinstance(page, VenuePage):
+        _index.remove(("venue", page.pk))
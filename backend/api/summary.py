@@ -0,0 +1,85 @@
+from django.db import transaction
+from django.db.models import Prefetch
+from django.utils import timezone
+
+from .images import image_renditions, prefetch_renditions
+from .models import ConcertPage, ConcertSummary, TicketType, prefetch_availability
+
+SUMMARY_FIELDS = [
+    "slug", "title", "date", "start_time", "end_time", "artist", "description",
+    "genre", "venue_name", "venue_slug", "image_url", "thumbnail_url",
+    "image_renditions", "min_price", "sold_out", "updated_at",
+]
+
+
+def _summarize(concert, now):
+    ticket_types = concert.ticket_types.all()
+    renditions = image_renditions(concert.image)
+    thumbnail = (renditions or {}).get("thumbnail", {}).get("jpeg")
+    return ConcertSummary(
+        concert=concert,
+        slug=concert.slug,
+        title=concert.title,
+        date=concert.date,
+        start_time=concert.start_time,
+        end_time=concert.end_time,
+        artist=concert.artist,
+        description=concert.description or "",
+        genre=concert.genre or "",
+        venue_name=concert.venue.name,
+        venue_slug=concert.venue.slug,
+        image_url=concert.image.file.url if concert.image else None,
+        thumbnail_url=thumbnail["url"] if thumbnail else None,
+        image_renditions=renditions,
+        min_price=min((tt.price for tt in ticket_types), default=None),
+        # Same rule as ConcertPage.sold_out
+        sold_out=all(tt.is_sold_out for tt in ticket_types),
+        # auto_now is not applied to the conflict update of an upsert
+        updated_at=now,
+    )
+
+
+def refresh_concert_summaries(concert_ids):
+    """
+    Recompute the summary rows for the given concerts in one batch: upsert
+    live concerts and drop rows for concerts that are no longer live.
+    Runs in the caller's transaction (or its own) so readers never see a
+    half-applied change.
+    """
+    concert_ids = list(concert_ids)
+    if not concert_ids:
+        return
+    with transaction.atomic():
+        concerts = list(
+            ConcertPage.objects.live()
+            .filter(pk__in=concert_ids)
+            .select_related("venue", "image")
+            .prefetch_related(
+                Prefetch("ticket_types", queryset=TicketType.objects.select_related("seat_zone")),
+                prefetch_renditions(),
+            )
+        )
+        prefetch_availability([tt for c in concerts for tt in c.ticket_types.all()])
+
+        now = timezone.now()
+        ConcertSummary.objects.filter(concert_id__in=concert_ids).exclude(
+            concert_id__in=[c.pk for c in concerts]
+        ).delete()
+        ConcertSummary.objects.bulk_create(
+            [_summarize(c, now) for c in concerts],
+            update_conflicts=True,
+            unique_fields=["concert"],
+            update_fields=SUMMARY_FIELDS,
+        )
+
+
+def rebuild_concert_summaries(batch_size=500):
+    """Recompute every summary row, batch_size concerts at a time"""
+    with transaction.atomic():
+        ConcertSummary.objects.exclude(
+            concert_id__in=ConcertPage.objects.live().values("pk")
+        ).delete()
+        ids = list(ConcertPage.objects.live().order_by("pk").values_list("pk", flat=True))
+        for start in range(0, len(ids), batch_size):
+            refresh_concert_summaries(ids[start:start + batch_size])
+    return len(ids)
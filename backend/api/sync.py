@@ -0,0 +1,244 @@
+import json
+import logging
+import os
+import threading
+
+from django.conf import settings
+from django.core.serializers.json import DjangoJSONEncoder
+from django.utils.module_loading import import_string
+
+from .images import image_url, prefetch_renditions
+from .models import ConcertPage, SeatZone, TicketType, VenuePage, prefetch_availability
+
+logger = logging.getLogger(__name__)
+
+
+def collect_sheets():
+    """Rows for every synced sheet, keyed by sheet name"""
+    venues_data = []
+    for venue in VenuePage.objects.select_related("image").prefetch_related(
+        prefetch_renditions()
+    ):
+        venues_data.append(
+            [
+                venue.name,
+                venue.address,
+                venue.capacity,
+                venue.admission_mode,
+                image_url(venue.image),
+            ]
+        )
+
+    concerts_data = []
+    for concert in ConcertPage.objects.select_related(
+        "venue", "image"
+    ).prefetch_related(prefetch_renditions()):
+        concerts_data.append(
+            [
+                concert.title,
+                concert.date.isoformat() if concert.date else "",
+                concert.artist,
+                concert.venue.name,
+                concert.start_time.isoformat() if concert.start_time else "",
+                concert.end_time.isoformat() if concert.end_time else "",
+                concert.description or "",
+                concert.genre or "",
+                image_url(concert.image),
+            ]
+        )
+
+    seat_zones_data = []
+    for zone in SeatZone.objects.select_related("venue").all():
+        if zone.row_start and zone.row_end:
+            rows = ord(zone.row_end.upper()) - ord(zone.row_start.upper()) + 1
+            seats_per_row = zone.seat_end - zone.seat_start + 1
+            total = rows * seats_per_row
+        else:
+            total = zone.capacity or 0
+
+        seat_zones_data.append(
+            [
+                zone.venue.name,
+                zone.name,
+                zone.row_start,
+                zone.row_end,
+                zone.seat_start,
+                zone.seat_end,
+                total,
+                "Assigned" if zone.row_start else "General",
+            ]
+        )
+
+    # Prepare ticket types data with explicit conversions
+    ticket_types_data = []
+    ticket_types = prefetch_availability(
+        list(TicketType.objects.select_related("concert", "seat_zone"))
+    )
+    for tt in ticket_types:
+        ticket_types_data.append(
+            [
+                tt.concert.title,
+                tt.type,
+                float(tt.price),
+                tt.seat_zone.name if tt.seat_zone else "",
+                (
+                    tt.seat_zone.total_seats
+                    if tt.type == "assigned"
+                    else tt.ga_capacity
+                ),
+                tt.ga_capacity or 0,
+                tt.sold,
+                tt.remaining,
+                tt.is_sold_out,
+            ]
+        )
+
+    # Define sheets structure with properly formatted data
+    return {
+        "Venues": {
+            "headers": [
+                "Name",
+                "Address",
+                "Capacity",
+                "Admission Mode",
+                "Image URL",
+            ],
+            "data": venues_data,
+        },
+        "SeatZones": {
+            "headers": [
+                "Venue Name",
+                "Zone Name",
+                "Row Start",
+                "Row End",
+                "Seat Start",
+                "Seat End",
+                "Total Seats",
+                "Zone Type",
+            ],
+            "data": seat_zones_data,
+        },
+        "Concerts": {
+            "headers": [
+                "Name",
+                "Date",
+                "Artist",
+                "Venue Name",
+                "Start Time",
+                "End Time",
+                "Description",
+                "Genre",
+                "Image URL",
+            ],
+            "data": concerts_data,
+        },
+        "TicketTypes": {
+            "headers": [
+                "Concert Name",
+                "Type",
+                "Price",
+                "Seat Zone",
+                "Available",
+                "Capacity",
+                "Sold",
+                "Remaining",
+                "Is Sold Out",
+            ],
+            "data": ticket_types_data,
+        },
+    }
+
+
+class NullSyncBackend:
+    """Sync turned off, e.g. for local development, tests and load tests"""
+
+    def push(self, sheets):
+        pass
+
+
+class LocalFileSyncBackend:
+    """Write the sheets to a JSON file (API_SYNC_LOCAL_PATH) instead of Google Sheets"""
+
+    def __init__(self, path=None):
+        self.path = path or getattr(settings, "API_SYNC_LOCAL_PATH", "sheets.json")
+
+    def push(self, sheets):
+        tmp_path = f"{self.path}.tmp"
+        with open(tmp_path, "w") as f:
+            json.dump(sheets, f, cls=DjangoJSONEncoder, indent=2)
+        os.replace(tmp_path, self.path)
+
+
+class SheetsSyncBackend:
+    """
+    Google Sheets. The Google client libraries are imported on the first
+    push rather than at startup, so processes that never sync don't pay for
+    them (see `manage.py bench_startup`).
+    """
+
+    def __init__(self):
+        self._local = threading.local()
+
+    def get_service(self):
+        """
+        This thread's Sheets client. Syncs run on request threads and the
+        ASGI thread pool, and the httplib2 transport underneath a client is
+        not thread-safe, so each thread builds its own.
+        """
+        service = getattr(self._local, "service", None)
+        if service is None:
+            from .config import build_service
+
+            service = self._local.service = build_service()
+        return service
+
+    def push(self, sheets):
+        from .config import SPREADSHEET_ID
+
+        service = self.get_service()
+        for sheet_name, config in sheets.items():
+            clear_range = f"{sheet_name}!A2:Z"
+            service.spreadsheets().values().clear(
+                spreadsheetId=SPREADSHEET_ID, range=clear_range, body={}
+            ).execute()
+
+            if config["data"]:
+                body = {"values": config["data"]}
+                service.spreadsheets().values().append(
+                    spreadsheetId=SPREADSHEET_ID,
+                    range=f"{sheet_name}!A2",
+                    valueInputOption="USER_ENTERED",
+                    body=body,
+                ).execute()
+
+
+BACKENDS = {
+    "sheets": SheetsSyncBackend,
+    "null": NullSyncBackend,
+    "local-file": LocalFileSyncBackend,
+}
+
+_backend = None
+
+
+def get_backend():
+    """The backend named by API_SYNC_BACKEND: sheets, null, local-file or a dotted path"""
+    global _backend
+    if _backend is None:
+        name = getattr(settings, "API_SYNC_BACKEND", "sheets")
+        backend_class = BACKENDS.get(name) or import_string(name)
+        _backend = backend_class()
+    return _backend
+
+
+def sync_all():
+    """Full data sync including all relationships; returns False if it failed"""
+    backend = get_backend()
+    if isinstance(backend, NullSyncBackend):
+        return True
+    try:
+        backend.push(collect_sheets())
+        return True
+    except Exception:
+        logger.exception("Sync failed")
+        return False
@@ -1,3 +1,164 @@
-from django.test import TestCase
+import datetime
+import gzip
+import json
+from unittest import mock
 
-# Create your tests here.
+import msgpack
+from django.core.exceptions import ValidationError
+from django.utils import timezone
+from django.test import RequestFactory, SimpleTestCase, TestCase, override_settings
+from wagtail.models import Page
+
+from .changefeed import changes_since, compact
+from .idempotency import REPLAYED_HEADER
+from .models import ConcertPage, SeatZone, VenuePage, WaitingRoomQueue
+from .revalidation import Revalidator
+from .responses import api_response
+from .revisions import publish
+from .series import series_dates
+
+
+class ZoneListTests(TestCase):
+    def setUp(self):
+        self.venue = Page.get_first_root_node().add_child(instance=VenuePage(
+            title="Test arena", slug="test-arena", name="Test arena", address="-", capacity=100,
+        ))
+
+    def post_zone(self, zone):
+        return self.client.post(
+            f"/api/venues/{self.venue.slug}/zones/", json.dumps(zone), content_type="application/json"
+        )
+
+    def test_create_zone_without_type(self):
+        response = self.post_zone(
+            {"name": "Stalls", "row_start": "A", "row_end": "B", "seat_start": 1, "seat_end": 5}
+        )
+        self.assertEqual(response.status_code, 201, response.content)
+        zone = SeatZone.objects.get(venue=self.venue, slug="stalls")
+        self.assertEqual(zone.type, "assigned")
+        self.assertEqual(zone.seats.count(), 10)
+
+
+class SeriesDatesTests(SimpleTestCase):
+    def test_weekdays_out_of_range(self):
+        with self.assertRaises(ValidationError):
+            series_dates({"rule": {"start": "2025-03-01", "count": 3, "weekdays": [9]}})
+
+    def test_count_beyond_span(self):
+        with self.assertRaises(ValidationError):
+            series_dates({"rule": {"start": "2025-03-01", "count": 300, "every_days": 30}})
+
+    def test_weekly(self):
+        dates = series_dates({"rule": {"start": "2025-03-01", "count": 3, "weekdays": [4]}})
+        self.assertEqual([d.isoformat() for d in dates], ["2025-03-07", "2025-03-14", "2025-03-21"])
+
+
+@override_settings(API_GZIP_MIN_BYTES=0)
+class IdempotencyTests(TestCase):
+    def post_venue(self, **headers):
+        venue = {"name": "Test arena", "address": "-", "capacity": 100}
+        return self.client.post(
+            "/api/venues/", json.dumps(venue), content_type="application/json",
+            headers={"Idempotency-Key": "create-test-arena", **headers},
+        )
+
+    def test_replay_is_negotiated_again(self):
+        first = self.post_venue(accept_encoding="gzip")
+        self.assertEqual(first.status_code, 201, first.content)
+        self.assertEqual(first["Content-Encoding"], "gzip")
+
+        replay = self.post_venue(accept="application/msgpack")
+        self.assertEqual(replay[REPLAYED_HEADER], "true")
+        self.assertEqual(replay.status_code, 201)
+        self.assertEqual(replay["Content-Type"], "application/msgpack")
+        self.assertFalse(replay.has_header("Content-Encoding"))
+        self.assertIn("Accept-Encoding", replay["Vary"])
+        self.assertEqual(msgpack.unpackb(replay.content), json.loads(gzip.decompress(first.content)))
+
+    def test_keys_are_scoped_per_client(self):
+        self.post_venue(authorization="Bearer first")
+        other = self.post_venue(authorization="Bearer second")
+        self.assertFalse(other.has_header(REPLAYED_HEADER))
+
+
+@override_settings(REVALIDATION_WEBHOOK_URL="http://frontend.invalid/api/revalidate")
+class RevalidationTests(TestCase):
+    def setUp(self):
+        venue = Page.get_first_root_node().add_child(instance=VenuePage(
+            title="Test arena", slug="test-arena", name="Test arena", address="-", capacity=100,
+        ))
+        self.concert = venue.add_child(instance=ConcertPage(
+            title="Test concert", slug="test-concert", venue=venue, artist="Test",
+            date=datetime.date(2025, 3, 1), start_time=datetime.time(20), end_time=datetime.time(22),
+        ))
+
+    def test_renamed_concert_revalidates_old_path(self):
+        self.concert.slug = "renamed-concert"
+        with mock.patch.object(Revalidator, "add") as add:
+            with self.captureOnCommitCallbacks(execute=True):
+                publish(self.concert)
+        revalidated = {slug for call in add.call_args_list for slug in call.args[0]}
+        self.assertTrue({"test-concert", "renamed-concert"} <= revalidated, revalidated)
+
+
+@override_settings(WAITING_ROOM_RATE=10)
+class ConcertQueueTests(TestCase):
+    def test_unknown_concert(self):
+        response = self.client.post("/api/concerts/no-such-concert/queue/")
+        self.assertEqual(response.status_code, 404)
+        self.assertFalse(WaitingRoomQueue.objects.exists())
+
+
+@override_settings(API_GZIP_MIN_BYTES=0)
+class NegotiationTests(SimpleTestCase):
+    def respond(self, **headers):
+        return api_response(RequestFactory().get("/api/concerts/", headers=headers), {"concerts": []})
+
+    def test_refused_gzip(self):
+        self.assertFalse(self.respond(accept_encoding="gzip;q=0, identity").has_header("Content-Encoding"))
+        self.assertFalse(self.respond(accept_encoding="*;q=0").has_header("Content-Encoding"))
+        self.assertEqual(self.respond(accept_encoding="br, GZIP;q=0.5")["Content-Encoding"], "gzip")
+
+    def test_msgpack_by_quality(self):
+        cases = {
+            "application/msgpack": "application/msgpack",
+            "application/msgpack, */*": "application/msgpack",
+            "application/json, application/msgpack;q=0.5": "application/json",
+            "application/msgpack;q=0, application/json": "application/json",
+            "application/x-msgpack;q=0.9, application/*;q=0.8": "application/msgpack",
+            "*/*": "application/json",
+        }
+        for accept, content_type in cases.items():
+            with self.subTest(accept=accept):
+                self.assertEqual(self.respond(accept=accept)["Content-Type"], content_type)
+
+
+@override_settings(CHANGE_FEED_LAG=0)
+class ChangeFeedTests(TestCase):
+    def setUp(self):
+        self.venue = Page.get_first_root_node().add_child(instance=VenuePage(
+            title="Test arena", slug="test-arena", name="Test arena", address="-", capacity=100,
+        ))
+        publish(self.venue)
+        concert = self.venue.add_child(instance=ConcertPage(
+            title="Test concert", slug="test-concert", venue=self.venue, artist="Test",
+            date=datetime.date(2025, 3, 1), start_time=datetime.time(20), end_time=datetime.time(22),
+        ))
+        publish(concert)
+
+    def feed(self):
+        changes, _, _ = changes_since(None, 1000)
+        return {(change["type"], change["id"]): change for change in changes}
+
+    def test_renamed_venue_moves_its_concerts(self):
+        self.venue.slug = "renamed-arena"
+        publish(self.venue)
+        concerts = [change for change in self.feed().values() if change["type"] == "concert"]
+        self.assertEqual([change["parent"] for change in concerts], ["renamed-arena"])
+
+    def test_compaction_keeps_the_feed(self):
+        self.venue.name = "Renamed arena"
+        publish(self.venue)
+        before = self.feed()
+        self.assertGreater(compact(timezone.now() + datetime.timedelta(seconds=1)), 0)
+        self.assertEqual(self.feed(), before)
@@ -0,0 +1,92 @@
+import treebeard
+from django.db import transaction
+from django.db.models import F
+from django.utils import timezone
+from wagtail.models import Page
+
+# bulk_add_children builds paths and inserts rows with treebeard and Django
+# internals. They are only used with the treebeard releases below; with any
+# other the pages are added one at a time with the public Page.add_child.
+TREEBEARD_VERSIONS = ("4.5", "4.6", "4.7")
+
+
+def _internals_available():
+    return (
+        treebeard.__version__.startswith(TREEBEARD_VERSIONS)
+        and hasattr(Page, "_str2int")
+        and hasattr(Page, "_get_path")
+        and hasattr(Page.objects.none(), "_batched_insert")
+    )
+
+
+def _next_step(last_child):
+    """The path step after the parent's last child"""
+    return Page._str2int(last_child.path[-Page.steplen:]) + 1 if last_child else 1
+
+
+def _path(parent, depth, step):
+    return Page._get_path(parent.path, depth, step)
+
+
+def _insert_specific_rows(model, pages, batch_size):
+    """Insert the specific model's own table rows of pages whose Page rows exist"""
+    model._base_manager.all()._batched_insert(pages, model._meta.local_concrete_fields, batch_size)
+
+
+def bulk_add_children(parent, pages, batch_size=500):
+    """
+    Insert unsaved pages as the last children of parent in a single batch.
+
+    Page.add_child saves one page at a time and bumps the parent's numchild
+    on every call. Here every treebeard path is computed up front, the Page
+    rows and the specific rows go in with one bulk insert each, and numchild
+    is updated once. No signals are sent and slugs are not validated, so
+    callers handle uniqueness, revisions and search indexing themselves.
+
+    With an untested treebeard release it falls back to add_child, which
+    also saves the pages' in-memory child relations.
+    """
+    if not pages:
+        return []
+    if not _internals_available():
+        with transaction.atomic():
+            now = timezone.now()
+            for page in pages:
+                if page.live:
+                    page.first_published_at = page.first_published_at or now
+                    page.last_published_at = now
+                parent.add_child(instance=page)
+        return pages
+
+    model = type(pages[0])
+    page_fields = Page._meta.concrete_fields
+
+    with transaction.atomic():
+        parent = Page.objects.select_for_update().get(pk=parent.pk)
+        first_step = _next_step(parent.get_last_child())
+        depth = parent.depth + 1
+        now = timezone.now()
+
+        base_rows = []
+        for offset, page in enumerate(pages):
+            page.depth = depth
+            page.path = _path(parent, depth, first_step + offset)
+            page.url_path = f"{parent.url_path}{page.slug}/"
+            page.draft_title = page.title
+            page.locale_id = parent.locale_id
+            if page.live:
+                page.first_published_at = page.first_published_at or now
+                page.last_published_at = now
+            base_rows.append(
+                Page(**{f.attname: getattr(page, f.attname) for f in page_fields})
+            )
+
+        Page.objects.bulk_create(base_rows, batch_size=batch_size)
+        for page, row in zip(pages, base_rows):
+            page.pk = page.id = row.pk
+            page._state.adding = False
+        _insert_specific_rows(model, pages, batch_size)
+
+        Page.objects.filter(pk=parent.pk).update(numchild=F("numchild") + len(pages))
+
+    return pages
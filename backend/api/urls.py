@@ -2,17 +2,29 @@ from django.urls import path
 from . import views
 
 urlpatterns = [
+    # Typeahead is hit on every keystroke, so avoid the APPEND_SLASH redirect
+    path("suggest", views.suggest),
+    path("suggest/", views.suggest, name="suggest"),
+    path("changes/", views.change_feed, name="change_feed"),
     path("concerts/", views.concert_list, name="concert_list"),
+    path("concerts/<slug:concert_slug>/queue/", views.concert_queue, name="concert_queue"),
     path("concerts/<slug:concert_slug>/", views.concert_detail_by_slug, name="concert_detail_by_slug"),
+    path("exports/<slug:name>.csv", views.export_csv, name="export_csv"),
+    path("provisioning-jobs/<int:job_id>/", views.provisioning_job, name="provisioning_job"),
     path("venues/", views.venue_list_create, name="venue_list_create"),
     path("venues/<slug:venue_slug>/", views.venue_detail, name="venue_detail"),
     path("venues/<slug:venue_slug>/zones/", views.zone_list, name="zone_list"),
     
     path("venues/<slug:venue_slug>/concerts/", views.concert_list_create, name="concert_list_create"),
+    path("venues/<slug:venue_slug>/concerts/series/", views.concert_series_create, name="concert_series_create"),
     path("venues/<slug:venue_slug>/concerts/<slug:concert_slug>/", views.concert_detail, name="concert_detail"),
     
     path("venues/<slug:venue_slug>/concerts/<slug:concert_slug>/reserve-seats/", 
          views.reserve_seats, name="reserve_seats"),
+    path("venues/<slug:venue_slug>/concerts/<slug:concert_slug>/best-available/",
+         views.best_available, name="best_available"),
+    path("venues/<slug:venue_slug>/concerts/<slug:concert_slug>/sales/",
+         views.concert_sales, name="concert_sales"),
     path("venues/<slug:venue_slug>/concerts/<slug:concert_slug>/availability/", 
          views.get_concert_availability, name="concert_availability"),
     
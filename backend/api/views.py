@@ -1,176 +1,57 @@
 import json
-from django.http import JsonResponse
+import time
+from django.conf import settings
 from django.views.decorators.csrf import csrf_exempt
 from django.core.exceptions import ValidationError
 from django.shortcuts import get_object_or_404
 from wagtail.models import Page
-from .models import VenuePage, ConcertPage, TicketType, SoldSeat, SeatZone, Seat
+from .models import (
+    VenuePage,
+    ConcertPage,
+    ConcertSummary,
+    SalesCounter,
+    TicketType,
+    SoldSeat,
+    SeatZone,
+    ZoneProvisioningJob,
+    prefetch_availability,
+)
+from django.db import transaction
+from django.core.handlers.asgi import ASGIRequest
+from django.http import Http404, StreamingHttpResponse
 from django.db.models.deletion import ProtectedError
+from django.utils.http import urlencode
 from django.utils.text import slugify
-from .config import build_service, SPREADSHEET_ID
-import json
+from .responses import api_response
+from .changefeed import changes_since, record_changes
+from .dirty import assign
+from .executor import run_blocking
+from .exports import EXPORTS, acsv_chunks, csv_chunks
+from .idempotency import idempotent
+from .images import image_renditions
+from .layout import get_layout
+from .provisioning import provision_zones, resume
+from .revisions import publish
+from .routing import REPLICA_ALIAS, read_replica, replica_enabled
+from .sales import daily_sales, projected_through, record_sales
+from .seating import MAX_QUANTITY, find_best_available, reserve_best_available
+from .series import create_series, series_dates
+from .signals import inventory_changed
+from .suggest import get_index
+from .sync import sync_all
+from . import waiting_room
+from .waiting_room import require_admission
 
 def sync_to_google_sheets():
-    """
-    Full data sync with Google Sheets including all relationships
-    """
-    try:
-        service = build_service()
-        spreadsheet_id = SPREADSHEET_ID
-
-        venues_data = []
-        for venue in VenuePage.objects.all():
-            image_url = venue.image.file.url if venue.image else None
-            venues_data.append(
-                [
-                    venue.name,
-                    venue.address,
-                    venue.capacity,
-                    venue.admission_mode,
-                    image_url,
-                ]
-            )
-
-        concerts_data = []
-        for concert in ConcertPage.objects.all():
-            image_url = concert.image.file.url if concert.image else None
-            concerts_data.append(
-                [
-                    concert.title,
-                    concert.date.isoformat() if concert.date else "",
-                    concert.artist,
-                    concert.venue.name,
-                    concert.start_time.isoformat() if concert.start_time else "",
-                    concert.end_time.isoformat() if concert.end_time else "",
-                    concert.description or "",
-                    concert.genre or "",
-                    image_url,
-                ]
-            )
-
-        seat_zones_data = []
-        for zone in SeatZone.objects.select_related("venue").all():
-            if zone.row_start and zone.row_end:
-                rows = ord(zone.row_end.upper()) - ord(zone.row_start.upper()) + 1
-                seats_per_row = zone.seat_end - zone.seat_start + 1
-                total = rows * seats_per_row
-            else:
-                total = zone.capacity or 0
-
-            seat_zones_data.append(
-                [
-                    zone.venue.name,
-                    zone.name,
-                    zone.row_start,
-                    zone.row_end,
-                    zone.seat_start,
-                    zone.seat_end,
-                    total,
-                    "Assigned" if zone.row_start else "General",
-                ]
-            )
-
-        # Prepare ticket types data with explicit conversions
-        ticket_types_data = []
-        for tt in TicketType.objects.select_related("seat_zone").all():
-            ticket_types_data.append(
-                [
-                    tt.concert.title,
-                    tt.type,
-                    float(tt.price), 
-                    tt.seat_zone.name if tt.seat_zone else "",
-                    (
-                        tt.seat_zone.total_seats
-                        if tt.type == "assigned"
-                        else tt.ga_capacity
-                    ),
-                    tt.ga_capacity or 0,
-                    tt.sold,
-                    tt.remaining,
-                    tt.is_sold_out,
-                ]
-            )
-
-        # Define sheets structure with properly formatted data
-        sheets_config = {
-            "Venues": {
-                "headers": [
-                    "Name",
-                    "Address",
-                    "Capacity",
-                    "Admission Mode",
-                    "Image URL",
-                ],
-                "data": venues_data,
-            },
-            "SeatZones": {
-                "headers": [
-                    "Venue Name",
-                    "Zone Name",
-                    "Row Start",
-                    "Row End",
-                    "Seat Start",
-                    "Seat End",
-                    "Total Seats",
-                    "Zone Type",
-                ],
-                "data": seat_zones_data,
-            },
-            "Concerts": {
-                "headers": [
-                    "Name",
-                    "Date",
-                    "Artist",
-                    "Venue Name",
-                    "Start Time",
-                    "End Time",
-                    "Description",
-                    "Genre",
-                    "Image URL",
-                ],
-                "data": concerts_data,
-            },
-            "TicketTypes": {
-                "headers": [
-                    "Concert Name",
-                    "Type",
-                    "Price",
-                    "Seat Zone",
-                    "Available",
-                    "Capacity",
-                    "Sold",
-                    "Remaining",
-                    "Is Sold Out",
-                ],
-                "data": ticket_types_data,
-            },
-        }
-
-        for sheet_name, config in sheets_config.items():
-            clear_range = f"{sheet_name}!A2:Z"
-            service.spreadsheets().values().clear(
-                spreadsheetId=spreadsheet_id, range=clear_range, body={}
-            ).execute()
-
-            if config["data"]:
-                body = {"values": config["data"]}
-                service.spreadsheets().values().append(
-                    spreadsheetId=spreadsheet_id,
-                    range=f"{sheet_name}!A2",
-                    valueInputOption="USER_ENTERED",
-                    body=body,
-                ).execute()
-
-        return True
-    except Exception as e:
-        print(f"Sync failed: {str(e)}")
-        return False
+    """Push all data to the configured sync backend (API_SYNC_BACKEND)"""
+    return sync_all()
 
 
 # Helper functions
 def add_hateoas_links(obj, links):
-    """Add HATEOAS links to API responses"""
-    return {**obj, "_links": links}
+    """Add HATEOAS links to API responses (in place, obj is always a fresh dict)"""
+    obj["_links"] = links
+    return obj
 
 
 def validate_seat_zone(zone_data, index, admission_mode):
@@ -240,6 +121,118 @@ def validate_seat_zone(zone_data, index, admission_mode):
         raise ValidationError(f"Invalid number format in zone {index+1}")
 
 
+ZONE_FIELDS = ["name", "row_start", "row_end", "seat_start", "seat_end", "capacity", "type"]
+
+
+def reconcile_seat_zones(venue, zones_data):
+    """
+    Make a venue's seat zones match zones_data with bulk operations: zones
+    are matched by slug in memory, new ones created, changed ones updated,
+    missing ones deleted unless ticket types still use them, and only the
+    seats of zones whose layout changed are provisioned. Returns what
+    changed, e.g. ["seat_zones.vip-zone.row_end", "seat_zones.balcony"], and
+    the provisioning jobs queued for large zones.
+    """
+    existing = {zone.slug: zone for zone in SeatZone.objects.filter(venue=venue)}
+
+    wanted = {}
+    for index, zone_data in enumerate(zones_data):
+        validated = validate_seat_zone(zone_data, index, zone_data.get("type"))
+        slug = zone_data.get("slug") or slugify(zone_data["name"])
+        wanted[slug] = {"name": zone_data.get("name"), **validated}
+
+    changed = []
+    created = []
+    updated = []
+    relaid = []
+    for slug, values in wanted.items():
+        zone = existing.get(slug)
+        if zone is None:
+            created.append(SeatZone(venue=venue, slug=slug, **values))
+            changed.append(f"seat_zones.{slug}")
+            continue
+        values["name"] = values["name"] or zone.name
+        zone_changes = assign(zone, values, prefix=f"seat_zones.{slug}.")
+        if zone_changes:
+            updated.append(zone)
+            changed += zone_changes
+        if {c.rsplit(".", 1)[1] for c in zone_changes} - {"name", "capacity"}:
+            relaid.append(zone)
+
+    removed = [zone for slug, zone in existing.items() if slug not in wanted]
+    in_use = set(
+        TicketType.objects.filter(seat_zone__in=removed).values_list("seat_zone_id", flat=True)
+    )
+    deleted = [zone for zone in removed if zone.pk not in in_use]
+    changed += [f"seat_zones.{zone.slug}" for zone in deleted]
+
+    if deleted:
+        SeatZone.objects.filter(pk__in=[zone.pk for zone in deleted]).delete()
+    if created:
+        SeatZone.objects.bulk_create(created)
+        record_changes("zone", created, "created")
+    if updated:
+        SeatZone.objects.bulk_update(updated, ZONE_FIELDS)
+        record_changes("zone", updated, "updated")
+    jobs = provision_zones(created + relaid)
+    return changed, jobs
+
+
+def reconcile_ticket_types(concert, ticket_types_data):
+    """
+    Make a concert's ticket types match ticket_types_data, saving only the
+    ones that changed. Zones are looked up with one query. Returns what
+    changed, e.g. ["ticket_types.vip.price"].
+    """
+    existing = {tt.slug: tt for tt in concert.ticket_types.all()}
+    zone_slugs = {tt_data["seat_zone_slug"] for tt_data in ticket_types_data}
+    zones = {
+        zone.slug: zone
+        for zone in SeatZone.objects.filter(venue=concert.venue, slug__in=zone_slugs)
+    }
+
+    changed = []
+    seen_slugs = set()
+    for tt_data in ticket_types_data:
+        slug = tt_data.get("slug") or slugify(
+            f"{concert.slug}-{tt_data['type']}-{len(seen_slugs)}"
+        )
+        seen_slugs.add(slug)
+
+        seat_zone = zones.get(tt_data["seat_zone_slug"])
+        if seat_zone is None:
+            raise ValidationError(f"Unknown seat zone {tt_data['seat_zone_slug']}")
+        values = {
+            "type": tt_data["type"],
+            "price": tt_data["price"],
+            "seat_zone": seat_zone.pk,
+            "ga_capacity": tt_data.get("ga_capacity"),
+        }
+
+        tt = existing.get(slug)
+        if tt is None:
+            tt = TicketType(concert=concert, slug=slug)
+            assign(tt, values)
+            tt.save()
+            changed.append(f"ticket_types.{slug}")
+            continue
+        tt_changes = assign(tt, values, prefix=f"ticket_types.{slug}.")
+        if tt_changes:
+            fields = [c.rsplit(".", 1)[1] for c in tt_changes]
+            if "price" in fields:
+                # A price set by hand is what dynamic pricing starts from next
+                tt.base_price = None
+                fields.append("base_price")
+            tt.save(update_fields=fields)
+            changed += tt_changes
+
+    removed = existing.keys() - seen_slugs
+    if removed:
+        TicketType.objects.filter(concert=concert, slug__in=removed).delete()
+        changed += [f"ticket_types.{slug}" for slug in sorted(removed)]
+    return changed
+
+
 # Helper validators
 def _validate_row(zone_data, index):
     """Validate row format for assigned seating"""
@@ -285,6 +278,7 @@ def _validate_ga_fields(zone_data, index):
 
 # Venue Endpoints
 @csrf_exempt
+@idempotent
 def venue_list_create(request):
     if request.method == "GET":
         venues = []
@@ -303,7 +297,7 @@ def venue_list_create(request):
                     "zones": f"/api/venues/{venue.slug}/zones/"
                 }
             ))
-        return JsonResponse(venues, safe=False)
+        return api_response(request, venues)
     elif request.method == "POST":
         try:
             data = json.loads(request.body)
@@ -318,7 +312,7 @@ def venue_list_create(request):
                 capacity=data["capacity"],
             )
             parent.add_child(instance=venue)
-            venue.save_revision().publish()
+            publish(venue)
 
             # Create seat zones
             seat_zones = []
@@ -347,27 +341,34 @@ def venue_list_create(request):
 
             # Bulk create after venue exists in DB
             SeatZone.objects.bulk_create(seat_zones)
+            record_changes("zone", seat_zones, "created")
+            jobs = provision_zones(seat_zones)
             sync_to_google_sheets()
-            return JsonResponse(
+            data = {
+                "slug": venue.slug,
+                "message": f"Venue {venue.title} created",
+                "zones": [z.slug for z in seat_zones],
+            }
+            if jobs:
+                data["provisioning"] = [job_data(job) for job in jobs]
+            return api_response(
+                request,
                 add_hateoas_links(
-                    {
-                        "slug": venue.slug,
-                        "message": f"Venue {venue.title} created",
-                        "zones": [z.slug for z in seat_zones],
-                    },
+                    data,
                     {
                         "self": f"/api/venues/{venue.slug}/",
                         "concerts": f"/api/venues/{venue.slug}/concerts/",
                         "zones": f"/api/venues/{venue.slug}/zones/",
                     },
                 ),
-                status=201,
+                # The venue exists, but some of its seats do not yet
+                status=202 if jobs else 201,
             )
 
         except Exception as e:
-            return JsonResponse({"error": str(e)}, status=400)
+            return api_response(request, {"error": str(e)}, status=400)
 
-    return JsonResponse({"error": "Method not allowed"}, status=405)
+    return api_response(request, {"error": "Method not allowed"}, status=405)
 
 
 @csrf_exempt
@@ -400,7 +401,8 @@ def venue_detail(request, venue_slug):
                 for z in venue.seat_zones.all()
             ],
         }
-        return JsonResponse(
+        return api_response(
+            request,
             add_hateoas_links(
                 data,
                 {
@@ -411,55 +413,48 @@ def venue_detail(request, venue_slug):
         )
 
     elif request.method in ["PUT", "PATCH"]:
-        from django.db import transaction
-
         try:
             with transaction.atomic():
                 data = json.loads(request.body)
-                venue.title = data.get("name", venue.title)
-                venue.address = data.get("address", venue.address)
-                venue.capacity = data.get("capacity", venue.capacity)
-                venue.admission_mode = data.get("admission_mode", venue.admission_mode)
+                fields = {"name": "title", "address": "address", "capacity": "capacity",
+                          "admission_mode": "admission_mode"}
+                changed = assign(
+                    venue, {field: data[key] for key, field in fields.items() if key in data}
+                )
 
+                jobs = []
                 if "seat_zones" in data:
-                    seen_slugs = set()
+                    zone_changes, jobs = reconcile_seat_zones(venue, data["seat_zones"])
+                    changed += zone_changes
 
-                    for zone_data in data["seat_zones"]:
-                        validated = validate_seat_zone(
-                            zone_data, 0, zone_data.get("type")
-                        )
-                        slug = zone_data.get("slug") or slugify(zone_data["name"])
-                        seen_slugs.add(slug)
+                if changed:
+                    publish(venue)
+                    sync_to_google_sheets()
 
-                        zone, created = SeatZone.objects.update_or_create(
-                            venue=venue, slug=slug, defaults={**validated}
-                        )
-                    for zone in venue.seat_zones.exclude(slug__in=seen_slugs):
-                        if not TicketType.objects.filter(seat_zone=zone).exists():
-                            zone.delete()
-
-                revision = venue.save_revision()
-                revision.publish()
-                sync_to_google_sheets()
-
-                return JsonResponse(add_hateoas_links(
-                    {"message": "Venue updated successfully"},
+                result = {
+                    "message": "Venue updated successfully" if changed else "No changes",
+                    "changed_fields": changed,
+                }
+                if jobs:
+                    result["provisioning"] = [job_data(job) for job in jobs]
+                return api_response(request, add_hateoas_links(
+                    result,
                     {
                         "self": f"/api/venues/{venue.slug}/",
                         "concerts": f"/api/venues/{venue.slug}/concerts/",
                         "zones": f"/api/venues/{venue.slug}/zones/"
                     }
-                ))
+                ), status=202 if jobs else 200)
 
         except Exception as e:
             print(e)
-            return JsonResponse({"error": str(e)}, status=400)
+            return api_response(request, {"error": str(e)}, status=400)
 
     elif request.method == "DELETE":
         try:
             venue.delete()
             sync_to_google_sheets()
-            return JsonResponse(add_hateoas_links(
+            return api_response(request, add_hateoas_links(
             {"message": f"Venue {venue.title} deleted"},
                 {
                     "all_venues": "/api/venues/",
@@ -467,7 +462,8 @@ def venue_detail(request, venue_slug):
                 }
             ))
         except ProtectedError:
-            return JsonResponse(
+            return api_response(
+                request,
                 {
                     "error": "Cannot delete venue with existing concerts",
                     "solution": "Delete all associated concerts first",
@@ -475,20 +471,23 @@ def venue_detail(request, venue_slug):
                 status=409,
             )
         except Exception as e:
-            return JsonResponse({"error": str(e)}, status=400)
+            return api_response(request, {"error": str(e)}, status=400)
 
-    return JsonResponse({"error": "Method not allowed"}, status=405)
+    return api_response(request, {"error": "Method not allowed"}, status=405)
 
 
 # Concert Endpoints
 @csrf_exempt
+@idempotent
 def concert_list_create(request, venue_slug):
     """Handle concert creation and listing under a venue"""
     venue = get_object_or_404(VenuePage, slug=venue_slug)
 
     if request.method == "GET":
         concerts = []
-        for concert in venue.concerts.live().all():
+        for concert in ConcertSummary.objects.filter(venue_slug=venue_slug).order_by(
+            "date", "start_time"
+        ):
             concerts.append(add_hateoas_links(
                 {
                     "slug": concert.slug,
@@ -502,7 +501,7 @@ def concert_list_create(request, venue_slug):
                     "reservations": f"/api/venues/{venue_slug}/concerts/{concert.slug}/reserve-seats/"
                 }
             ))
-        return JsonResponse(concerts, safe=False)
+        return api_response(request, concerts)
 
     elif request.method == "POST":
         try:
@@ -542,9 +541,10 @@ def concert_list_create(request, venue_slug):
 
             venue.add_child(instance=concert)
             TicketType.objects.bulk_create(ticket_types)
-            concert.save_revision().publish()
+            publish(concert)
             sync_to_google_sheets()
-            return JsonResponse(
+            return api_response(
+                request,
                 add_hateoas_links(
                     {
                         "slug": concert.slug,
@@ -560,56 +560,101 @@ def concert_list_create(request, venue_slug):
             )
 
         except Exception as e:
-            return JsonResponse({"error": str(e)}, status=400)
+            return api_response(request, {"error": str(e)}, status=400)
 
-    return JsonResponse({"error": "Method not allowed"}, status=405)
+    return api_response(request, {"error": "Method not allowed"}, status=405)
 
 
 @csrf_exempt
-def concert_list(request):
+def concert_series_create(request, venue_slug):
+    """Create and publish a series of concerts under a venue from one template"""
+    venue = get_object_or_404(VenuePage, slug=venue_slug)
+
+    if request.method != "POST":
+        return api_response(request, {"error": "Method not allowed"}, status=405)
+
+    try:
+        data = json.loads(request.body)
+        concerts = create_series(venue, data, series_dates(data))
+        sync_to_google_sheets()
+        return api_response(
+            request,
+            add_hateoas_links(
+                {
+                    "message": f"{len(concerts)} concerts created",
+                    "concerts": [
+                        add_hateoas_links(
+                            {"slug": concert.slug, "date": concert.date.isoformat()},
+                            {"self": f"/api/venues/{venue.slug}/concerts/{concert.slug}/"},
+                        )
+                        for concert in concerts
+                    ],
+                },
+                {"venue": f"/api/venues/{venue.slug}/concerts/"},
+            ),
+            status=201,
+        )
+
+    except Exception as e:
+        return api_response(request, {"error": str(e)}, status=400)
+
+
+@read_replica
+async def concert_list(request):
     """List all concerts across all venues"""
     try:
         concerts = []
-        for concert in ConcertPage.objects.select_related("venue").all():
+        async for concert in ConcertSummary.objects.order_by("date", "start_time"):
             concerts.append(
                 {
-                    "id": concert.id,
+                    "id": concert.concert_id,
                     "title": concert.title,
                     "slug": concert.slug,
-                    "date": concert.date.isoformat() if concert.date else "",
+                    "date": concert.date.isoformat(),
                     "artist": concert.artist,
-                    "venue": concert.venue.name,
-                    "start_time": (
-                        concert.start_time.isoformat() if concert.start_time else ""
-                    ),
+                    "venue": concert.venue_name,
+                    "start_time": concert.start_time.isoformat(),
                     "end_time": (
                         concert.end_time.isoformat() if concert.end_time else ""
                     ),
                     "sold_out": concert.sold_out,
-                    "description": concert.description or "",
-                    "genre": concert.genre or "",
-                    "image_url": concert.image.file.url if concert.image else None,
+                    "min_price": concert.min_price,
+                    "description": concert.description,
+                    "genre": concert.genre,
+                    "image_url": concert.image_url,
+                    "thumbnail_url": concert.thumbnail_url,
+                    "image_renditions": concert.image_renditions,
                     "_links": {
-                        "self": f"/api/venues/{concert.venue.slug}/concerts/{concert.slug}/",
-                        "tickets": f"/api/venues/{concert.venue.slug}/concerts/{concert.slug}/availability/",
+                        "self": f"/api/venues/{concert.venue_slug}/concerts/{concert.slug}/",
+                        "tickets": f"/api/venues/{concert.venue_slug}/concerts/{concert.slug}/availability/",
                     },
                 }
             )
-        return JsonResponse(concerts, safe=False)
+        return api_response(request, concerts)
 
     except Exception as e:
-        return JsonResponse({"error": str(e)}, status=500)
+        return api_response(request, {"error": str(e)}, status=500)
 
 
-@csrf_exempt
-def concert_detail_by_slug(request, concert_slug):
+@read_replica
+async def concert_detail_by_slug(request, concert_slug):
     """Get concert details by slug without requiring venue slug"""
-    print(concert_slug)
     try:
-        concert = get_object_or_404(ConcertPage, slug=concert_slug)
+        concert = await ConcertPage.objects.select_related("venue", "image").aget(
+            slug=concert_slug
+        )
+    except ConcertPage.DoesNotExist:
+        return api_response(request, {"error": "Concert not found"}, status=404)
+
+    try:
+        ticket_types = [
+            tt async for tt in concert.ticket_types.select_related("seat_zone")
+        ]
+        await run_blocking(prefetch_availability, ticket_types)
+        renditions = await run_blocking(image_renditions, concert.image)
 
-        ticket_types = []
-        for tt in concert.ticket_types.all():
+        ticket_types_data = []
+        for tt in ticket_types:
             ticket_data = {
                 "type": tt.type,
                 "price": float(tt.price),
@@ -629,7 +674,7 @@ def concert_detail_by_slug(request, concert_slug):
                 }
                 ticket_data["ga_capacity"] = tt.ga_capacity
 
-            ticket_types.append(ticket_data)
+            ticket_types_data.append(ticket_data)
         data = {
             "id": concert.id,
             "title": concert.title,
@@ -640,20 +685,21 @@ def concert_detail_by_slug(request, concert_slug):
             "venue_slug": concert.venue.slug,  # Include venue slug for compatibility
             "start_time": concert.start_time.isoformat() if concert.start_time else "",
             "end_time": concert.end_time.isoformat() if concert.end_time else "",
-            "sold_out": concert.sold_out,
+            "sold_out": all(tt.is_sold_out for tt in ticket_types),
             "description": concert.description or "",
             "genre": concert.genre or "",
             "image_url": concert.image.file.url if concert.image else None,
-            "ticket_types": ticket_types,
+            "image_renditions": renditions,
+            "ticket_types": ticket_types_data,
             "_links": {
                 "venue": f"/api/venues/{concert.venue.slug}/",
                 "self": f"/api/concerts/{concert.slug}/",
             },
         }
-        return JsonResponse(data)
+        return api_response(request, data)
 
     except Exception as e:
-        return JsonResponse({"error": str(e)}, status=500)
+        return api_response(request, {"error": str(e)}, status=500)
 
 
 @csrf_exempt
@@ -685,7 +731,8 @@ def concert_detail(request, venue_slug, concert_slug):
 
             print(ticket_types)
 
-            return JsonResponse(
+            return api_response(
+                request,
                 {
                     "slug": concert.slug,
                     "name": concert.title,
@@ -698,6 +745,7 @@ def concert_detail(request, venue_slug, concert_slug):
                     "description": concert.description,
                     "genre": concert.genre,
                     "ticket_types": ticket_types,
+                    "image_renditions": image_renditions(concert.image),
                     "_links": {
                         "image": concert.image.file.url if concert.image else None
                     },
@@ -705,58 +753,36 @@ def concert_detail(request, venue_slug, concert_slug):
             )
 
         except Exception as e:
-            return JsonResponse({"error": str(e)}, status=500)
+            return api_response(request, {"error": str(e)}, status=500)
 
     elif request.method in ["PUT", "PATCH"]:
         try:
             data = json.loads(request.body)
 
-            concert.title = data.get("name", concert.title)
-            concert.date = data.get("date", concert.date)
-            concert.artist = data.get("artist", concert.artist)
-            concert.start_time = data.get("start_time", concert.start_time)
-            concert.end_time = data.get("end_time", concert.end_time)
-            concert.description = data.get("description", concert.description)
-            concert.genre = data.get("genre", concert.genre)
+            fields = {"name": "title", "date": "date", "artist": "artist",
+                      "start_time": "start_time", "end_time": "end_time",
+                      "description": "description", "genre": "genre"}
+            changed = assign(
+                concert, {field: data[key] for key, field in fields.items() if key in data}
+            )
 
             if "venue" in data and concert.venue.slug != data["venue"]:
                 new_venue = get_object_or_404(VenuePage, slug=data["venue"])
                 concert.move(new_venue, pos="last-child")
+                concert.venue = new_venue
+                changed.append("venue")
 
             if "ticket_types" in data:
-                existing_tickets = {tt.slug: tt for tt in concert.ticket_types.all()}
-                print("existing_tickets:", existing_tickets)
-                seen_slugs = set()
-
-                for tt_data in data["ticket_types"]:
-                    print(tt_data)
-                    slug = tt_data.get("slug") or slugify(
-                        f"{concert.slug}-{tt_data['type']}-{len(seen_slugs)}"
-                    )
-                    seen_slugs.add(slug)
-
-                    seat_zone = get_object_or_404(
-                        SeatZone, slug=tt_data["seat_zone_slug"], venue=concert.venue
-                    )
-
-                    tt, created = TicketType.objects.update_or_create(
-                        concert=concert,
-                        slug=slug,
-                        defaults={
-                            "type": tt_data["type"],
-                            "price": tt_data["price"],
-                            "seat_zone": seat_zone,
-                            "ga_capacity": tt_data.get("ga_capacity"),
-                        },
-                    )
+                changed += reconcile_ticket_types(concert, data["ticket_types"])
 
-                for slug in existing_tickets.keys() - seen_slugs:
-                    TicketType.objects.filter(concert=concert, slug=slug).delete()
-
-            concert.save_revision().publish()
-            sync_to_google_sheets()
-            return JsonResponse(add_hateoas_links(
-                    {"message": "Concert updated successfully"},
+            if changed:
+                publish(concert)
+                sync_to_google_sheets()
+            return api_response(request, add_hateoas_links(
+                    {
+                        "message": "Concert updated successfully" if changed else "No changes",
+                        "changed_fields": changed,
+                    },
                     {
                         "self": f"/api/venues/{venue_slug}/concerts/{concert_slug}/",
                         "availability": f"/api/venues/{venue_slug}/concerts/{concert_slug}/availability/",
@@ -765,13 +791,13 @@ def concert_detail(request, venue_slug, concert_slug):
                 ))
 
         except Exception as e:
-            return JsonResponse({"error": str(e)}, status=400)
+            return api_response(request, {"error": str(e)}, status=400)
 
     elif request.method == "DELETE":
         try:
             concert.delete()
             sync_to_google_sheets()
-            return JsonResponse(add_hateoas_links(
+            return api_response(request, add_hateoas_links(
                 {"message": f"Concert {concert.title} deleted"},
                 {
                     "venue_concerts": f"/api/venues/{venue_slug}/concerts/",
@@ -779,13 +805,15 @@ def concert_detail(request, venue_slug, concert_slug):
                 }
             ))
         except Exception as e:
-            return JsonResponse({"error": str(e)}, status=400)
+            return api_response(request, {"error": str(e)}, status=400)
 
-    return JsonResponse({"error": "Method not allowed"}, status=405)
+    return api_response(request, {"error": "Method not allowed"}, status=405)
 
 
 # Not in use
 @csrf_exempt
+@require_admission
+@idempotent
 def reserve_seats(request, venue_slug, concert_slug):
     """Reserve seats for a concert"""
     concert = get_object_or_404(ConcertPage, slug=concert_slug, venue__slug=venue_slug)
@@ -798,27 +826,35 @@ def reserve_seats(request, venue_slug, concert_slug):
             )
 
             if ticket_type.type != "assigned":
-                return JsonResponse(
-                    {"error": "Ticket type does not support seat selection"}, 400
+                return api_response(
+                    request,
+                    {"error": "Ticket type does not support seat selection"}, status=400
                 )
 
-            seats = list(
-                Seat.objects.filter(
-                    zone__venue=concert.venue, identifier__in=data["seat_ids"]
-                ).distinct()
-            )
+            layout = get_layout(concert.venue_id)
+            seats = layout.seats(data["seat_ids"])
+            if seats is None or len(set(seats)) != len(seats):
+                return api_response(request, {"error": "Invalid seat selection"}, status=400)
+            if not all(layout.on_sale(zone_id) for _, zone_id in seats):
+                return api_response(request, {"error": "Zone is being provisioned"}, status=409)
 
-            if len(seats) != len(data["seat_ids"]):
-                return JsonResponse({"error": "Invalid seat selection"}, 400)
-
-            if SoldSeat.objects.filter(concert=concert, seat__in=seats).exists():
-                return JsonResponse({"error": "Some seats already taken"}, 409)
-
-            SoldSeat.objects.bulk_create(
-                [SoldSeat(concert=concert, seat=seat) for seat in seats]
-            )
+            with transaction.atomic():
+                if SoldSeat.objects.filter(
+                    concert=concert, seat_id__in=[seat_id for seat_id, _ in seats]
+                ).exists():
+                    return api_response(request, {"error": "Some seats already taken"}, status=409)
+
+                SoldSeat.objects.bulk_create(
+                    [
+                        SoldSeat(concert=concert, seat_id=seat_id, zone_id=zone_id)
+                        for seat_id, zone_id in seats
+                    ]
+                )
+                record_sales(concert, "sold", ticket_type, seats=data["seat_ids"])
+                inventory_changed.send(sender=SoldSeat, concert=concert)
             sync_to_google_sheets()
-            return JsonResponse(add_hateoas_links(
+            prefetch_availability([ticket_type])
+            return api_response(request, add_hateoas_links(
                 {
                     "reserved_seats": data["seat_ids"],
                     "remaining": ticket_type.remaining,
@@ -831,17 +867,136 @@ def reserve_seats(request, venue_slug, concert_slug):
             ))
 
         except Exception as e:
-            return JsonResponse({"error": str(e)}, status=400)
+            return api_response(request, {"error": str(e)}, status=400)
+
+    return api_response(request, {"error": "Method not allowed"}, status=405)
 
-    return JsonResponse({"error": "Method not allowed"}, status=405)
+def export_csv(request, name):
+    """
+    Stream an export (venues, zones, concerts, ticket-types or sold-seats)
+    as CSV, from the replica when there is one. Rows are fetched in chunks,
+    so memory use does not grow with the size of the table.
+    """
+    if name not in EXPORTS:
+        return api_response(request, {"error": f"Unknown export '{name}'"}, status=404)
+    using = REPLICA_ALIAS if replica_enabled() else "default"
+    # Under ASGI a sync iterator would be read into memory before sending
+    if isinstance(request, ASGIRequest):
+        chunks = acsv_chunks(name, using)
+    else:
+        chunks = csv_chunks(name, using)
+    response = StreamingHttpResponse(chunks, content_type="text/csv")
+    response["Content-Disposition"] = f'attachment; filename="{name}.csv"'
+    return response
+
+
+def concert_sales(request, venue_slug, concert_slug):
+    """
+    Sales totals for a concert from the sales event log projection, with
+    net tickets sold per day up to the same event. Only reads: the
+    projection is brought up to date by `manage.py replay_sales_events`,
+    and as_of says when that last happened. Never reads the reservation
+    tables.
+    """
+    concert = get_object_or_404(ConcertPage, slug=concert_slug, venue__slug=venue_slug)
+    through, as_of = projected_through()
+    counter = SalesCounter.objects.filter(concert=concert).first() or SalesCounter(concert=concert)
+    capacity = sum(
+        (tt.seat_zone.total_seats if tt.type == "assigned" else tt.ga_capacity) or 0
+        for tt in concert.ticket_types.select_related("seat_zone")
+    )
+    net_sold = counter.sold - counter.released
+    return api_response(request, add_hateoas_links(
+        {
+            "capacity": capacity,
+            "sold": counter.sold,
+            "released": counter.released,
+            "held": counter.held,
+            "expired": counter.expired,
+            "net_sold": net_sold,
+            "sell_through": round(net_sold / capacity, 4) if capacity else None,
+            "revenue": str(counter.revenue),
+            "daily": daily_sales(concert, through),
+            "as_of": as_of.isoformat() if as_of else None,
+        },
+        {
+            "self": f"/api/venues/{venue_slug}/concerts/{concert_slug}/sales/",
+            "concert": f"/api/venues/{venue_slug}/concerts/{concert_slug}/",
+        }
+    ))
 
 @csrf_exempt
-def get_concert_availability(request, venue_slug, concert_slug):
-    """Get concert ticket availability"""
+@require_admission
+@idempotent
+def best_available(request, venue_slug, concert_slug):
+    """
+    Find the best quantity adjacent seats for a ticket type: front rows
+    first, then closest to the middle of the row. With "reserve": true the
+    seats are also sold in the same call.
+    """
     concert = get_object_or_404(ConcertPage, slug=concert_slug, venue__slug=venue_slug)
 
+    if request.method == "POST":
+        try:
+            data = json.loads(request.body)
+            ticket_type = get_object_or_404(
+                TicketType.objects.select_related("seat_zone"),
+                slug=data["ticket_type_slug"],
+                concert=concert,
+            )
+            if ticket_type.type != "assigned":
+                return api_response(
+                    request,
+                    {"error": "Ticket type does not support seat selection"}, status=400
+                )
+            quantity = int(data.get("quantity", 1))
+            if not 1 <= quantity <= MAX_QUANTITY:
+                raise ValidationError(f"Quantity must be between 1 and {MAX_QUANTITY}")
+            if not get_layout(concert.venue_id).on_sale(ticket_type.seat_zone_id):
+                return api_response(request, {"error": "Zone is being provisioned"}, status=409)
+
+            if data.get("reserve"):
+                identifiers = reserve_best_available(concert, ticket_type, quantity)
+            else:
+                identifiers = find_best_available(concert, ticket_type.seat_zone, quantity)
+            if identifiers is None:
+                return api_response(
+                    request, {"error": f"No {quantity} adjacent seats available"}, status=409
+                )
+            if data.get("reserve"):
+                sync_to_google_sheets()
+
+            return api_response(request, add_hateoas_links(
+                {
+                    "seat_ids": identifiers,
+                    "row": identifiers[0][:1],
+                    "reserved": bool(data.get("reserve")),
+                },
+                {
+                    "reserve": f"/api/venues/{venue_slug}/concerts/{concert_slug}/reserve-seats/",
+                    "availability": f"/api/venues/{venue_slug}/concerts/{concert_slug}/availability/",
+                }
+            ))
+
+        except Exception as e:
+            return api_response(request, {"error": str(e)}, status=400)
+
+    return api_response(request, {"error": "Method not allowed"}, status=405)
+
+
+@require_admission
+@read_replica
+async def get_concert_availability(request, venue_slug, concert_slug):
+    """Get concert ticket availability"""
+    try:
+        concert = await ConcertPage.objects.aget(slug=concert_slug, venue__slug=venue_slug)
+    except ConcertPage.DoesNotExist:
+        raise Http404("No ConcertPage matches the given query.")
+    ticket_types = [tt async for tt in concert.ticket_types.select_related("seat_zone")]
+    await run_blocking(prefetch_availability, ticket_types)
+
     availability = []
-    for tt in concert.ticket_types.all():
+    for tt in ticket_types:
         availability.append(add_hateoas_links(
             {
                 "slug": tt.slug,
@@ -857,7 +1012,72 @@ def get_concert_availability(request, venue_slug, concert_slug):
             }
         ))
 
-    return JsonResponse({"ticket_types": availability})
+    return api_response(request, {"ticket_types": availability})
+
+
+@csrf_exempt
+def concert_queue(request, concert_slug):
+    """
+    Waiting room for a concert's on-sale: POST to join and get a ticket,
+    then GET with ?ticket= until an access_token is returned. Send that in
+    the X-Waiting-Room-Token header, and the ticket in X-Waiting-Room-Ticket,
+    to the availability and reservation endpoints. Joining checks the
+    concert is live and updates its queue row; polling is answered without
+    database access, as tickets are only issued for live concerts.
+    """
+    links = {"self": f"/api/concerts/{concert_slug}/queue/"}
+    joining = request.method == "POST" or not waiting_room.enabled()
+    if joining and not ConcertPage.objects.live().filter(slug=concert_slug).exists():
+        return api_response(request, {"error": "Concert not found"}, status=404)
+    if not waiting_room.enabled():
+        ticket = waiting_room.issue_ticket(concert_slug, time.time())
+        ticket_id, _ = waiting_room.read_ticket(concert_slug, ticket)
+        return api_response(request, add_hateoas_links(
+            {"ticket": ticket, "position": 0,
+             "access_token": waiting_room.issue_access_token(concert_slug, ticket_id)},
+            links,
+        ))
+
+    room = waiting_room.get_waiting_room()
+    if request.method == "POST":
+        ticket = waiting_room.issue_ticket(concert_slug, room.join(concert_slug))
+    elif request.method == "GET":
+        ticket = request.GET.get("ticket", "")
+    else:
+        return api_response(request, {"error": "Method not allowed"}, status=405)
+    read = waiting_room.read_ticket(concert_slug, ticket)
+    if read is None:
+        return api_response(request, {"error": "Invalid or expired ticket"}, status=400)
+    ticket_id, admitted_at = read
+
+    position = room.position(admitted_at)
+    data = {"ticket": ticket, "position": position}
+    if position:
+        data["retry_after"] = max(1, min(30, round(position / room.rate)))
+    else:
+        data["access_token"] = waiting_room.issue_access_token(concert_slug, ticket_id)
+    return api_response(request, add_hateoas_links(data, links))
+
+
+@csrf_exempt
+def suggest(request):
+    """Typeahead suggestions for artists, concerts and venues"""
+    try:
+        limit = min(int(request.GET.get("limit", 10)), 20)
+    except ValueError:
+        limit = 10
+
+    suggestions = []
+    for kind, label, slug in get_index().lookup(request.GET.get("q", ""), limit):
+        if kind == "concert":
+            link = f"/api/concerts/{slug}/"
+        elif kind == "venue":
+            link = f"/api/venues/{slug}/"
+        else:
+            link = f"/api/search/?{urlencode({'q': label})}"
+        suggestions.append({"type": kind, "label": label, "_links": {"self": link}})
+
+    return api_response(request, {"suggestions": suggestions})
 
 
 # Ticket Type Operations
@@ -870,18 +1090,28 @@ def ticket_type_detail(request, ticket_type_slug):
         try:
             data = json.loads(request.body)
 
+            values = {}
             if "price" in data:
-                tt.price = data["price"]
+                values["price"] = data["price"]
 
             if tt.type == "general" and "ga_capacity" in data:
                 if data["ga_capacity"] < tt.sold:
                     raise ValidationError("Capacity cannot be less than sold tickets")
-                tt.ga_capacity = data["ga_capacity"]
-
-            tt.save()
-            sync_to_google_sheets()
-            return JsonResponse(add_hateoas_links(
-                {"remaining": tt.remaining, "is_sold_out": tt.is_sold_out},
+                values["ga_capacity"] = data["ga_capacity"]
+
+            changed = assign(tt, values)
+            if changed:
+                fields = list(changed)
+                if "price" in changed:
+                    # A price set by hand is what dynamic pricing starts from next
+                    tt.base_price = None
+                    fields.append("base_price")
+                with transaction.atomic():
+                    tt.save(update_fields=fields)
+                    inventory_changed.send(sender=TicketType, concert=tt.concert)
+                sync_to_google_sheets()
+            return api_response(request, add_hateoas_links(
+                {"remaining": tt.remaining, "is_sold_out": tt.is_sold_out, "changed_fields": changed},
                 {
                     "self": f"/api/ticket-types/{ticket_type_slug}/",
                     "concert": f"/api/venues/{tt.concert.venue.slug}/concerts/{tt.concert.slug}/"
@@ -889,7 +1119,7 @@ def ticket_type_detail(request, ticket_type_slug):
             ))
 
         except Exception as e:
-            return JsonResponse({"error": str(e)}, status=400)
+            return api_response(request, {"error": str(e)}, status=400)
 
 
 @csrf_exempt
@@ -910,18 +1140,22 @@ def zone_list(request, venue_slug):
                     "seat_end": zone.seat_end,
                     "total_seats": zone.total_seats,
                     "type": zone.type,
+                    "provisioned": zone.provisioned,
                     "_links": {
                         "self": f"/api/venues/{venue.slug}/zones/{zone.slug}/",
                         "seats": f"/api/venues/{venue.slug}/zones/{zone.slug}/seats/",
                     },
                 }
             )
-        return JsonResponse(zones, safe=False)
+        return api_response(request, zones)
 
     elif request.method == "POST":
         try:
             data = json.loads(request.body)
-            validated = validate_seat_zone(data, 0)
+            # Zones posted without a type are assigned seating, as before
+            zone_type = data.get("type") or "assigned"
+            validated = validate_seat_zone(data, 0, zone_type)
+            validated["type"] = zone_type
             zone = SeatZone(
                 venue=venue,
                 slug=data.get("slug") or slugify(data["name"]),
@@ -930,25 +1164,93 @@ def zone_list(request, venue_slug):
             )
             zone.save()
             sync_to_google_sheets()
-            return JsonResponse(
-                add_hateoas_links(
-                    {
-                        "slug": zone.slug,
-                        "message": "Zone created",
-                        "total_seats": zone.total_seats,
-                    },
-                    {
-                        "self": f"/api/venues/{venue.slug}/zones/{zone.slug}/",
-                        "seats": f"/api/venues/{venue.slug}/zones/{zone.slug}/seats/",
-                    },
-                ),
-                status=201,
-            )
+            data = {
+                "slug": zone.slug,
+                "message": "Zone created",
+                "total_seats": zone.total_seats,
+            }
+            links = {
+                "self": f"/api/venues/{venue.slug}/zones/{zone.slug}/",
+                "seats": f"/api/venues/{venue.slug}/zones/{zone.slug}/seats/",
+            }
+            if zone.provisioned:
+                return api_response(request, add_hateoas_links(data, links), status=201)
+
+            job = zone.provisioning_jobs.latest("pk")
+            data["message"] = "Zone created, seats are being provisioned"
+            data["provisioning"] = job_data(job)
+            links["job"] = f"/api/provisioning-jobs/{job.pk}/"
+            response = api_response(request, add_hateoas_links(data, links), status=202)
+            response["Location"] = links["job"]
+            return response
 
         except Exception as e:
-            return JsonResponse({"error": str(e)}, status=400)
+            return api_response(request, {"error": str(e)}, status=400)
+
+    return api_response(request, {"error": "Method not allowed"}, status=405)
+
+
+def job_data(job):
+    return add_hateoas_links(
+        {
+            "id": job.pk,
+            "zone": job.zone.slug,
+            "status": job.status,
+            "total": job.total,
+            "progress": job.progress,
+            "attempts": job.attempts,
+            "error": job.error,
+        },
+        {
+            "self": f"/api/provisioning-jobs/{job.pk}/",
+            "zone": f"/api/venues/{job.zone.venue.slug}/zones/{job.zone.slug}/",
+        },
+    )
+
 
-    return JsonResponse({"error": "Method not allowed"}, status=405)
+@csrf_exempt
+def provisioning_job(request, job_id):
+    """Progress of a zone provisioning job; POST resumes a failed one"""
+    job = get_object_or_404(
+        ZoneProvisioningJob.objects.select_related("zone__venue"), pk=job_id
+    )
+
+    if request.method == "GET":
+        return api_response(request, job_data(job))
+
+    elif request.method == "POST":
+        if not resume(job):
+            return api_response(
+                request, {"error": f"Only failed jobs can be resumed, this one is {job.status}"},
+                status=409,
+            )
+        return api_response(request, job_data(job), status=202)
+
+    return api_response(request, {"error": "Method not allowed"}, status=405)
+
+
+def change_feed(request):
+    """
+    Venues, zones, concerts and ticket types created, updated or deleted
+    since ?cursor=, so admin clients can sync deltas instead of reloading
+    the catalog. Without a cursor the feed starts from the beginning.
+    """
+    if request.method != "GET":
+        return api_response(request, {"error": "Method not allowed"}, status=405)
+    try:
+        limit = int(request.GET.get("limit", settings.CHANGE_FEED_PAGE_SIZE))
+        if not 0 < limit <= settings.CHANGE_FEED_PAGE_SIZE:
+            raise ValueError(f"limit must be between 1 and {settings.CHANGE_FEED_PAGE_SIZE}")
+        changes, cursor, has_more = changes_since(request.GET.get("cursor"), limit)
+    except ValueError as e:
+        return api_response(request, {"error": str(e)}, status=400)
+    return api_response(request, add_hateoas_links(
+        {"changes": changes, "cursor": cursor, "has_more": has_more},
+        {
+            "self": request.get_full_path(),
+            "next": f"/api/changes/?{urlencode({'cursor': cursor})}",
+        },
+    ))
 
 
 @csrf_exempt
@@ -965,21 +1267,39 @@ def zone_detail(request, venue_slug, zone_slug):
             "seat_start": zone.seat_start,
             "seat_end": zone.seat_end,
             "total_seats": zone.total_seats,
+            "provisioned": zone.provisioned,
             "_links": {"seats": f"/api/venues/{venue_slug}/zones/{zone_slug}/seats/"},
         }
-        return JsonResponse(data)
+        return api_response(request, data)
 
-    return JsonResponse({"error": "Method not allowed"}, status=405)
+    return api_response(request, {"error": "Method not allowed"}, status=405)
 
 
-@csrf_exempt
-def zone_seats(request, venue_slug, zone_slug):
-    """List seats in a specific zone"""
-    seats = Seat.objects.filter(zone__slug=zone_slug, zone__venue__slug=venue_slug)
-    return JsonResponse(add_hateoas_links(
-        {"seats": [seat.identifier for seat in seats]},
-        {
-            "zone": f"/api/venues/{venue_slug}/zones/{zone_slug}/",
-            "venue": f"/api/venues/{venue_slug}/"
-        }
-    ))
+@read_replica
+async def zone_seats(request, venue_slug, zone_slug):
+    """List seats in a specific zone, optionally a page at a time with ?offset=&limit="""
+    venue_id = await VenuePage.objects.filter(slug=venue_slug).values_list("pk", flat=True).afirst()
+    zone = None
+    if venue_id is not None:
+        zone = (await run_blocking(get_layout, venue_id)).zones_by_slug.get(zone_slug)
+    seats = zone.identifiers if zone else []
+    links = {
+        "zone": f"/api/venues/{venue_slug}/zones/{zone_slug}/",
+        "venue": f"/api/venues/{venue_slug}/"
+    }
+
+    if "limit" in request.GET:
+        try:
+            offset = max(int(request.GET.get("offset", 0)), 0)
+            limit = min(max(int(request.GET["limit"]), 1), 1000)
+        except ValueError:
+            return api_response(request, {"error": "offset and limit must be integers"}, status=400)
+        page = seats[offset:offset + limit + 1]
+        if len(page) > limit:
+            links["next"] = (
+                f"/api/venues/{venue_slug}/zones/{zone_slug}/seats/"
+                f"?offset={offset + limit}&limit={limit}"
+            )
+        seats = page[:limit]
+
+    return api_response(request, add_hateoas_links({"seats": seats}, links))
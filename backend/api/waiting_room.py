@@ -0,0 +1,152 @@
+import math
+import secrets
+import threading
+import time
+from functools import wraps
+
+from asgiref.sync import iscoroutinefunction
+from django.conf import settings
+from django.core.signing import BadSignature, SignatureExpired, TimestampSigner
+from django.db import transaction
+from django.db.models import F, Value
+from django.db.models.functions import Greatest
+
+from .models import WaitingRoomQueue
+from .responses import api_response
+
+TOKEN_HEADER = "X-Waiting-Room-Token"
+TICKET_HEADER = "X-Waiting-Room-Ticket"
+
+_ticket_signer = TimestampSigner(salt="api.waiting_room.ticket")
+_access_signer = TimestampSigner(salt="api.waiting_room.access")
+
+
+class WaitingRoom:
+    """
+    First come, first served admission at a fixed rate per concert, shared
+    by every process.
+
+    Every arrival is given the time at which it is admitted: 1/rate seconds
+    after the caller ahead of it, or straight away while fewer than burst
+    callers have been admitted in the last burst/rate seconds, so an idle
+    concert cannot save up admissions for the next spike. Joining moves the
+    concert's WaitingRoomQueue row forward with one UPDATE; the admission
+    time goes into the signed ticket, so polling never touches the database.
+    """
+
+    def __init__(self, rate, burst=None, clock=time.time):
+        self.rate = rate
+        self.burst = burst if burst is not None else rate
+        self.clock = clock
+
+    def join(self, concert):
+        """The time at which the caller is admitted"""
+        earliest = Value(self.clock() - (self.burst - 1) / self.rate)
+        queue = WaitingRoomQueue.objects.filter(concert=concert)
+        advance = {"last_admission": Greatest(F("last_admission") + 1 / self.rate, earliest)}
+        with transaction.atomic():
+            if not queue.update(**advance):
+                _, created = WaitingRoomQueue.objects.get_or_create(
+                    concert=concert, defaults={"last_admission": earliest.value}
+                )
+                if not created:
+                    queue.update(**advance)
+            return queue.values_list("last_admission", flat=True).get()
+
+    def position(self, admitted_at):
+        """How many callers are still ahead of one admitted at admitted_at, 0 once it is admitted"""
+        # Rounded first, so float error in the stored times never delays a caller a second
+        return max(0, math.ceil(round((admitted_at - self.clock()) * self.rate, 6)))
+
+
+_room = None
+_room_lock = threading.Lock()
+
+
+def get_waiting_room():
+    """The process-wide waiting room, admitting WAITING_ROOM_RATE callers per second per concert"""
+    global _room
+    if _room is None:
+        with _room_lock:
+            if _room is None:
+                _room = WaitingRoom(settings.WAITING_ROOM_RATE)
+    return _room
+
+
+def enabled():
+    return bool(getattr(settings, "WAITING_ROOM_RATE", 0))
+
+
+def issue_ticket(concert, admitted_at):
+    """A ticket for a place in concert's queue, with its own id for the access token to name"""
+    return _ticket_signer.sign(f"{concert}:{secrets.token_urlsafe(9)}:{admitted_at:.6f}")
+
+
+def read_ticket(concert, ticket):
+    """(ticket id, admission time) of a ticket for concert, or None if it is not valid"""
+    try:
+        value = _ticket_signer.unsign(ticket, max_age=settings.WAITING_ROOM_TICKET_TTL)
+    except (BadSignature, SignatureExpired):
+        return None
+    ticket_concert, ticket_id, admitted_at = value.rsplit(":", 2)
+    return (ticket_id, float(admitted_at)) if ticket_concert == concert else None
+
+
+def issue_access_token(concert, ticket_id):
+    """An access token that is only accepted together with the ticket it was issued for"""
+    return _access_signer.sign(f"{concert}:{ticket_id}")
+
+
+def has_access(request, concert):
+    """
+    Whether the request carries a current access token for concert and the
+    ticket the token was issued for; no database access
+    """
+    token = request.headers.get(TOKEN_HEADER)
+    ticket = read_ticket(concert, request.headers.get(TICKET_HEADER, ""))
+    if not token or ticket is None:
+        return False
+    try:
+        value = _access_signer.unsign(token, max_age=settings.WAITING_ROOM_TOKEN_TTL)
+    except (BadSignature, SignatureExpired):
+        return False
+    return value == f"{concert}:{ticket[0]}"
+
+
+def _denied(request, concert):
+    return api_response(
+        request,
+        {
+            "error": "Join the waiting room for this concert first",
+            "_links": {"queue": f"/api/concerts/{concert}/queue/"},
+        },
+        status=403,
+    )
+
+
+def require_admission(view):
+    """
+    Turn away callers without an access token for the concert, and the
+    ticket it was issued for, before the view runs, so traffic beyond the admission rate never reaches the
+    database. Does nothing while the waiting room is disabled.
+    """
+
+    if iscoroutinefunction(view):
+
+        @wraps(view)
+        async def async_wrapper(request, *args, **kwargs):
+            concert = kwargs["concert_slug"]
+            if enabled() and not has_access(request, concert):
+                return _denied(request, concert)
+            return await view(request, *args, **kwargs)
+
+        return async_wrapper
+
+    @wraps(view)
+    def wrapper(request, *args, **kwargs):
+        concert = kwargs["concert_slug"]
+        if enabled() and not has_access(request, concert):
+            return _denied(request, concert)
+        return view(request, *args, **kwargs)
+
+    return wrapper
@@ -1,8 +1,58 @@
+from django.db.models import Prefetch
 from wagtail.api.v2.views import PagesAPIViewSet
 from wagtail.api.v2.router import WagtailAPIRouter
 from wagtail.images.api.v2.views import ImagesAPIViewSet
 from wagtail.documents.api.v2.views import DocumentsAPIViewSet
 
+from api.models import ConcertPage, TicketType, VenuePage, prefetch_availability
+
 api_router = WagtailAPIRouter('wagtailapi')
 
-api_router.register_endpoint('pages', PagesAPIViewSet)
\ No newline at end of file
+
+class ConcertsAPIViewSet(PagesAPIViewSet):
+    """Concert pages with venue, image and ticket types fetched up front"""
+
+    name = 'concerts'
+    model = ConcertPage
+    known_query_parameters = PagesAPIViewSet.known_query_parameters.difference(['type'])
+
+    def get_queryset(self):
+        return (
+            super()
+            .get_queryset()
+            .select_related('locale', 'venue', 'image')
+            .prefetch_related(
+                Prefetch(
+                    'ticket_types',
+                    queryset=TicketType.objects.select_related('seat_zone'),
+                )
+            )
+        )
+
+    def get_serializer(self, instance, *args, **kwargs):
+        # Availability for the whole page of results in one pass
+        concerts = instance if kwargs.get('many') else [instance]
+        prefetch_availability([tt for c in concerts for tt in c.ticket_types.all()])
+        return super().get_serializer(instance, *args, **kwargs)
+
+
+class VenuesAPIViewSet(PagesAPIViewSet):
+    """Venue pages with seat zones prefetched; seats are linked, never inlined"""
+
+    name = 'venues'
+    model = VenuePage
+    known_query_parameters = PagesAPIViewSet.known_query_parameters.difference(['type'])
+
+    def get_queryset(self):
+        return (
+            super()
+            .get_queryset()
+            .select_related('locale', 'image')
+            .prefetch_related('seat_zones')
+        )
+
+
+# More specific endpoints first, the router links each model to the first match
+api_router.register_endpoint('concerts', ConcertsAPIViewSet)
+api_router.register_endpoint('venues', VenuesAPIViewSet)
+api_router.register_endpoint('pages', PagesAPIViewSet)
@@ -61,6 +61,7 @@ MIDDLEWARE = [
     "django.middleware.clickjacking.XFrameOptionsMiddleware",
     "django.middleware.security.SecurityMiddleware",
     "wagtail.contrib.redirects.middleware.RedirectMiddleware",
+    "api.routing.ReplicaRoutingMiddleware",
 ]
 
 ROOT_URLCONF = "cms.urls"
@@ -84,6 +85,7 @@ TEMPLATES = [
 ]
 
 WSGI_APPLICATION = "cms.wsgi.application"
+ASGI_APPLICATION = "cms.asgi.application"
 
 
 # Database
@@ -96,6 +98,95 @@ DATABASES = {
     }
 }
 
+# Optional read replica for read-only API views. Locally this can be a second
+# SQLite file refreshed with `python manage.py sync_replica`.
+REPLICA_DATABASE_NAME = os.environ.get("REPLICA_DATABASE_NAME")
+if REPLICA_DATABASE_NAME:
+    DATABASES["replica"] = {
+        "ENGINE": "django.db.backends.sqlite3",
+        "NAME": REPLICA_DATABASE_NAME,
+    }
+
+DATABASE_ROUTERS = ["api.routing.PrimaryReplicaRouter"]
+
+# API responses at least this large are gzipped for clients that accept it
+API_GZIP_MIN_BYTES = 1024
+
+# Seconds a client keeps reading from the primary after a successful write
+REPLICA_STICKY_SECONDS = 5
+
+# Where data is synced after writes: "sheets" (Google Sheets), "local-file"
+# (a JSON file at API_SYNC_LOCAL_PATH), "null" or a dotted path to a class
+API_SYNC_BACKEND = os.environ.get("API_SYNC_BACKEND", "sheets")
+API_SYNC_LOCAL_PATH = os.path.join(BASE_DIR, "sheets.json")
+
+# Publish API edits of live pages in place instead of adding a revision each
+# time (see api.revisions.publish); prune old ones with `manage.py prune_revisions`
+API_REVISIONLESS_WRITES = os.environ.get("API_REVISIONLESS_WRITES") == "1"
+
+# Waiting room for on-sales (api.waiting_room): callers admitted per second per
+# concert across all processes, 0 to disable; tickets and access tokens expire
+# after the TTLs in seconds
+WAITING_ROOM_RATE = int(os.environ.get("WAITING_ROOM_RATE", 0))
+WAITING_ROOM_TICKET_TTL = 60 * 60
+WAITING_ROOM_TOKEN_TTL = 10 * 60
+
+# Responses to POSTs with an Idempotency-Key are replayed for this many seconds
+# (purge them with `manage.py purge_idempotency_keys`); a duplicate waits up to
+# IDEMPOTENCY_WAIT_TIMEOUT for the first request, which is presumed dead after
+# IDEMPOTENCY_LOCK_TIMEOUT
+IDEMPOTENCY_KEY_TTL = 24 * 60 * 60
+IDEMPOTENCY_WAIT_TIMEOUT = 10
+IDEMPOTENCY_LOCK_TIMEOUT = 60
+
+# The sales counters (api.sales, `manage.py replay_sales_events --watch`) only
+# apply events at least this many seconds old, so reservations that commit out
+# of order are not skipped
+SALES_PROJECTION_LAG = 5
+
+# Zones of more seats than this get their seats from a background job
+# (`manage.py provision_zones`) instead of in the request, writing
+# ZONE_PROVISIONING_CHUNK_SIZE seats per transaction; a job whose worker
+# reports no progress for ZONE_PROVISIONING_LOCK_TIMEOUT seconds is taken over
+ZONE_PROVISIONING_SYNC_LIMIT = int(os.environ.get("ZONE_PROVISIONING_SYNC_LIMIT", 5000))
+ZONE_PROVISIONING_CHUNK_SIZE = 5000
+ZONE_PROVISIONING_LOCK_TIMEOUT = 5 * 60
+
+# Changed concert pages are POSTed to the frontend's revalidation route
+# (api.revalidation), once changes have been quiet for REVALIDATION_DEBOUNCE
+# seconds but at most REVALIDATION_MAX_DELAY after the first, in batches of
+# REVALIDATION_BATCH_SIZE concerts, retried up to REVALIDATION_RETRIES times.
+# Leave the URL unset to send none.
+REVALIDATION_WEBHOOK_URL = os.environ.get("REVALIDATION_WEBHOOK_URL", "")
+REVALIDATION_SECRET = os.environ.get("REVALIDATION_SECRET", "")
+REVALIDATION_DEBOUNCE = 2
+REVALIDATION_MAX_DELAY = 10
+REVALIDATION_BATCH_SIZE = 100
+REVALIDATION_RETRIES = 5
+
+# /api/changes/ returns at most CHANGE_FEED_PAGE_SIZE events per page and
+# holds back events younger than CHANGE_FEED_LAG seconds, whose transaction
+# may not have committed yet (api.changefeed)
+CHANGE_FEED_PAGE_SIZE = 500
+CHANGE_FEED_LAG = 1
+# `manage.py compact_change_events` deletes events older than this many
+# seconds that a later event for the same object supersedes
+CHANGE_FEED_RETENTION = 7 * 24 * 60 * 60
+
+# Dynamic pricing (api.pricing, `manage.py reprice_tickets`): a ticket type
+# costs its base price times 1 + PRICING_DEMAND_WEIGHT[type] x (sell-through
+# minus the share expected sold by now, which grows linearly over the last
+# PRICING_HORIZON_DAYS before the show), kept between PRICING_MIN_MULTIPLIER
+# and PRICING_MAX_MULTIPLIER and rounded to a multiple of PRICING_ROUND_TO.
+PRICING_HORIZON_DAYS = 60
+PRICING_DEMAND_WEIGHT = {"assigned": 0.4, "general": 0.25}
+PRICING_MIN_MULTIPLIER = 0.7
+PRICING_MAX_MULTIPLIER = 1.5
+PRICING_ROUND_TO = 1
+
+# Threads shared by the async views for their blocking work (api.executor)
+API_BLOCKING_WORKERS = int(os.environ.get("API_BLOCKING_WORKERS", 8))
+
 
 # Password validation
 # https://docs.djangoproject.com/en/4.2/ref/settings/#auth-password-validators
@@ -166,6 +257,9 @@ STORAGES = {
 
 WAGTAIL_SITE_NAME = "cms"
 
+# Largest page size accepted by the /api/v2/ listings
+WAGTAILAPI_LIMIT_MAX = 100
+
 # Search
 # https://docs.wagtail.org/en/stable/topics/search/backends.html
 WAGTAILSEARCH_BACKENDS = {
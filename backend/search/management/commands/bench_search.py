@@ -0,0 +1,76 @@
+import datetime
+import random
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from wagtail.models import Page
+from wagtail.search.backends import get_search_backend
+
+from api.benchmarks import format_summary, timed
+from api.models import ConcertPage, VenuePage
+from api.tree import bulk_add_children
+from search.views import ResultsPage, concert_facets, search_concerts
+
+ARTISTS = ["NewJeans", "aespa", "Coldplay", "Eason Chan", "Joey Yung", "Taylor Swift",
+           "Radiohead", "BLACKPINK", "Jacky Cheung", "Hikaru Utada"]
+GENRES = ["K-Pop", "Cantopop", "Rock", "Jazz", "Classical", "Electronic", "Indie"]
+VENUES = ["Bench Stadium", "Bench Arena", "Bench Hall", "Bench Theatre"]
+QUERIES = ["newjeans", "coldplay tour", "rock", "arena", "jazz night", "chan", "hall"]
+
+
+class Command(BaseCommand):
+    help = "Benchmark concert search latency against a synthetic catalog (rolled back afterwards)"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--concerts", type=int, default=100_000)
+        parser.add_argument("--queries", type=int, default=50)
+        parser.add_argument("--seed", type=int, default=0)
+
+    def handle(self, *args, **options):
+        rng = random.Random(options["seed"])
+        with transaction.atomic():
+            self._populate(rng, options["concerts"])
+            self._run_queries(rng, options["queries"])
+            transaction.set_rollback(True)
+
+    def _populate(self, rng, count):
+        home = Page.objects.get(slug="home")
+        venues = []
+        for name in VENUES:
+            venue = VenuePage(title=name, name=name, slug=f"bench-{name.lower().replace(' ', '-')}",
+                              address="Benchmark Road", capacity=10_000)
+            home.add_child(instance=venue)
+            venues.append(venue)
+
+        start = datetime.date.today()
+        concerts = []
+        for i in range(count):
+            artist = rng.choice(ARTISTS)
+            concerts.append(ConcertPage(
+                title=f"{artist} Live {i}",
+                slug=f"bench-concert-{i}",
+                artist=artist,
+                genre=rng.choice(GENRES),
+                venue=rng.choice(venues),
+                date=start + datetime.timedelta(days=rng.randrange(365)),
+                start_time=datetime.time(20, 0),
+                end_time=datetime.time(23, 0),
+            ))
+
+        # Pages are spread over the venues the same way the API nests them
+        [insert_time] = timed(lambda: [
+            bulk_add_children(venue, [c for c in concerts if c.venue is venue])
+            for venue in venues
+        ])
+        [index_time] = timed(lambda: get_search_backend().add_bulk(ConcertPage, concerts))
+        self.stdout.write(f"Inserted {count} concerts in {insert_time:.1f}s, indexed in {index_time:.1f}s")
+
+    def _run_queries(self, rng, count):
+        queries = [rng.choice(QUERIES) for _ in range(count)]
+        pages, facets = [], []
+        for query in queries:
+            results = search_concerts(query)
+            pages += timed(lambda: ResultsPage(results, 1))
+            facets += timed(lambda: concert_facets(results))
+        self.stdout.write(format_summary("first page", pages))
+        self.stdout.write(format_summary("facets", facets))
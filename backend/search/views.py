@@ -1,7 +1,10 @@
-from django.core.paginator import EmptyPage, PageNotAnInteger, Paginator
 from django.template.response import TemplateResponse
+from django.utils.dateparse import parse_date
+from django.utils.http import urlencode
 
-from wagtail.models import Page
+from api.models import ConcertPage, VenuePage
+from api.responses import api_response
+from api.routing import read_replica
 
 # To enable logging of search queries for use with the "Promoted search results" module
 # <https://docs.wagtail.org/en/stable/reference/contrib/searchpromotions.html>
@@ -10,14 +13,106 @@ from wagtail.models import Page
 
 # from wagtail.contrib.search_promotions.models import Query
 
+RESULTS_PER_PAGE = 10
+
+
+class ResultsPage:
+    """
+    One page of search results without a COUNT query.
+
+    Django's Paginator counts every match to know the number of pages; we
+    only need to know whether there is a next page, so fetch one extra row.
+    """
+
+    def __init__(self, results, number, per_page=RESULTS_PER_PAGE):
+        self.number = number
+        start = (number - 1) * per_page
+        rows = list(results[start:start + per_page + 1])
+        self.object_list = rows[:per_page]
+        self._has_next = len(rows) > per_page
+
+    def __iter__(self):
+        return iter(self.object_list)
+
+    def __len__(self):
+        return len(self.object_list)
+
+    def has_next(self):
+        return self._has_next
+
+    def has_previous(self):
+        return self.number > 1
+
+    def next_page_number(self):
+        return self.number + 1
+
+    def previous_page_number(self):
+        return self.number - 1
+
+
+def _page_number(value):
+    try:
+        return max(int(value), 1)
+    except (TypeError, ValueError):
+        return 1
+
+
+def search_concerts(query, genre=None, venue=None, date_from=None, date_to=None):
+    """Search live concerts by title, artist, genre and venue name"""
+    concerts = ConcertPage.objects.live().select_related("venue")
+    if genre:
+        concerts = concerts.filter(genre=genre)
+    if venue:
+        venue_id = VenuePage.objects.filter(slug=venue).values_list("id", flat=True).first()
+        concerts = concerts.filter(venue_id=venue_id)
+    if date_from:
+        concerts = concerts.filter(date__gte=date_from)
+    if date_to:
+        concerts = concerts.filter(date__lte=date_to)
+    return concerts.search(query)
+
+
+def concert_facets(search_results):
+    """Match counts by genre and by venue for a concert search"""
+    venue_counts = search_results.facet("venue_id")
+    venues = {
+        v["id"]: v
+        for v in VenuePage.objects.filter(id__in=venue_counts.keys()).values(
+            "id", "slug", "name"
+        )
+    }
+    return {
+        "genre": [
+            {"value": genre, "count": count}
+            for genre, count in search_results.facet("genre").items()
+            if genre
+        ],
+        "venue": [
+            {"value": venues[venue_id]["slug"], "name": venues[venue_id]["name"], "count": count}
+            for venue_id, count in venue_counts.items()
+            if venue_id in venues
+        ],
+    }
+
+
+def _search_params(request):
+    return {
+        "genre": request.GET.get("genre") or None,
+        "venue": request.GET.get("venue") or None,
+        "date_from": parse_date(request.GET.get("date_from") or ""),
+        "date_to": parse_date(request.GET.get("date_to") or ""),
+    }
+
 
 def search(request):
     search_query = request.GET.get("query", None)
-    page = request.GET.get("page", 1)
+    page = _page_number(request.GET.get("page", 1))
+    facets = None
 
     # Search
     if search_query:
-        search_results = Page.objects.live().search(search_query)
+        results = search_concerts(search_query, **_search_params(request))
+        facets = concert_facets(results)
 
         # To log this query for use with the "Promoted search results" module:
 
@@ -25,22 +120,53 @@ def search(request):
         # query.add_hit()
 
     else:
-        search_results = Page.objects.none()
-
-    # Pagination
-    paginator = Paginator(search_results, 10)
-    try:
-        search_results = paginator.page(page)
-    except PageNotAnInteger:
-        search_results = paginator.page(1)
-    except EmptyPage:
-        search_results = paginator.page(paginator.num_pages)
+        results = ConcertPage.objects.none()
 
     return TemplateResponse(
         request,
         "search/search.html",
         {
             "search_query": search_query,
-            "search_results": search_results,
+            "search_results": ResultsPage(results, page),
+            "facets": facets,
         },
     )
+
+
+@read_replica
+def search_api(request):
+    """JSON variant of the concert search"""
+    search_query = request.GET.get("q") or request.GET.get("query")
+    if not search_query:
+        return api_response(request, {"error": "Missing search query"}, status=400)
+
+    results = search_concerts(search_query, **_search_params(request))
+    page = ResultsPage(results, _page_number(request.GET.get("page", 1)))
+    return api_response(
+        request,
+        {
+            "query": search_query,
+            "page": page.number,
+            "results": [
+                {
+                    "slug": concert.slug,
+                    "title": concert.title,
+                    "artist": concert.artist,
+                    "genre": concert.genre or "",
+                    "date": concert.date.isoformat(),
+                    "venue": concert.venue.name,
+                    "_links": {"self": f"/api/concerts/{concert.slug}/"},
+                }
+                for concert in page
+            ],
+            "facets": concert_facets(results),
+            "_links": {
+                "next": (
+                    "/api/search/?"
+                    + urlencode({**request.GET.dict(), "page": page.next_page_number()})
+                    if page.has_next()
+                    else None
+                ),
+            },
+        }
+    )
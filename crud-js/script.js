@@ -15,14 +15,60 @@ function showStatus(message, isError = false) {
     setTimeout(() => statusDiv.textContent = '', 3000);
 }
 
+// ========== Change Feed ========== //
+// Venues and concerts by id, kept current by applying /api/changes/ from
+// feedCursor on, so lists are not refetched after every edit
+const catalog = { venue: new Map(), concert: new Map() };
+let feedCursor = '';
+const FEED_POLL_INTERVAL = 2000;
+
+async function syncCatalog() {
+    let page;
+    do {
+        const response = await fetch(
+            `${API_BASE}/changes/?cursor=${encodeURIComponent(feedCursor)}`
+        );
+        if (!response.ok) throw new Error(await response.text());
+        page = await response.json();
+        for (const change of page.changes) {
+            const items = catalog[change.type];
+            if (!items) continue;
+            if (change.action === 'deleted') items.delete(change.id);
+            else items.set(change.id, { ...change.data, venue: change.parent });
+        }
+        feedCursor = page.cursor;
+    } while (page.has_more);
+}
+
+function venuesInCatalog() {
+    return [...catalog.venue.values()].sort((a, b) => a.name.localeCompare(b.name));
+}
+
+function concertsInCatalog(venueSlug) {
+    return [...catalog.concert.values()]
+        .filter(concert => concert.venue === venueSlug)
+        .sort((a, b) => `${a.date} ${a.start_time}`.localeCompare(`${b.date} ${b.start_time}`));
+}
+
+// Changes are only in the feed once they are a second old, so poll for them
+async function pollCatalog() {
+    try {
+        await syncCatalog();
+        renderVenues(venuesInCatalog());
+        const venueSlug = document.getElementById('venue-select').value;
+        if (venueSlug) renderConcerts(concertsInCatalog(venueSlug));
+    } catch (error) {
+        console.error('Change feed sync failed:', error);
+    }
+}
+
 // ========== Venue Management ========== //
 let currentEditingVenue = null;
 
 async function loadVenues() {
     try {
-        const response = await fetch(`${API_BASE}/venues/`);
-        const venues = await response.json();
-        renderVenues(venues);
+        await syncCatalog();
+        renderVenues(venuesInCatalog());
     } catch (error) {
         showStatus(error.message, true);
     }
@@ -217,9 +263,8 @@ let currentEditingConcert = null;
 
 async function loadConcerts(venueSlug) {
     try {
-        const response = await fetch(`${API_BASE}/venues/${venueSlug}/concerts/`);
-        const concerts = await response.json();
-        renderConcerts(concerts);
+        await syncCatalog();
+        renderConcerts(concertsInCatalog(venueSlug));
     } catch (error) {
         showStatus(error.message, true);
     }
@@ -476,13 +521,14 @@ function toggleTicketTypeFields(select) {
 async function initialize() {
     await loadVenues();
     
-    const venues = await fetch(`${API_BASE}/venues/`).then(r => r.json());
+    const venues = venuesInCatalog();
     const venueSelect = document.getElementById('venue-select');
     venueSelect.innerHTML = venues.map(v => 
         `<option value="${v.slug}">${v.name}</option>`
     ).join('');
     
     if (venues.length) loadConcerts(venues[0].slug);
+    setInterval(pollCatalog, FEED_POLL_INTERVAL);
 }
 
 window.addEventListener('load', initialize);
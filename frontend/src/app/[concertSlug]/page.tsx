@@ -14,6 +14,12 @@ import { Button } from "@/components/ui/button";
 import { Skeleton } from "@/components/ui/skeleton";
 import Image from "next/image";
 
+interface Rendition {
+    url: string;
+    width: number;
+    height: number;
+}
+
 interface Concert {
     id: number;
     title: string;
@@ -27,6 +33,12 @@ interface Concert {
     end_time: string;
     genre: string;
     image_url: string;
+    image_renditions: Partial<
+        Record<
+            "thumbnail" | "card" | "hero",
+            Partial<Record<"webp" | "jpeg", Rendition>>
+        >
+    > | null;
     ticket_types: {
         type: string;
         price: number;
@@ -37,8 +49,12 @@ interface Concert {
     }[];
 }
 
+// Cached until the backend's revalidation webhook (api/revalidate/route.ts)
+// invalidates this tag after the concert is published or sells seats
 async function getConcert(slug: string): Promise<Concert> {
-    const res = await fetch(`http://localhost:8000/api/concerts/${slug}/`);
+    const res = await fetch(`http://localhost:8000/api/concerts/${slug}/`, {
+        next: { tags: [`concert:${slug}`] },
+    });
     console.log(res);
     if (!res.ok) throw new Error("Failed to fetch concert");
     return res.json();
@@ -68,7 +84,10 @@ export default async function ConcertDetailPage({
                     <div className="relative h-96 rounded-2xl overflow-hidden shadow-xl">
                         {concert.image_url ? (
                             <Image
-                                src={concert.image_url}
+                                src={
+                                    concert.image_renditions?.hero?.webp?.url ??
+                                    concert.image_url
+                                }
                                 alt={concert.title}
                                 fill
                                 className="object-cover"
@@ -241,4 +260,5 @@ export default async function ConcertDetailPage({
     );
 }
 
-export const revalidate = 0;
+// Webhooks revalidate pages as they change; this only catches missed ones
+export const revalidate = 3600;
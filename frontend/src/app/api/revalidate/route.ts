@@ -0,0 +1,38 @@
+// app/api/revalidate/route.ts
+import { revalidatePath, revalidateTag } from "next/cache";
+import { NextRequest, NextResponse } from "next/server";
+
+interface RevalidationWebhook {
+    slugs?: string[];
+    paths?: string[];
+}
+
+// Called by the backend (api/revalidation.py) with the concerts whose pages
+// changed, batched and retried on failure
+export async function POST(request: NextRequest) {
+    // Without a secret anyone could flush the cache, so refuse everything
+    const secret = process.env.REVALIDATION_SECRET;
+    if (!secret) {
+        return NextResponse.json({ error: "REVALIDATION_SECRET is not set" }, { status: 401 });
+    }
+    if (request.headers.get("authorization") !== `Bearer ${secret}`) {
+        return NextResponse.json({ error: "Invalid secret" }, { status: 401 });
+    }
+
+    let body: RevalidationWebhook;
+    try {
+        body = await request.json();
+    } catch {
+        return NextResponse.json({ error: "Invalid JSON" }, { status: 400 });
+    }
+    const slugs = body.slugs ?? [];
+    const paths = body.paths ?? [];
+
+    for (const slug of slugs) {
+        revalidateTag(`concert:${slug}`);
+    }
+    for (const path of paths) {
+        revalidatePath(path);
+    }
+    return NextResponse.json({ revalidated: true, slugs, paths });
+}